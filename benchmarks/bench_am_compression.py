@@ -0,0 +1,60 @@
+"""Compare storage codecs for structured AMs of test_data/AM.
+
+Usage:
+    python benchmarks/bench_am_compression.py
+
+For each AM and codec, reports the stored size, the size transferred by psycopg2 (bytea is
+transferred hex-encoded, JSONB as text) and the time for decoding the stored value into an
+ArreteMinisteriel.
+"""
+import json
+import time
+import warnings
+from typing import Callable, List, Optional, Tuple
+
+from corpus import load_test_ams
+
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.storage_codecs import GzipCodec, StorageCodec, ZstdCodec, compact_json
+
+_NB_DECODINGS = 20
+
+
+def _codecs() -> List[Tuple[str, Optional[StorageCodec]]]:
+    codecs: List[Tuple[str, Optional[StorageCodec]]] = [('jsonb', None), ('gzip', GzipCodec())]
+    try:
+        codecs.append(('zstd', ZstdCodec()))
+    except ImportError:
+        print('zstandard is not installed, skipping zstd codec.')
+    return codecs
+
+
+def _decoding_time(decode: Callable[[], ArreteMinisteriel]) -> float:
+    start = time.perf_counter()
+    for _ in range(_NB_DECODINGS):
+        decode()
+    return (time.perf_counter() - start) / _NB_DECODINGS
+
+
+def _measure(text: str, codec: Optional[StorageCodec]) -> Tuple[int, int, float]:
+    if codec is None:
+        nb_bytes = len(text.encode('utf-8'))
+        duration = _decoding_time(lambda: ArreteMinisteriel.from_dict(json.loads(text)))
+        return nb_bytes, nb_bytes, duration
+    payload = codec.encode(text)
+    duration = _decoding_time(lambda: ArreteMinisteriel.from_dict(json.loads(codec.decode(payload))))
+    return len(payload), 2 * len(payload) + 2, duration
+
+
+def run() -> None:
+    print(f'{"AM":<22} {"codec":<6} {"stored (kB)":>12} {"wire (kB)":>10} {"decode (ms)":>12}')
+    for name, am in load_test_ams().items():
+        text = compact_json(am.to_dict())
+        for codec_name, codec in _codecs():
+            stored, wire, duration = _measure(text, codec)
+            print(f'{name:<22} {codec_name:<6} {stored / 1000:12.1f} {wire / 1000:10.1f} {duration * 1000:12.2f}')
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    run()
@@ -0,0 +1,83 @@
+"""Compare the binary format of envinorma.models.binary_codec with JSON on test_data/AM.
+
+Usage:
+    python benchmarks/bench_binary_codec.py [--repeat 10]
+
+Documents are the AMs of test_data/AM, raw and enriched, and one parametrization per AM with
+an inapplicability on regime and an alternative section on installation date for each article
+(test_data has no parametrization). For each codec, the total size (raw and gzipped) and the
+best decoding time over `repeat` runs are reported, for the tree of dicts alone and for the models.
+"""
+import argparse
+import gzip
+import time
+import warnings
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+
+from corpus import load_test_ams
+
+from envinorma.enriching import enrich
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.binary_codec import BinaryCodec
+from envinorma.models.codec import JSONCodec, ModelCodec, OrjsonCodec, decode_am, decode_parametrization
+from envinorma.models.condition import Equal, Greater
+from envinorma.models.parameter import ParameterEnum
+from envinorma.models.regime import Regime
+from envinorma.parametrization.models.parametrization import AlternativeSection, InapplicableSection, Parametrization
+
+
+def _parametrization(am: ArreteMinisteriel) -> Parametrization:
+    regime, date_ = ParameterEnum.REGIME.value, ParameterEnum.DATE_INSTALLATION.value
+    sections = [section for section in am.descendent_sections() if not section.sections]
+    inapplicable_sections = [InapplicableSection(sec.id, None, Equal(regime, Regime.D)) for sec in sections]
+    alternative_sections = [AlternativeSection(sec.id, sec, Greater(date_, date(2010, 1, 1))) for sec in sections]
+    return Parametrization(inapplicable_sections, alternative_sections, [])
+
+
+def _load_documents() -> List[Tuple[Dict[str, Any], Callable[[bytes, ModelCodec], Any]]]:
+    documents: List[Tuple[Dict[str, Any], Callable[[bytes, ModelCodec], Any]]] = []
+    for name, am in load_test_ams().items():
+        metadata = AMMetadata(
+            am.id or name, '1234', am.title.text, [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+        )
+        documents.append((am.to_dict(), decode_am))
+        documents.append((enrich(am, metadata).to_dict(), decode_am))
+        documents.append((_parametrization(am).to_dict(), decode_parametrization))
+    return documents
+
+
+def _best_duration(function: Callable[[], object], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def run(repeat: int) -> None:
+    documents = _load_documents()
+    print(f'{len(documents)} documents')
+    print(f'{"":<8} {"size":>8} {"gzipped":>8} {"loads":>9} {"decode":>9}')
+    for codec in [JSONCodec(), OrjsonCodec(), BinaryCodec()]:
+        payloads = [(codec.dumps(dict_), decoder) for dict_, decoder in documents]
+        for (dict_, _), (payload, _) in zip(documents, payloads):
+            assert codec.loads(payload) == dict_
+        size = sum(len(payload) for payload, _ in payloads)
+        gzipped_size = sum(len(gzip.compress(payload)) for payload, _ in payloads)
+        loads_duration = _best_duration(lambda: [codec.loads(payload) for payload, _ in payloads], repeat)
+        decode_duration = _best_duration(lambda: [decoder(payload, codec) for payload, decoder in payloads], repeat)
+        print(
+            f'{codec.name:<8} {size / 1e6:6.2f}MB {gzipped_size / 1e6:6.2f}MB'
+            f' {loads_duration * 1000:7.1f}ms {decode_duration * 1000:7.1f}ms'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+    run(args.repeat)
@@ -0,0 +1,65 @@
+"""Measure the scaling of the parallel enrichment of DataFetcher.build_enriched_ams.
+
+Usage:
+    python benchmarks/bench_build_enriched_ams.py [--copies 20] [--workers 1 2 4 8]
+
+The AMs of test_data/AM are replicated `copies` times and enriched sequentially, then with
+process pools of increasing size. No database is needed: only the CPU-bound step is measured.
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+from datetime import date
+from typing import List, Tuple
+
+from corpus import load_test_ams
+
+from envinorma.data_fetcher import _enrich_and_add_parametrization_str, _enrich_in_process_pool, _load_am_str
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.parametrization.models.parametrization import Parametrization
+from envinorma.storage_codecs import compact_json
+
+
+def _build_tasks(copies: int) -> List[Tuple[str, str, str, str]]:
+    parametrization = json.dumps(Parametrization([], [], []).to_dict())
+    tasks = []
+    for name, am in load_test_ams().items():
+        am_id = am.id or name
+        metadata = AMMetadata(am_id, '1234', am.title.text, [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA)
+        task = (am_id, compact_json(am.to_dict()), json.dumps(metadata.to_dict()), parametrization)
+        tasks.extend([task] * copies)
+    return tasks
+
+
+def _sequential(tasks: List[Tuple[str, str, str, str]]) -> float:
+    start = time.perf_counter()
+    for _, *texts in tasks:
+        _load_am_str(_enrich_and_add_parametrization_str(*texts))
+    return time.perf_counter() - start
+
+
+def _parallel(tasks: List[Tuple[str, str, str, str]], workers: int) -> float:
+    start = time.perf_counter()
+    _enrich_in_process_pool(tasks, workers)
+    return time.perf_counter() - start
+
+
+def run(copies: int, workers: List[int]) -> None:
+    tasks = _build_tasks(copies)
+    print(f'{len(tasks)} AMs, {os.cpu_count()} CPUs')
+    reference = _sequential(tasks)
+    print(f'{"sequential":<12} {reference:8.2f}s')
+    for nb_workers in workers:
+        duration = _parallel(tasks, nb_workers)
+        print(f'{nb_workers:>2} workers   {duration:8.2f}s  speedup {reference / duration:5.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--copies', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+    run(args.copies, args.workers)
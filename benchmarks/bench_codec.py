@@ -0,0 +1,72 @@
+"""Measure the throughput of the codecs of envinorma.models.codec on test_data/AM.
+
+Usage:
+    python benchmarks/bench_codec.py [--repeat 20]
+
+For each codec, the AMs of test_data/AM (raw and enriched) are encoded and decoded. The JSON
+step alone (dumps/loads of the dicts) and the full step (to_dict/from_dict included) are
+measured separately, as the best of `repeat` runs, in MB of JSON per second. The lazy column
+decodes AMs with lazy sections and only reads their title, as listing endpoints do.
+"""
+import argparse
+import time
+import warnings
+from datetime import date
+from typing import Callable, List
+
+from corpus import load_test_ams
+
+from envinorma.enriching import enrich
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.codec import JSONCodec, OrjsonCodec, decode_am, encode_am
+
+
+def _load_corpus() -> List[ArreteMinisteriel]:
+    ams = []
+    for name, am in load_test_ams().items():
+        metadata = AMMetadata(
+            am.id or name, '1234', am.title.text, [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+        )
+        ams.extend([am, enrich(am, metadata)])
+    return ams
+
+
+def _best_duration(function: Callable[[], object], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def run(repeat: int) -> None:
+    ams = _load_corpus()
+    dicts = [am.to_dict() for am in ams]
+    nb_bytes = sum(len(encode_am(am, JSONCodec())) for am in ams)
+    print(f'{len(ams)} AMs, {nb_bytes / 1e6:.1f}MB of JSON')
+    print(f'{"MB/s":<8} {"dumps":>8} {"loads":>8} {"encode_am":>10} {"decode_am":>10} {"lazy":>10}')
+    for codec in [JSONCodec(), OrjsonCodec()]:
+        payloads = [codec.dumps(dict_) for dict_ in dicts]
+        durations = [
+            _best_duration(lambda: [codec.dumps(dict_) for dict_ in dicts], repeat),
+            _best_duration(lambda: [codec.loads(payload) for payload in payloads], repeat),
+            _best_duration(lambda: [encode_am(am, codec) for am in ams], repeat),
+            _best_duration(lambda: [decode_am(payload, codec) for payload in payloads], repeat),
+            _best_duration(lambda: [decode_am(payload, codec, lazy=True).title for payload in payloads], repeat),
+        ]
+        print(
+            f'{codec.name:<8} '
+            + ' '.join(
+                f'{nb_bytes / 1e6 / duration:>{width}.1f}' for duration, width in zip(durations, [8, 8, 10, 10, 10])
+            )
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+    run(args.repeat)
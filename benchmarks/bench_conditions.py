@@ -0,0 +1,138 @@
+"""Compare Condition.is_satisfied with the functions built by compile_condition.
+
+Usage:
+    python benchmarks/bench_conditions.py [--parametrizations parametrizations.json] [--repeat 20]
+
+Every condition of the parametrizations is evaluated on the parameter values generated by
+generate_exhaustive_combinations for its parametrization, with both evaluators. Parametrizations
+are read from a JSON file mapping AM ids to Parametrization.to_dict outputs, for instance dumped
+from DataFetcher.load_all_parametrizations. Without it, a sample parametrization with the usual
+shapes of conditions (regimes, date and quantity thresholds, AND/OR) is used.
+"""
+import argparse
+import json
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from envinorma.models import Regime
+from envinorma.models.condition import (
+    AndCondition,
+    Condition,
+    Equal,
+    Greater,
+    Littler,
+    OrCondition,
+    Range,
+    compile_condition,
+)
+from envinorma.models.parameter import Parameter, ParameterEnum
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import estr
+from envinorma.parametrization.combinations import generate_exhaustive_combinations
+from envinorma.parametrization.models.parametrization import AlternativeSection, InapplicableSection, Parametrization
+
+_Case = Tuple[Condition, List[Dict[Parameter, object]]]
+
+
+def _sample_parametrizations() -> Dict[str, Parametrization]:
+    regime = ParameterEnum.REGIME.value
+    installation = ParameterEnum.DATE_INSTALLATION.value
+    quantity = ParameterEnum.RUBRIQUE_QUANTITY.value
+    new_text = StructuredText(estr('Article 1'), [estr('Nouvelle version')], [], None)
+    regimes = Parametrization(
+        [
+            InapplicableSection('a', None, Equal(regime, Regime.D)),
+            InapplicableSection(
+                'b', [0, 1], OrCondition(frozenset([Equal(regime, Regime.E), Equal(regime, Regime.D)]))
+            ),
+        ],
+        [AlternativeSection('c', new_text, Equal(regime, Regime.A))],
+        [],
+    )
+    dates = Parametrization(
+        [
+            InapplicableSection('a', None, Littler(installation, date(2003, 1, 1))),
+            InapplicableSection('b', None, Range(installation, date(2003, 1, 1), date(2010, 7, 1))),
+        ],
+        [AlternativeSection('c', new_text, Greater(installation, date(2010, 7, 1)))],
+        [],
+    )
+    mixed = Parametrization(
+        [
+            InapplicableSection(
+                'a', None, AndCondition(frozenset([Equal(regime, Regime.E), Littler(installation, date(2010, 7, 1))]))
+            ),
+            InapplicableSection(
+                'b', None, AndCondition(frozenset([Equal(regime, Regime.A), Greater(installation, date(2010, 7, 1))]))
+            ),
+            InapplicableSection('c', None, Littler(quantity, 100)),
+            InapplicableSection('d', None, Range(quantity, 100, 1000)),
+        ],
+        [],
+        [],
+    )
+    return {'regimes': regimes, 'dates': dates, 'mixed': mixed}
+
+
+def _load_parametrizations(filename: Optional[str]) -> Dict[str, Parametrization]:
+    if not filename:
+        return _sample_parametrizations()
+    with open(filename) as file_:
+        return {am_id: Parametrization.from_dict(dict_) for am_id, dict_ in json.load(file_).items()}
+
+
+def _cases(parametrizations: Dict[str, Parametrization]) -> List[_Case]:
+    cases: List[_Case] = []
+    for parametrization in parametrizations.values():
+        try:
+            parameter_values = list(generate_exhaustive_combinations(parametrization).values())
+        except NotImplementedError:
+            parameter_values = []
+        parameter_values.append({})
+        cases.extend((condition, parameter_values) for condition in parametrization.extract_conditions())
+    return cases
+
+
+def _best_duration(evaluate: Callable[[], None], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluate()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def run(filename: Optional[str], repeat: int) -> None:
+    cases = _cases(_load_parametrizations(filename))
+    nb_evaluations = sum(len(parameter_values) for _, parameter_values in cases)
+    start = time.perf_counter()
+    compiled_cases = [(compile_condition(condition), parameter_values) for condition, parameter_values in cases]
+    compilation = time.perf_counter() - start
+    for (condition, parameter_values), (compiled, _) in zip(cases, compiled_cases):
+        for values in parameter_values:
+            assert compiled(values) == condition.is_satisfied(values), f'Different results for {condition}'
+    print(f'{len(cases)} conditions, {nb_evaluations} evaluations, compiled in {compilation * 1000:.1f}ms')
+
+    def _interpreted() -> None:
+        for condition, parameter_values in cases:
+            for values in parameter_values:
+                condition.is_satisfied(values)
+
+    def _compiled() -> None:
+        for compiled, parameter_values in compiled_cases:
+            for values in parameter_values:
+                compiled(values)
+
+    interpreted_duration, compiled_duration = _best_duration(_interpreted, repeat), _best_duration(_compiled, repeat)
+    print(f'{"is_satisfied":<18} {interpreted_duration / nb_evaluations * 1e9:8.0f}ns per evaluation')
+    print(f'{"compile_condition":<18} {compiled_duration / nb_evaluations * 1e9:8.0f}ns per evaluation')
+    print(f'speedup {interpreted_duration / compiled_duration:.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parametrizations', help='JSON file mapping AM ids to parametrizations.')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.parametrizations, args.repeat)
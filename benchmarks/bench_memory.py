@@ -0,0 +1,114 @@
+"""Measure the memory held by AMs loaded in memory, with and without __slots__ on model classes.
+
+Usage:
+    python benchmarks/bench_memory.py
+
+The AMs of test_data/AM, raw and enriched, are loaded from their JSON serialization with
+ArreteMinisteriel.from_dict, and the memory they retain is measured with tracemalloc, strings
+included. The former layout, where each instance of the text tree has a __dict__, is reproduced
+by rebuilding the slotted classes without __slots__ and substituting them in envinorma modules
+during the measurement.
+"""
+import gc
+import json
+import sys
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Tuple
+
+from corpus import load_test_ams
+
+from envinorma.enriching import enrich
+from envinorma.models import structured_text, text_elements
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+
+
+def _without_slots(cls: type) -> type:
+    cls_dict = {key: value for key, value in cls.__dict__.items() if key not in cls.__dict__['__slots__']}
+    del cls_dict['__slots__']
+    unslotted_cls = type(cls.__name__, cls.__bases__, cls_dict)
+    unslotted_cls.__qualname__ = cls.__qualname__
+    return unslotted_cls
+
+
+def _slotted_classes() -> Dict[type, type]:
+    classes = [*vars(text_elements).values(), *vars(structured_text).values()]
+    return {
+        cls: _without_slots(cls)
+        for cls in classes
+        if isinstance(cls, type) and '__slots__' in cls.__dict__ and hasattr(cls, '__dataclass_fields__')
+    }
+
+
+@contextmanager
+def _former_classes() -> Iterator[None]:
+    """Replace slotted classes by classes with a __dict__ in all envinorma modules."""
+    replacements = _slotted_classes()
+    replaced: List[Tuple[Any, str, type]] = []
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('envinorma'):
+            continue
+        for attribute, value in list(vars(module).items()):
+            if isinstance(value, type) and value in replacements:
+                replaced.append((module, attribute, value))
+                setattr(module, attribute, replacements[value])
+    try:
+        yield
+    finally:
+        for module, attribute, value in replaced:
+            setattr(module, attribute, value)
+
+
+def _load_payloads() -> List[str]:
+    payloads = []
+    for name, am in load_test_ams().items():
+        metadata = AMMetadata(
+            am.id or name, '1234', am.title.text, [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+        )
+        payloads.extend([json.dumps(am.to_dict()), json.dumps(enrich(am, metadata).to_dict())])
+    return payloads
+
+
+def _retained_bytes(payload: str) -> Tuple[int, ArreteMinisteriel]:
+    gc.collect()
+    tracemalloc.start()
+    am = ArreteMinisteriel.from_dict(json.loads(payload))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained, am
+
+
+def _measure(payloads: List[str]) -> List[int]:
+    retained_bytes = []
+    for payload in payloads:
+        retained, _ = _retained_bytes(payload)
+        retained_bytes.append(retained)
+    return retained_bytes
+
+
+def run() -> None:
+    payloads = _load_payloads()
+    with _former_classes():
+        former = _measure(payloads)
+        former_am = _retained_bytes(payloads[0])[1]
+        assert hasattr(former_am.sections[0].title, '__dict__'), 'Former classes are not used'
+    current = _measure(payloads)
+    print(f'{len(payloads)} AMs')
+    print(f'{"AM":<4} {"JSON size":>10} {"with __dict__":>14} {"with __slots__":>15} {"saved":>7}')
+    for rank, (payload, former_bytes, bytes_) in enumerate(zip(payloads, former, current)):
+        saved = 1 - bytes_ / former_bytes
+        print(
+            f'{rank:<4} {len(payload) / 1024:8.0f}kB {former_bytes / 1024:12.0f}kB {bytes_ / 1024:13.0f}kB {saved:7.1%}'
+        )
+    former_mean, mean = sum(former) / len(former), sum(current) / len(current)
+    saved = 1 - mean / former_mean
+    print(f'mean bytes per AM: {former_mean:.0f} with __dict__, {mean:.0f} with __slots__ ({saved:.1%} saved)')
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    run()
@@ -0,0 +1,132 @@
+"""Compare ArreteMinisteriel.to_dict with the former serializer based on dataclasses.asdict.
+
+Usage:
+    python benchmarks/bench_to_dict.py [--repeat 20]
+
+Both serializers are run on the AMs of test_data/AM, raw and enriched. The former one is
+reproduced below: each to_dict started with asdict, which deep copies the whole subtree, before
+serializing the fields again. Durations are the best of `repeat` runs over the corpus, and peak
+allocations are measured with tracemalloc on one run.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import warnings
+from dataclasses import asdict
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from corpus import load_test_ams
+
+from envinorma.enriching import enrich
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.structured_text import Applicability, SectionParametrization, StructuredText
+from envinorma.models.text_elements import EnrichedString
+
+
+def _former_string(str_: EnrichedString) -> Dict[str, Any]:
+    dict_ = asdict(str_)
+    dict_['table'] = str_.table.to_dict() if str_.table else None
+    if not dict_['table']:
+        del dict_['table']
+    if not str_.links:
+        del dict_['links']
+    if not str_.inactive:
+        del dict_['inactive']
+    return dict_
+
+
+def _former_applicability(applicability: Applicability) -> Dict[str, Any]:
+    dict_ = asdict(applicability)
+    if applicability.previous_version:
+        dict_['previous_version'] = _former_text(applicability.previous_version)
+    return dict_
+
+
+def _former_parametrization(parametrization: SectionParametrization) -> Dict[str, Any]:
+    dict_ = asdict(parametrization)
+    dict_['potential_inapplicabilities'] = [p.to_dict() for p in parametrization.potential_inapplicabilities]
+    dict_['potential_modifications'] = [
+        {'condition': p.condition.to_dict(), 'new_version': _former_text(p.new_version)}
+        for p in parametrization.potential_modifications
+    ]
+    return dict_
+
+
+def _former_text(text: StructuredText) -> Dict[str, Any]:
+    res = asdict(text)
+    res['title'] = _former_string(text.title)
+    res['outer_alineas'] = [_former_string(al) for al in text.outer_alineas]
+    res['sections'] = [_former_text(se) for se in text.sections]
+    res['applicability'] = _former_applicability(text.applicability) if text.applicability else None
+    res['annotations'] = text.annotations.to_dict() if text.annotations else None
+    res['parametrization'] = _former_parametrization(text.parametrization)
+    res['reference'] = text.reference.to_dict() if text.reference else None
+    return res
+
+
+def _former_am(am: ArreteMinisteriel) -> Dict[str, Any]:
+    res = asdict(am)
+    if res['date_of_signature']:
+        res['date_of_signature'] = str(res['date_of_signature'])
+    res['title'] = _former_string(am.title)
+    res['visa'] = [_former_string(vi) for vi in am.visa]
+    res['sections'] = [_former_text(section) for section in am.sections]
+    res['classements'] = [cl.to_dict() for cl in am.classements]
+    res['classements_with_alineas'] = [cl.to_dict() for cl in am.classements_with_alineas]
+    res['applicability'] = am.applicability.to_dict()
+    return res
+
+
+def _load_corpus() -> List[ArreteMinisteriel]:
+    ams = []
+    for name, am in load_test_ams().items():
+        metadata = AMMetadata(
+            am.id or name, '1234', am.title.text, [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+        )
+        ams.extend([am, enrich(am, metadata)])
+    return ams
+
+
+def _best_duration(serializer: Callable[[ArreteMinisteriel], Dict], ams: List[ArreteMinisteriel], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for am in ams:
+            serializer(am)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def _peak_allocations(serializer: Callable[[ArreteMinisteriel], Dict], ams: List[ArreteMinisteriel]) -> int:
+    peak = 0
+    for am in ams:
+        tracemalloc.start()
+        serializer(am)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def run(repeat: int) -> None:
+    ams = _load_corpus()
+    for am in ams:
+        assert json.dumps(am.to_dict()) == json.dumps(_former_am(am)), f'Different serializations for {am.id}'
+    print(f'{len(ams)} AMs, serializations are identical')
+    former_duration = _best_duration(_former_am, ams, repeat)
+    duration = _best_duration(ArreteMinisteriel.to_dict, ams, repeat)
+    former_peak, peak = _peak_allocations(_former_am, ams), _peak_allocations(ArreteMinisteriel.to_dict, ams)
+    print(f'{"":<10} {"duration":>10} {"peak allocations (largest AM)":>31}')
+    print(f'{"asdict":<10} {former_duration * 1000:8.1f}ms {former_peak / 1024:29.0f}kB')
+    print(f'{"to_dict":<10} {duration * 1000:8.1f}ms {peak / 1024:29.0f}kB')
+    print(f'speedup {former_duration / duration:.2f}, peak allocations divided by {former_peak / peak:.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')
+    run(args.repeat)
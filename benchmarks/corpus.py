@@ -0,0 +1,27 @@
+"""Sample corpus shared by benchmarks: AMs built from test_data/AM."""
+import json
+import os
+import warnings
+from typing import Dict
+
+from leginorma import LegifranceText
+
+from envinorma.from_legifrance.legifrance_to_am import legifrance_to_arrete_ministeriel
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+
+_TEST_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_data', 'AM')
+
+
+def load_test_ams() -> Dict[str, ArreteMinisteriel]:
+    """Load all AMs of test_data/AM, by file name."""
+    ams: Dict[str, ArreteMinisteriel] = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        legifrance_folder = os.path.join(_TEST_DATA, 'legifrance_texts')
+        for filename in sorted(os.listdir(legifrance_folder)):
+            text = LegifranceText.from_dict(json.load(open(os.path.join(legifrance_folder, filename))))
+            ams[filename] = legifrance_to_arrete_ministeriel(text)
+        minified_folder = os.path.join(_TEST_DATA, 'minified_texts')
+        for filename in sorted(os.listdir(minified_folder)):
+            ams[filename] = ArreteMinisteriel.from_dict(json.load(open(os.path.join(minified_folder, filename))))
+    return ams
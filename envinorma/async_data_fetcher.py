@@ -0,0 +1,295 @@
+"""Asyncio counterpart of envinorma.data_fetcher.DataFetcher.
+
+Requires the optional dependency asyncpg (`pip install envinorma[async]`).
+"""
+import asyncio
+import json
+import re
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Type, TypeVar
+
+import asyncpg
+
+from envinorma.data_fetcher import (
+    _am_metadata_filters,
+    _decode_document,
+    _document_columns,
+    _document_values,
+    _enrich_and_add_parametrization,
+    _load_am_metadata_str,
+    _load_am_str,
+    _load_parametrization_str,
+    _record_change_query,
+    _recreate_with_removed_parameter,
+    _recreate_with_upserted_parameter,
+    _upsert_query,
+)
+from envinorma.models.am_metadata import AMMetadata, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.regime import Regime
+from envinorma.parametrization.models.parametrization import ParameterElement, Parametrization
+from envinorma.storage_codecs import StorageCodec, compact_json
+
+T = TypeVar('T')
+
+
+def _to_asyncpg_query(query: str) -> str:
+    """Replace psycopg2 placeholders (%s) with asyncpg placeholders ($1, $2, ...)."""
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub('%s', lambda _: f'${next(counter)}', query)
+
+
+@dataclass
+class AMBundle:
+    """AM loaded together with its metadata and its parametrization."""
+
+    am: Optional[ArreteMinisteriel]
+    metadata: Optional[AMMetadata]
+    parametrization: Optional[Parametrization]
+
+
+class AsyncDataFetcher:
+    """Asyncio version of DataFetcher, backed by an asyncpg connection pool.
+
+    Decoding and enrichment are CPU-bound: they are run in an executor so that the event
+    loop is never blocked by ArreteMinisteriel.from_dict.
+
+    Only the document layout of DataFetcher is supported: parametrizations are read from and
+    written to table parametrization, so a database written with parametrization_rows=True is
+    not read correctly, and writes of AMs do not update table am_section used by section_rows.
+    There is no cache: writes do not invalidate the cache of a DataFetcher.
+
+    Args:
+        psql_dsn (str):
+            PostgreSQL DSN for connecting to the server.
+        min_connections (int = 1):
+            number of connections kept open in the pool.
+        max_connections (int = 10):
+            maximal number of connections opened simultaneously.
+        executor (Optional[Executor] = None):
+            executor used for decoding and enrichment. If None, the default executor
+            of the event loop is used.
+        codec (Optional[StorageCodec] = None):
+            if not None, AMs are written compressed with this codec (see DataFetcher).
+    """
+
+    def __init__(
+        self,
+        psql_dsn: str,
+        min_connections: int = 1,
+        max_connections: int = 10,
+        executor: Optional[Executor] = None,
+        codec: Optional[StorageCodec] = None,
+    ) -> None:
+        self.psql_dsn = psql_dsn
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.executor = executor
+        self.codec = codec
+        self._pool: Optional[asyncpg.pool.Pool] = None
+        # Created by _get_pool, within the running event loop.
+        self._pool_lock: Optional[asyncio.Lock] = None
+        self._session_connection: ContextVar[Optional[asyncpg.Connection]] = ContextVar(
+            f'envinorma_session_{id(self)}', default=None
+        )
+
+    async def _get_pool(self) -> asyncpg.pool.Pool:
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    self.psql_dsn, min_size=self.min_connections, max_size=self.max_connections
+                )
+            return self._pool
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator['AsyncDataFetcher']:
+        """Run all queries of the context on one connection and in one transaction.
+
+        Queries of a session are executed serially, since a connection cannot run
+        two queries at once. Nested sessions are merged into the outermost one.
+
+        Yields:
+            AsyncDataFetcher: the fetcher itself.
+        """
+        if self._session_connection.get() is not None:
+            yield self
+            return
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.transaction():
+                token = self._session_connection.set(connection)
+                try:
+                    yield self
+                finally:
+                    self._session_connection.reset(token)
+
+    async def _fetch(self, query: str, *values: Any) -> List[asyncpg.Record]:
+        connection = self._session_connection.get()
+        if connection is not None:
+            return await connection.fetch(_to_asyncpg_query(query), *values)
+        pool = await self._get_pool()
+        return await pool.fetch(_to_asyncpg_query(query), *values)
+
+    async def _execute(self, query: str, *values: Any) -> None:
+        connection = self._session_connection.get()
+        if connection is not None:
+            await connection.execute(_to_asyncpg_query(query), *values)
+            return
+        pool = await self._get_pool()
+        await pool.execute(_to_asyncpg_query(query), *values)
+
+    async def _gather(self, *awaitables: Awaitable[Any]) -> List[Any]:
+        # A connection cannot run two queries at once: inside a session, queries are run serially.
+        if self._session_connection.get() is not None:
+            return [await awaitable for awaitable in awaitables]
+        return list(await asyncio.gather(*awaitables))
+
+    async def _run_in_executor(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _load_one(self, table: str, am_id: str, decoder: Callable[[str], T]) -> Optional[T]:
+        rows = await self._fetch(f'SELECT {_document_columns(table)} FROM {table} WHERE am_id = %s;', am_id)
+        if len(rows) > 1:
+            raise ValueError(f'Expecting at most one row, got {len(rows)}.')
+        if not rows:
+            return None
+        return await self._run_in_executor(_decode_document, decoder, tuple(rows[0]))
+
+    async def _upsert_document(self, table: str, am_id: str, text: str) -> None:
+        await self._execute(_upsert_query(table), am_id, *_document_values(table, text, self.codec))
+
+    async def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
+        return await self._load_one('am_metadata', am_id, _load_am_metadata_str)
+
+    async def load_all_am_metadata(
+        self, with_deleted_ams: bool = False, with_fake: bool = True
+    ) -> Dict[str, AMMetadata]:
+        filters, values = _am_metadata_filters(with_deleted_ams, with_fake)
+        rows = await self._fetch(f'SELECT am_id, data FROM am_metadata{filters};', *values)
+        metadata = await asyncio.gather(*[self._run_in_executor(_load_am_metadata_str, row['data']) for row in rows])
+        return {row['am_id']: am_md for row, am_md in zip(rows, metadata)}
+
+    async def load_am_ids(
+        self,
+        rubrique: Optional[str] = None,
+        regime: Optional[Regime] = None,
+        is_transverse: Optional[bool] = None,
+        with_deleted_ams: bool = False,
+        with_fake: bool = True,
+    ) -> Set[str]:
+        filters, values = _am_metadata_filters(with_deleted_ams, with_fake, rubrique, regime, is_transverse)
+        rows = await self._fetch(f'SELECT am_id FROM am_metadata{filters};', *values)
+        return {row['am_id'] for row in rows}
+
+    async def upsert_am_metadata(self, am_md: AMMetadata) -> None:
+        await self._upsert_document('am_metadata', am_md.cid, json.dumps(am_md.to_dict()))
+
+    async def delete_am_metadata(self, am_id: str, reason_deleted: str) -> None:
+        async with self.session():
+            am_metadata = await self.load_am_metadata(am_id)
+            if not am_metadata:
+                raise ValueError(f'AM with id {am_id} does not exist, cannot delete it.')
+            # replace instead of mutating, as in DataFetcher.delete_am_metadata
+            await self.upsert_am_metadata(replace(am_metadata, state=AMState.DELETED, reason_deleted=reason_deleted))
+
+    async def load_parametrization(self, am_id: str) -> Optional[Parametrization]:
+        return await self._load_one('parametrization', am_id, _load_parametrization_str)
+
+    async def load_or_init_parametrization(self, am_id: str) -> Parametrization:
+        return await self.load_parametrization(am_id) or Parametrization([], [], [])
+
+    async def load_all_parametrizations(self) -> Dict[str, Parametrization]:
+        rows = await self._fetch('SELECT am_id, data FROM parametrization;')
+        params = await asyncio.gather(*[self._run_in_executor(_load_parametrization_str, row['data']) for row in rows])
+        return {row['am_id']: param for row, param in zip(rows, params)}
+
+    async def upsert_new_parametrization(self, am_id: str, parametrization: Parametrization) -> None:
+        await self._upsert_document('parametrization', am_id, json.dumps(parametrization.to_dict()))
+
+    async def upsert_parameter(self, am_id: str, new_parameter: ParameterElement, parameter_id: Optional[str]) -> None:
+        async with self.session():
+            previous_parametrization = await self.load_or_init_parametrization(am_id)
+            parametrization = _recreate_with_upserted_parameter(new_parameter, parameter_id, previous_parametrization)
+            parametrization.check_consistency()
+            await self.upsert_new_parametrization(am_id, parametrization)
+
+    async def remove_parameter(self, am_id: str, parameter_type: Type[ParameterElement], parameter_id: str) -> None:
+        async with self.session():
+            previous_parametrization = await self.load_parametrization(am_id)
+            if not previous_parametrization:
+                raise ValueError('Expecting a non null parametrization.')
+            parametrization = _recreate_with_removed_parameter(parameter_type, parameter_id, previous_parametrization)
+            await self.upsert_new_parametrization(am_id, parametrization)
+
+    async def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        return await self._load_one('structured_am', am_id, _load_am_str)
+
+    async def load_ams(self, am_ids: Set[str]) -> List[ArreteMinisteriel]:
+        query = f"SELECT {_document_columns('structured_am')} FROM structured_am WHERE am_id = ANY(%s);"
+        rows = await self._fetch(query, list(am_ids))
+        decoded_ams = [self._run_in_executor(_decode_document, _load_am_str, tuple(row)) for row in rows]
+        return list(await asyncio.gather(*decoded_ams))
+
+    async def load_id_to_am(self, ids: Optional[Set[str]] = None) -> Dict[str, ArreteMinisteriel]:
+        ids = ids or await self.load_am_ids()
+        id_to_am = {am.id or '': am for am in await self.load_ams(ids)}
+        return {id_: id_to_am[id_] for id_ in ids if id_ in id_to_am}
+
+    async def delete_am(self, am_id: str) -> None:
+        async with self.session():
+            await self._execute('DELETE FROM structured_am WHERE am_id = %s;', am_id)
+            await self._execute(_record_change_query(), 'structured_am', am_id)
+
+    async def upsert_am(self, am_id: str, am: ArreteMinisteriel) -> None:
+        await self._upsert_document('structured_am', am_id, compact_json(am.to_dict()))
+
+    async def load_bundle(self, am_id: str) -> AMBundle:
+        """Load an AM, its metadata and its parametrization with three concurrent queries.
+
+        Inside a session, the three queries share the session connection and are run serially.
+
+        Args:
+            am_id (str): id of the AM to load.
+
+        Returns:
+            AMBundle: the AM, its metadata and its parametrization, each being None if not found.
+        """
+        am, metadata, parametrization = await self._gather(
+            self.load_am(am_id), self.load_am_metadata(am_id), self.load_parametrization(am_id)
+        )
+        return AMBundle(am, metadata, parametrization)
+
+    async def _load_validated_parametrizations(self) -> Dict[str, Parametrization]:
+        parametrizations, am_ids = await self._gather(self.load_all_parametrizations(), self.load_am_ids())
+        return {am_id: parametrization for am_id, parametrization in parametrizations.items() if am_id in am_ids}
+
+    async def build_enriched_ams(
+        self, with_deleted_ams: bool = False, with_fake: bool = False
+    ) -> List[ArreteMinisteriel]:
+        metadata, id_to_am, parametrizations = await self._gather(
+            self.load_all_am_metadata(with_deleted_ams, with_fake),
+            self.load_id_to_am(),
+            self._load_validated_parametrizations(),
+        )
+        enriched_ams = [
+            self._run_in_executor(
+                _enrich_and_add_parametrization,
+                id_to_am[am_id],
+                am_md,
+                parametrizations.get(am_id) or Parametrization([], [], []),
+            )
+            for am_id, am_md in metadata.items()
+            if am_id in id_to_am
+        ]
+        return list(await asyncio.gather(*enriched_ams))
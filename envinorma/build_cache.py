@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+# Bump when enrich or add_parametrization change, so that previously built AMs are not reused.
+BUILD_CACHE_VERSION = '1'
+
+
+def build_key(am_str: str, metadata_str: str, parametrization_str: str) -> str:
+    """Hash of the inputs of the enrichment of one AM."""
+    hash_ = hashlib.sha256(BUILD_CACHE_VERSION.encode('utf-8'))
+    for str_ in (am_str, metadata_str, parametrization_str):
+        hash_.update(b'\0')
+        hash_.update(str_.encode('utf-8'))
+    return hash_.hexdigest()
+
+
+@dataclass
+class BuildReport:
+    """Outcome of an incremental build of enriched AMs.
+
+    Args:
+        rebuilt (List[str]): ids of the AMs that were enriched during this build.
+        reused (List[str]): ids of the AMs loaded pre-built from the cache.
+        duration (float): duration of the build in seconds, database queries included.
+        time_saved (float): sum of the enrichment durations recorded when the reused AMs were built.
+    """
+
+    rebuilt: List[str] = field(default_factory=list)
+    reused: List[str] = field(default_factory=list)
+    duration: float = 0.0
+    time_saved: float = 0.0
+
+
+class BuildCache:
+    """Persistent cache of enriched AMs in a local folder, keyed by build_key.
+
+    Each entry is a JSON file holding the serialized enriched AM and the time it took to build it.
+    Entries are never updated, since a change of inputs yields a new key: call prune to remove
+    entries that are not used anymore.
+
+    Args:
+        folder (str): folder of the cache, created if it does not exist.
+    """
+
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _filename(self, key: str) -> str:
+        return os.path.join(self.folder, f'{key}.json')
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the serialized enriched AM and its build duration, or None if absent."""
+        try:
+            with open(self._filename(key)) as file_:
+                entry = json.load(file_)
+        except FileNotFoundError:
+            return None
+        return entry['am'], entry['duration']
+
+    def put(self, key: str, am_str: str, duration: float) -> None:
+        # Written to a temporary file first so that concurrent builds never read a partial entry.
+        # Its name is unique across processes and threads, and it is not listed by keys.
+        with tempfile.NamedTemporaryFile('w', dir=self.folder, prefix=f'{key}.', suffix='.tmp', delete=False) as file_:
+            json.dump({'am': am_str, 'duration': duration}, file_)
+        os.replace(file_.name, self._filename(key))
+
+    def keys(self) -> Set[str]:
+        return {filename[: -len('.json')] for filename in os.listdir(self.folder) if filename.endswith('.json')}
+
+    def prune(self, keys_to_keep: Set[str]) -> int:
+        """Remove all entries whose key is not in keys_to_keep.
+
+        Returns:
+            int: number of removed entries.
+        """
+        keys_to_remove = self.keys() - keys_to_keep
+        for key in keys_to_remove:
+            os.remove(self._filename(key))
+        return len(keys_to_remove)
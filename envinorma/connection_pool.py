@@ -0,0 +1,132 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+
+def _is_healthy(connection: psycopg2.extensions.connection, ping: bool) -> bool:
+    if connection.closed:
+        return False
+    if connection.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if not ping:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1;')
+        connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """Bounded and thread-safe pool of PostgreSQL connections.
+
+    Connections are opened lazily, the first time one is checked out. When all connections are
+    in use, checking out a connection blocks until one is released (or until timeout).
+
+    Args:
+        psql_dsn (str):
+            PostgreSQL DSN for connecting to the server.
+        min_connections (int = 1):
+            number of connections kept open once the pool is initialized.
+        max_connections (int = 10):
+            maximal number of connections opened simultaneously.
+        ping_on_checkout (bool = False):
+            if True, run a `SELECT 1` on each checked out connection to ensure it is alive.
+            Closed and broken connections are always replaced, even when this is False.
+        checkout_timeout (Optional[float] = None):
+            maximal number of seconds to wait for a free connection. If None, wait forever.
+
+    Raises:
+        ValueError: when pool bounds are inconsistent.
+    """
+
+    def __init__(
+        self,
+        psql_dsn: str,
+        min_connections: int = 1,
+        max_connections: int = 10,
+        ping_on_checkout: bool = False,
+        checkout_timeout: Optional[float] = None,
+    ) -> None:
+        if min_connections < 0:
+            raise ValueError(f'min_connections must be non negative, got {min_connections}')
+        if max_connections < max(min_connections, 1):
+            raise ValueError(f'max_connections must be >= max(min_connections, 1), got {max_connections}')
+        self.psql_dsn = psql_dsn
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.ping_on_checkout = ping_on_checkout
+        self.checkout_timeout = checkout_timeout
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadedConnectionPool] = None
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.min_connections, self.max_connections, self.psql_dsn)
+            return self._pool
+
+    def _checkout(self) -> Tuple[ThreadedConnectionPool, psycopg2.extensions.connection]:
+        # Unhealthy connections are discarded until a healthy one is found. After max_connections
+        # discarded connections, the pool only holds new connections: the last one is the last try.
+        pool = self._get_pool()
+        for _ in range(self.max_connections + 1):
+            connection = pool.getconn()
+            if _is_healthy(connection, self.ping_on_checkout):
+                return pool, connection
+            pool.putconn(connection, close=True)
+        raise PoolError('Could not check out a healthy connection.')
+
+    def _release(self, pool: ThreadedConnectionPool, connection: psycopg2.extensions.connection) -> None:
+        with self._lock:
+            if pool is not self._pool:
+                # The pool was closed while the connection was checked out.
+                connection.close()
+                return
+            pool.putconn(connection, close=bool(connection.closed))
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg2.extensions.connection]:
+        """Check out a connection for the duration of the context.
+
+        The transaction is committed when the context exits normally and rolled back otherwise.
+
+        Raises:
+            PoolError: when no connection is released before checkout_timeout, or when new connections
+                are not healthy either.
+
+        Yields:
+            psycopg2.extensions.connection: a healthy connection.
+        """
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolError(f'No connection available after {self.checkout_timeout}s.')
+        try:
+            pool, connection = self._checkout()
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                if not connection.closed:
+                    connection.rollback()
+                raise
+            finally:
+                self._release(pool, connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all connections of the pool. The pool is reopened if used again.
+
+        Connections checked out at that time are closed, and are not returned to the new pool on release.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+            self._pool = None
@@ -0,0 +1,253 @@
+"""Content-addressed store of StructuredText and EnrichedString subtrees.
+
+Each subtree is serialized once, under the SHA-256 of its content, with its children replaced by
+their hashes. Alineas, tables and sections repeated across AMs, in the new texts of alternative
+sections or in previous versions of modified sections are therefore stored once.
+
+Example:
+    >>> store = ContentStore()
+    >>> root = store.put_am(am)
+    >>> store.load_am(root) == am
+    True
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.condition import load_condition
+from envinorma.models.structured_text import (
+    Annotations,
+    Applicability,
+    PotentialModification,
+    Reference,
+    SectionParametrization,
+    StructuredText,
+)
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization.models.parametrization import (
+    AlternativeSection,
+    AMWarning,
+    InapplicableSection,
+    Parametrization,
+)
+from envinorma.storage_codecs import compact_json
+
+STRING = 'string'
+TEXT = 'text'
+
+
+def node_hash(kind: str, data: str) -> str:
+    """Hash of a serialized node, whose children are already replaced by their hashes."""
+    return hashlib.sha256(f'{kind}\0{data}'.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class DedupStats:
+    """Deduplication counters of a ContentStore.
+
+    Args:
+        nb_references (int): number of subtrees put in the store, duplicates included.
+        nb_nodes (int): number of distinct subtrees.
+        referenced_bytes (int): size of the put subtrees, duplicates included.
+        stored_bytes (int): size of the distinct subtrees.
+    """
+
+    nb_references: int = 0
+    nb_nodes: int = 0
+    referenced_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.referenced_bytes - self.stored_bytes
+
+    @property
+    def ratio(self) -> float:
+        return self.referenced_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+
+def _text_references(node: Dict[str, Any]) -> List[str]:
+    references = [node['title'], *node['outer_alineas'], *node['sections']]
+    if node.get('applicability') and node['applicability'].get('previous_version'):
+        references.append(node['applicability']['previous_version'])
+    if node.get('parametrization'):
+        references.extend(mod['new_version'] for mod in node['parametrization']['potential_modifications'])
+    return references
+
+
+def root_references(kind: str, root: Dict[str, Any]) -> List[str]:
+    """Hashes referenced by a root returned by ContentStore.put_am or put_parametrization."""
+    if kind == 'am':
+        return [root['title'], *root['visa'], *root['sections']]
+    if kind == 'parametrization':
+        return [alternative_section['new_text'] for alternative_section in root['alternative_sections']]
+    raise ValueError(f'Unknown root kind {kind}, expecting am or parametrization')
+
+
+class ContentStore:
+    """In-memory content-addressed store of serialized subtrees.
+
+    AMs and parametrizations are put as roots: their serialization where subtrees are replaced
+    by hashes. Loading a root rebuilds the same objects as ArreteMinisteriel.from_dict and
+    Parametrization.from_dict, except that equal EnrichedStrings are one shared instance: they
+    must not be modified in place (use dataclasses.replace, as apply_parameter_values does).
+    StructuredTexts are rebuilt at each load, since enrichment modifies them.
+
+    Nodes put since the last call of mark_saved are listed by unsaved_nodes, so that they can be
+    persisted (see DataFetcher.upsert_deduplicated_ams).
+    """
+
+    def __init__(self) -> None:
+        self.stats = DedupStats()
+        self._nodes: Dict[str, Tuple[str, str]] = {}
+        self._unsaved: Set[str] = set()
+        self._strings: Dict[str, EnrichedString] = {}
+
+    def __contains__(self, hash_: str) -> bool:
+        return hash_ in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _put(self, kind: str, node: Dict[str, Any]) -> str:
+        data = compact_json(node)
+        hash_ = node_hash(kind, data)
+        self.stats.nb_references += 1
+        self.stats.referenced_bytes += len(data)
+        if hash_ not in self._nodes:
+            self._nodes[hash_] = (kind, data)
+            self._unsaved.add(hash_)
+            self.stats.nb_nodes += 1
+            self.stats.stored_bytes += len(data)
+        return hash_
+
+    def _put_text(self, dict_: Dict[str, Any]) -> str:
+        node = {
+            **dict_,
+            'title': self._put(STRING, dict_['title']),
+            'outer_alineas': [self._put(STRING, alinea) for alinea in dict_['outer_alineas']],
+            'sections': [self._put_text(section) for section in dict_['sections']],
+        }
+        applicability = dict_.get('applicability')
+        if applicability and applicability.get('previous_version'):
+            node['applicability'] = {
+                **applicability,
+                'previous_version': self._put_text(applicability['previous_version']),
+            }
+        parametrization = dict_.get('parametrization')
+        if parametrization:
+            modifications = [
+                {**modification, 'new_version': self._put_text(modification['new_version'])}
+                for modification in parametrization['potential_modifications']
+            ]
+            node['parametrization'] = {**parametrization, 'potential_modifications': modifications}
+        return self._put(TEXT, node)
+
+    def put_text(self, text: StructuredText) -> str:
+        return self._put_text(text.to_dict())
+
+    def put_am(self, am: ArreteMinisteriel) -> Dict[str, Any]:
+        """Put all subtrees of am and return its root, to store alongside the store nodes."""
+        dict_ = am.to_dict()
+        return {
+            **dict_,
+            'title': self._put(STRING, dict_['title']),
+            'visa': [self._put(STRING, visa) for visa in dict_['visa']],
+            'sections': [self._put_text(section) for section in dict_['sections']],
+        }
+
+    def put_parametrization(self, parametrization: Parametrization) -> Dict[str, Any]:
+        """Put the new texts of the alternative sections of parametrization and return its root."""
+        dict_ = parametrization.to_dict()
+        alternative_sections = [
+            {**alternative_section, 'new_text': self._put_text(alternative_section['new_text'])}
+            for alternative_section in dict_['alternative_sections']
+        ]
+        return {**dict_, 'alternative_sections': alternative_sections}
+
+    def add_nodes(self, nodes: Iterable[Tuple[str, str, str]]) -> None:
+        """Add nodes (hash, kind, data) loaded from a persisted store. They are not counted in stats."""
+        for hash_, kind, data in nodes:
+            self._nodes[hash_] = (kind, data)
+
+    def unsaved_nodes(self) -> List[Tuple[str, str, str]]:
+        return [(hash_, *self._nodes[hash_]) for hash_ in sorted(self._unsaved)]
+
+    def mark_saved(self, hashes: Iterable[str]) -> None:
+        self._unsaved.difference_update(hashes)
+
+    def _node(self, kind: str, hash_: str) -> Dict[str, Any]:
+        if hash_ not in self._nodes:
+            raise ValueError(f'Node {hash_} is not in the store.')
+        node_kind, data = self._nodes[hash_]
+        if node_kind != kind:
+            raise ValueError(f'Node {hash_} is a {node_kind}, expecting a {kind}.')
+        return json.loads(data)
+
+    def references(self, hash_: str) -> List[str]:
+        """Hashes of the children of a node of the store."""
+        kind, data = self._nodes[hash_]
+        return _text_references(json.loads(data)) if kind == TEXT else []
+
+    def load_string(self, hash_: str) -> EnrichedString:
+        if hash_ not in self._strings:
+            self._strings[hash_] = EnrichedString.from_dict(self._node(STRING, hash_))
+        return self._strings[hash_]
+
+    def _load_applicability(self, dict_: Optional[Dict[str, Any]]) -> Optional[Applicability]:
+        if not dict_:
+            return None
+        previous_version = self.load_text(dict_['previous_version']) if dict_.get('previous_version') else None
+        return Applicability(**{**dict_, 'previous_version': previous_version})
+
+    def _load_section_parametrization(self, dict_: Optional[Dict[str, Any]]) -> SectionParametrization:
+        if not dict_:
+            return SectionParametrization()
+        parametrization = SectionParametrization.from_dict({**dict_, 'potential_modifications': []})
+        parametrization.potential_modifications = [
+            PotentialModification(
+                load_condition(modification['condition']), self.load_text(modification['new_version'])
+            )
+            for modification in dict_['potential_modifications']
+        ]
+        return parametrization
+
+    def load_text(self, hash_: str) -> StructuredText:
+        node = self._node(TEXT, hash_)
+        return StructuredText(
+            title=self.load_string(node['title']),
+            outer_alineas=[self.load_string(alinea) for alinea in node['outer_alineas']],
+            sections=[self.load_text(section) for section in node['sections']],
+            applicability=self._load_applicability(node.get('applicability')),
+            reference=Reference.from_dict(node['reference']) if node.get('reference') else None,
+            annotations=Annotations.from_dict(node['annotations']) if node.get('annotations') else None,
+            id=node['id'],
+            parametrization=self._load_section_parametrization(node.get('parametrization')),
+        )
+
+    def load_am(self, root: Dict[str, Any]) -> ArreteMinisteriel:
+        # The title is not shared: ArreteMinisteriel.__post_init__ modifies it.
+        am = ArreteMinisteriel.from_dict(
+            {**root, 'title': self._node(STRING, root['title']), 'visa': [], 'sections': []}
+        )
+        am.visa = [self.load_string(visa) for visa in root['visa']]
+        am.sections = [self.load_text(section) for section in root['sections']]
+        return am
+
+    def load_parametrization(self, root: Dict[str, Any]) -> Parametrization:
+        alternative_sections = [
+            AlternativeSection(
+                alternative_section['section_id'],
+                self.load_text(alternative_section['new_text']),
+                load_condition(alternative_section['condition']),
+                alternative_section['id'],
+            )
+            for alternative_section in root['alternative_sections']
+        ]
+        return Parametrization(
+            [InapplicableSection.from_dict(section) for section in root['inapplicable_sections']],
+            alternative_sections,
+            [AMWarning.from_dict(warning) for warning in root['warnings']],
+        )
@@ -0,0 +1,290 @@
+"""Immutable single-file snapshot of the corpus, read with random access through mmap.
+
+A snapshot holds enriched AMs, all AM metadata, all parametrizations and, optionally, the raw
+AMs, serialized in JSON. Documents are decoded only when requested: processes reading the same
+snapshot share its pages through the OS page cache and only pay for the AMs they decode.
+
+Example:
+    >>> write_snapshot('corpus.snapshot', DataFetcher(psql_dsn))
+    >>> fetcher = SnapshotDataFetcher('corpus.snapshot')
+    >>> am = fetcher.load_enriched_am('JORFTEXT000000000001')
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from envinorma.data_fetcher import DataFetcher
+from envinorma.models.am_metadata import AMMetadata, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.regime import Regime
+from envinorma.parametrization.models.parametrization import Parametrization
+from envinorma.storage_codecs import compact_json
+
+T = TypeVar('T')
+
+SNAPSHOT_FORMAT = 1
+KINDS = ('enriched_am', 'structured_am', 'am_metadata', 'parametrization')
+_MAGIC = b'ENVSNAP1'
+# Trailer: offset and length of the JSON index, then the magic again.
+_TRAILER = struct.Struct('<QQ8s')
+
+
+class SnapshotWriter:
+    """Appends documents to a new snapshot file. The file is moved to its final name on close.
+
+    Args:
+        filename (str): path of the snapshot to write. An existing file is replaced atomically on close.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        # Unique temporary file, so that concurrent writers of the same snapshot do not share it.
+        self._file = tempfile.NamedTemporaryFile(
+            'wb',
+            dir=os.path.dirname(filename) or '.',
+            prefix=f'{os.path.basename(filename)}.',
+            suffix='.tmp',
+            delete=False,
+        )
+        try:
+            self._file.write(_MAGIC)
+        except BaseException:
+            self._discard()
+            raise
+        self._index: Dict[str, Dict[str, Tuple[int, int]]] = {kind: {} for kind in KINDS}
+
+    def add(self, kind: str, am_id: str, text: str) -> None:
+        if kind not in self._index:
+            raise ValueError(f'Unknown kind {kind}, expecting one of {KINDS}')
+        if am_id in self._index[kind]:
+            raise ValueError(f'{kind} {am_id} is already in the snapshot.')
+        data = text.encode('utf-8')
+        self._index[kind][am_id] = (self._file.tell(), len(data))
+        self._file.write(data)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of documents added per kind."""
+        return {kind: len(ids) for kind, ids in self._index.items()}
+
+    def close(self) -> None:
+        try:
+            index = json.dumps({'format': SNAPSHOT_FORMAT, 'index': self._index}).encode('utf-8')
+            index_offset = self._file.tell()
+            self._file.write(index)
+            self._file.write(_TRAILER.pack(index_offset, len(index), _MAGIC))
+            self._file.close()
+            os.replace(self._file.name, self.filename)
+        except BaseException:
+            self._discard()
+            raise
+
+    def _discard(self) -> None:
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+    def __enter__(self) -> 'SnapshotWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:  # type: ignore
+        if exc_type is None:
+            self.close()
+            return
+        self._discard()
+
+
+def write_snapshot(
+    filename: str,
+    fetcher: DataFetcher,
+    with_deleted_ams: bool = False,
+    with_fake: bool = False,
+    with_raw_ams: bool = False,
+) -> Dict[str, int]:
+    """Write a snapshot of the corpus stored in the database of fetcher.
+
+    Enriched AMs are streamed with fetcher.iter_enriched_ams, one at a time.
+
+    Args:
+        filename (str): path of the snapshot.
+        fetcher (DataFetcher): fetcher of the corpus.
+        with_deleted_ams (bool = False): passed to iter_enriched_ams.
+        with_fake (bool = False): passed to iter_enriched_ams.
+        with_raw_ams (bool = False): if True, the AMs before enrichment are also written, for load_am.
+
+    Returns:
+        Dict[str, int]: number of documents written per kind.
+    """
+    with SnapshotWriter(filename) as writer:
+        for am in fetcher.iter_enriched_ams(with_deleted_ams, with_fake):
+            writer.add('enriched_am', am.id or '', compact_json(am.to_dict()))
+        for am_id, metadata in fetcher.load_all_am_metadata(with_deleted_ams=True).items():
+            writer.add('am_metadata', am_id, json.dumps(metadata.to_dict()))
+        for am_id, parametrization in fetcher.load_all_parametrizations().items():
+            writer.add('parametrization', am_id, json.dumps(parametrization.to_dict()))
+        if with_raw_ams:
+            for am_id, am in fetcher.load_id_to_am(fetcher.load_am_ids(with_deleted_ams=True)).items():
+                writer.add('structured_am', am_id, compact_json(am.to_dict()))
+    return writer.counts()
+
+
+class CorpusSnapshot:
+    """Read-only access to a snapshot file through mmap.
+
+    Only the index is loaded when opening the snapshot. Documents are read and decoded on demand.
+
+    Args:
+        filename (str): path of a snapshot written by SnapshotWriter.
+
+    Raises:
+        ValueError: when the file is not a snapshot or has an unsupported format.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        with open(filename, 'rb') as file_:
+            self._mmap = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._index = self._load_index()
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    def _load_index(self) -> Dict[str, Dict[str, List[int]]]:
+        if len(self._mmap) < len(_MAGIC) + _TRAILER.size or self._mmap[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f'{self.filename} is not a corpus snapshot.')
+        index_offset, index_length, magic = _TRAILER.unpack(self._mmap[-_TRAILER.size :])
+        if magic != _MAGIC:
+            raise ValueError(f'{self.filename} is truncated.')
+        header = json.loads(self._mmap[index_offset : index_offset + index_length])
+        if header['format'] != SNAPSHOT_FORMAT:
+            raise ValueError(f'Unsupported snapshot format {header["format"]}, expecting {SNAPSHOT_FORMAT}.')
+        return header['index']
+
+    def ids(self, kind: str) -> Set[str]:
+        return set(self._index[kind])
+
+    def load_text(self, kind: str, am_id: str) -> Optional[str]:
+        position = self._index[kind].get(am_id)
+        if position is None:
+            return None
+        offset, length = position
+        return self._mmap[offset : offset + length].decode('utf-8')
+
+    def load(self, kind: str, am_id: str, decoder: Callable[[Dict], T]) -> Optional[T]:
+        text = self.load_text(kind, am_id)
+        return decoder(json.loads(text)) if text is not None else None
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> 'CorpusSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:  # type: ignore
+        self.close()
+
+
+def _metadata_matches(
+    metadata: AMMetadata,
+    rubrique: Optional[str],
+    regime: Optional[Regime],
+    is_transverse: Optional[bool],
+    with_deleted_ams: bool,
+    with_fake: bool,
+) -> bool:
+    # Same filters as envinorma.data_fetcher._am_metadata_filters
+    if not with_fake and metadata.cid.startswith('FAKE'):
+        return False
+    if not with_deleted_ams and metadata.state != AMState.VIGUEUR:
+        return False
+    if is_transverse is not None and metadata.is_transverse != is_transverse:
+        return False
+    if rubrique is None and regime is None:
+        return True
+    return any(
+        (rubrique is None or classement.rubrique == rubrique) and (regime is None or classement.regime == regime)
+        for classement in metadata.classements
+    )
+
+
+class SnapshotDataFetcher:
+    """Read-only fetcher backed by a snapshot, exposing the read methods of DataFetcher.
+
+    Decoded objects are not cached: each call decodes the requested documents from the mapped file.
+
+    Args:
+        filename (str): path of a snapshot written by write_snapshot.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.snapshot = CorpusSnapshot(filename)
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+    def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
+        return self.snapshot.load('am_metadata', am_id, AMMetadata.from_dict)
+
+    def load_all_am_metadata(self, with_deleted_ams: bool = False, with_fake: bool = True) -> Dict[str, AMMetadata]:
+        all_metadata = {am_id: self.load_am_metadata(am_id) for am_id in self.snapshot.ids('am_metadata')}
+        return {
+            am_id: metadata
+            for am_id, metadata in all_metadata.items()
+            if metadata and _metadata_matches(metadata, None, None, None, with_deleted_ams, with_fake)
+        }
+
+    def load_am_ids(
+        self,
+        rubrique: Optional[str] = None,
+        regime: Optional[Regime] = None,
+        is_transverse: Optional[bool] = None,
+        with_deleted_ams: bool = False,
+        with_fake: bool = True,
+    ) -> Set[str]:
+        all_metadata = self.load_all_am_metadata(with_deleted_ams=True)
+        return {
+            am_id
+            for am_id, metadata in all_metadata.items()
+            if _metadata_matches(metadata, rubrique, regime, is_transverse, with_deleted_ams, with_fake)
+        }
+
+    def load_parametrization(self, am_id: str) -> Optional[Parametrization]:
+        return self.snapshot.load('parametrization', am_id, Parametrization.from_dict)
+
+    def load_or_init_parametrization(self, am_id: str) -> Parametrization:
+        return self.load_parametrization(am_id) or Parametrization([], [], [])
+
+    def load_all_parametrizations(self) -> Dict[str, Parametrization]:
+        return {am_id: self.load_or_init_parametrization(am_id) for am_id in self.snapshot.ids('parametrization')}
+
+    def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        """Load the AM before enrichment.
+
+        Raises:
+            ValueError: when the snapshot was written without raw AMs.
+        """
+        if not self.snapshot.ids('structured_am') and self.snapshot.ids('enriched_am'):
+            raise ValueError('Snapshot was written without raw AMs, use load_enriched_am or with_raw_ams=True.')
+        return self.snapshot.load('structured_am', am_id, ArreteMinisteriel.from_dict)
+
+    def safe_load_am(self, am_id: str) -> ArreteMinisteriel:
+        am = self.load_am(am_id)
+        if not am:
+            raise ValueError('Expecting one AM to proceed.')
+        return am
+
+    def load_enriched_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        return self.snapshot.load('enriched_am', am_id, ArreteMinisteriel.from_dict)
+
+    def iter_enriched_ams(self) -> Iterator[ArreteMinisteriel]:
+        """Yield the enriched AMs of the snapshot, ordered by id."""
+        for am_id in sorted(self.snapshot.ids('enriched_am')):
+            am = self.load_enriched_am(am_id)
+            if am:
+                yield am
+
+    def build_enriched_ams(self) -> List[ArreteMinisteriel]:
+        return list(self.iter_enriched_ams())
@@ -1,19 +1,42 @@
+import functools
 import json
-from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import fields as dataclass_fields
+from dataclasses import replace
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Set, Tuple, Type, TypeVar, cast
 
 import psycopg2
+from psycopg2.extras import execute_values, register_default_jsonb
 
+from envinorma.build_cache import BuildCache, BuildReport, build_key
+from envinorma.connection_pool import ConnectionPool
+from envinorma.content_store import ContentStore, root_references
 from envinorma.enriching import enrich
+from envinorma.fetcher_cache import FetcherCache
+from envinorma.fetcher_instrumentation import CallTimings, InstrumentationSink
 from envinorma.models.am_metadata import AMMetadata, AMState
 from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.codec import decode_am, decode_am_metadata, decode_parametrization, default_codec
+from envinorma.models.regime import Regime
+from envinorma.models.structured_text import StructuredText
 from envinorma.parametrization.models.parametrization import (
     AlternativeSection,
     AMWarning,
     InapplicableSection,
     ParameterElement,
     Parametrization,
+    _check_consistency_on_section,
 )
 from envinorma.parametrization.tie_parametrization import add_parametrization
+from envinorma.storage_codecs import StorageCodec, compact_json, decode_document, encode_document
+from envinorma.utils import random_id
+
+T = TypeVar('T')
+F = TypeVar('F', bound=Callable[..., Any])
 
 
 def _ensure_one_variable(res: List[Tuple]) -> Any:
@@ -22,8 +45,113 @@ def _ensure_one_variable(res: List[Tuple]) -> Any:
     return res[0][0]
 
 
+def _identity(value: T) -> T:
+    # JSONB values are kept as strings, they are decoded by the loaders below.
+    return value
+
+
 def _load_am_str(str_: str) -> ArreteMinisteriel:
-    return ArreteMinisteriel.from_dict(json.loads(str_))
+    return decode_am(str_)
+
+
+def _load_am_metadata_str(str_: str) -> AMMetadata:
+    return decode_am_metadata(str_)
+
+
+def _load_parametrization_str(str_: str) -> Parametrization:
+    return decode_parametrization(str_)
+
+
+# Model constructors of the decoders above, for timing JSON decoding and model construction separately.
+_MODEL_BUILDERS: Dict[Callable[[str], Any], Callable[[Any], Any]] = {
+    _load_am_str: ArreteMinisteriel.from_dict,
+    _load_am_metadata_str: AMMetadata.from_dict,
+    _load_parametrization_str: Parametrization.from_dict,
+}
+
+
+def _row_size(row: Tuple) -> int:
+    return sum(len(value) for value in row if isinstance(value, (str, bytes, memoryview)))
+
+
+def _instrumented(method: F) -> F:
+    """Measure calls of a DataFetcher method when the fetcher has an instrumentation sink.
+
+    Calls made within an instrumented call are accumulated in the timings of the outermost call.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: 'DataFetcher', *args: Any, **kwargs: Any) -> Any:
+        if self.instrumentation is None or getattr(self._local, 'timings', None) is not None:
+            return method(self, *args, **kwargs)
+        timings = CallTimings(method.__name__)
+        self._local.timings = timings
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            timings.total = time.perf_counter() - start
+            self._local.timings = None
+            self.instrumentation.record(timings)
+
+    return cast(F, wrapper)
+
+
+def _classement_filter(rubrique: Optional[str], regime: Optional[Regime]) -> str:
+    classement: Dict[str, str] = {}
+    if rubrique is not None:
+        classement['rubrique'] = rubrique
+    if regime is not None:
+        classement['regime'] = regime.value
+    return json.dumps([classement])
+
+
+def _am_metadata_filters(
+    with_deleted_ams: bool,
+    with_fake: bool,
+    rubrique: Optional[str] = None,
+    regime: Optional[Regime] = None,
+    is_transverse: Optional[bool] = None,
+) -> Tuple[str, Tuple]:
+    # Conditions are written so that the indexes created in _create_index_queries can be used.
+    conditions: List[str] = []
+    values: List[Any] = []
+    if not with_fake:
+        conditions.append('am_id NOT LIKE %s')
+        values.append('FAKE%')
+    if not with_deleted_ams:
+        conditions.append("data ->> 'state' = %s")
+        values.append(AMState.VIGUEUR.value)
+    if rubrique is not None or regime is not None:
+        conditions.append("data -> 'classements' @> %s::jsonb")
+        values.append(_classement_filter(rubrique, regime))
+    if is_transverse is not None:
+        conditions.append("data ->> 'is_transverse' = %s")
+        values.append('true' if is_transverse else 'false')
+    if not conditions:
+        return '', ()
+    return ' WHERE ' + ' AND '.join(conditions), tuple(values)
+
+
+def _enriched_ams_query(with_fake: bool, parametrization_source: str = 'parametrization') -> Tuple[str, Tuple]:
+    # Same AMs as DataFetcher.build_enriched_ams: only AMs in state VIGUEUR, with their parametrization.
+    filters, values = _am_metadata_filters(False, with_fake)
+    am_columns = ', '.join([f'structured_am.{column}' for column in _DOCUMENT_COLUMNS['structured_am']])
+    query = (
+        f'SELECT metadata.am_id, metadata.data, {am_columns}, parametrization.data'
+        f' FROM (SELECT am_id, data FROM am_metadata{filters}) AS metadata'
+        f' JOIN structured_am USING (am_id) LEFT JOIN {parametrization_source} USING (am_id) ORDER BY metadata.am_id;'
+    )
+    return query, values
+
+
+def _check_am_metadata_fields(fields_: List[str]) -> None:
+    am_metadata_fields = {field_.name for field_ in dataclass_fields(AMMetadata)}
+    unknown_fields = set(fields_) - am_metadata_fields
+    if unknown_fields:
+        raise ValueError(
+            f'Unknown AMMetadata fields {sorted(unknown_fields)}, expecting fields in {am_metadata_fields}'
+        )
 
 
 def _recreate_with_removed_parameter(
@@ -41,9 +169,6 @@ def _recreate_with_removed_parameter(
     return Parametrization(new_inapplicabilities, new_sections, new_warnings)
 
 
-T = TypeVar('T')
-
-
 def _upsert_element(element: T, elements: List[T], identifier: Optional[str]) -> List[T]:
     """Replace element in list if element contains identifier, otherwise append it.
 
@@ -81,15 +206,253 @@ def _recreate_with_upserted_parameter(
     return Parametrization(new_conditions, new_sections, new_warnings)
 
 
+# Kind of the elements of a parametrization, when stored one row per element (see DataFetcher).
+_ELEMENT_KINDS: Dict[str, Type[ParameterElement]] = {
+    'inapplicable_section': InapplicableSection,
+    'alternative_section': AlternativeSection,
+    'warning': AMWarning,
+}
+
+
+def _element_kind(element_type: Type[ParameterElement]) -> str:
+    for kind, type_ in _ELEMENT_KINDS.items():
+        if element_type == type_:
+            return kind
+    raise ValueError(f'Unknown parameter element type {element_type}')
+
+
+def _load_element(kind: str, str_: str) -> ParameterElement:
+    return _ELEMENT_KINDS[kind].from_dict(json.loads(str_))  # type: ignore
+
+
+def _element_rows(am_id: str, parametrization: Parametrization) -> List[Tuple[str, str, str, str, str]]:
+    return [
+        (am_id, element.id, _element_kind(type(element)), element.section_id, json.dumps(element.to_dict()))
+        for element in parametrization.elements()
+    ]
+
+
+def _check_unique_element_ids(rows: List[Tuple[str, str, str, str, str]]) -> None:
+    keys: Set[Tuple[str, str, str]] = set()
+    for am_id, id_, kind, _, _ in rows:
+        if (am_id, kind, id_) in keys:
+            raise ValueError(f'Parametrization of AM {am_id} has several elements of kind {kind} with id {id_}.')
+        keys.add((am_id, kind, id_))
+
+
+def _check_section_consistency(elements: List[ParameterElement]) -> None:
+    _check_consistency_on_section(
+        [element for element in elements if isinstance(element, InapplicableSection)],
+        [element for element in elements if isinstance(element, AlternativeSection)],
+    )
+
+
+def _aggregated_elements(kind: str) -> str:
+    return f"COALESCE(jsonb_agg(data ORDER BY rank) FILTER (WHERE kind = '{kind}'), '[]'::jsonb)"
+
+
+# Rows of parametrization_element aggregated into parametrization documents, with the columns of
+# the parametrization table, so that a parametrization is loaded with one query in both storage modes.
+_AGGREGATED_PARAMETRIZATION = (
+    f"(SELECT am_id, jsonb_build_object('inapplicable_sections', {_aggregated_elements('inapplicable_section')},"
+    f" 'alternative_sections', {_aggregated_elements('alternative_section')},"
+    f" 'warnings', {_aggregated_elements('warning')}) AS data"
+    ' FROM parametrization_element GROUP BY am_id) AS parametrization'
+)
+
+
+def _section_rows(am_id: str, am_dict: Dict[str, Any]) -> List[Tuple[str, int, int, Optional[str], Optional[str], str]]:
+    """Rows (am_id, rank, last_rank, section_id, parent_id, data) of table am_section for a serialized AM.
+
+    Sections are ranked in preorder. The row of rank 0 holds the AM without its sections, and each
+    other row holds one section without its subsections. last_rank is the rank of the last descendant
+    of the row, so that the rows of a subtree are the rows whose rank lies in [rank, last_rank].
+    """
+    rows: List[List[Any]] = []
+
+    def _add(dict_: Dict[str, Any], section_id: Optional[str], parent_id: Optional[str]) -> None:
+        rank = len(rows)
+        data = compact_json({key: value for key, value in dict_.items() if key != 'sections'})
+        rows.append([am_id, rank, rank, section_id, parent_id, data])
+        for section in dict_['sections']:
+            _add(section, section['id'], section_id)
+        rows[rank][2] = len(rows) - 1
+
+    _add(am_dict, None, None)
+    return [cast(Tuple[str, int, int, Optional[str], Optional[str], str], tuple(row)) for row in rows]
+
+
+def _nest_sections(rows: Iterable[Tuple[int, int, str]]) -> List[Dict[str, Any]]:
+    """Rebuild serialized sections from rows (rank, last_rank, data) of table am_section, ordered by rank.
+
+    Returns:
+        List[Dict[str, Any]]: the rows that are not descendants of another row, with their subsections.
+    """
+    roots: List[Dict[str, Any]] = []
+    ancestors: List[Tuple[int, Dict[str, Any]]] = []
+    for rank, last_rank, data in rows:
+        dict_ = {**json.loads(data), 'sections': []}
+        while ancestors and ancestors[-1][0] < rank:
+            ancestors.pop()
+        (ancestors[-1][1]['sections'] if ancestors else roots).append(dict_)
+        ancestors.append((last_rank, dict_))
+    return roots
+
+
+_TABLES = ('am_metadata', 'parametrization', 'structured_am')
+# Columns holding the serialized document. AMs can be stored compressed, in payload, see storage_codecs.
+_DOCUMENT_COLUMNS = {
+    'am_metadata': ('data',),
+    'parametrization': ('data',),
+    'structured_am': ('data', 'codec', 'payload'),
+}
+
+
+def _document_columns(table: str) -> str:
+    return ', '.join(_DOCUMENT_COLUMNS[table])
+
+
+def _document_text(stored: Tuple) -> str:
+    if len(stored) == 1:
+        return stored[0]
+    return decode_document(*stored)
+
+
+def _decode_document(decoder: Callable[[str], T], stored: Tuple) -> T:
+    return decoder(_document_text(stored))
+
+
+def _document_size(stored: Tuple) -> int:
+    if len(stored) == 1 or stored[2] is None:
+        return len(stored[0])
+    return len(stored[2])
+
+
+def _document_values(table: str, text: str, codec: Optional[StorageCodec]) -> Tuple:
+    if table != 'structured_am':
+        return (text,)
+    if codec is None:
+        return (text, None, None)
+    return (None, codec.name, encode_document(text, codec))
+
+
 def _create_table_queries() -> List[str]:
-    type_1_tables = ['am_metadata', 'parametrization', 'structured_am']
+    # version is drawn from a sequence shared by all tables and renewed on every write.
     return [
-        f'CREATE TABLE IF NOT EXISTS {table} (am_id VARCHAR(255) PRIMARY KEY, data TEXT);' for table in type_1_tables
+        'CREATE SEQUENCE IF NOT EXISTS envinorma_version;',
+        *[f'CREATE TABLE IF NOT EXISTS {table} (am_id VARCHAR(255) PRIMARY KEY, data JSONB);' for table in _TABLES],
+        *[
+            f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL'
+            " DEFAULT nextval('envinorma_version');"
+            for table in _TABLES
+        ],
+        'ALTER TABLE structured_am ADD COLUMN IF NOT EXISTS codec VARCHAR(16);',
+        'ALTER TABLE structured_am ADD COLUMN IF NOT EXISTS payload BYTEA;',
+        # rank keeps the order of elements: unlike version, it is not renewed on update.
+        'CREATE TABLE IF NOT EXISTS parametrization_element (am_id VARCHAR(255) NOT NULL, id VARCHAR(255) NOT NULL,'
+        ' kind VARCHAR(32) NOT NULL, section_id VARCHAR(255) NOT NULL, data JSONB NOT NULL,'
+        " rank BIGINT NOT NULL DEFAULT nextval('envinorma_version'),"
+        # ids are unique per kind only, as in the element lists of Parametrization.
+        " version BIGINT NOT NULL DEFAULT nextval('envinorma_version'), PRIMARY KEY (am_id, kind, id));",
+        # tables created with the former primary key (am_id, id) are migrated.
+        "DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'parametrization_element_pkey'"
+        ' AND array_length(conkey, 1) = 2) THEN ALTER TABLE parametrization_element'
+        ' DROP CONSTRAINT parametrization_element_pkey, ADD PRIMARY KEY (am_id, kind, id); END IF; END $$;',
+        # deleted rows leave no version behind: deletions are recorded here for changes_since.
+        'CREATE TABLE IF NOT EXISTS document_change (table_name VARCHAR(32) NOT NULL, am_id VARCHAR(255) NOT NULL,'
+        " version BIGINT NOT NULL DEFAULT nextval('envinorma_version'), PRIMARY KEY (table_name, am_id));",
+        # copy of structured_am with one row per section, for partial loads (see _section_rows).
+        'CREATE TABLE IF NOT EXISTS am_section (am_id VARCHAR(255) NOT NULL, rank INTEGER NOT NULL,'
+        ' last_rank INTEGER NOT NULL, section_id VARCHAR(255), parent_id VARCHAR(255), data JSONB NOT NULL,'
+        ' PRIMARY KEY (am_id, rank));',
+        # content-addressed subtrees and the documents referencing them, see envinorma.content_store.
+        'CREATE TABLE IF NOT EXISTS content_node (hash CHAR(64) PRIMARY KEY, kind VARCHAR(16) NOT NULL,'
+        ' data JSONB NOT NULL);',
+        'CREATE TABLE IF NOT EXISTS deduplicated_document (table_name VARCHAR(32) NOT NULL,'
+        ' am_id VARCHAR(255) NOT NULL, data JSONB NOT NULL, PRIMARY KEY (table_name, am_id));',
     ]
 
 
+def _create_index_queries() -> List[str]:
+    return [
+        "CREATE INDEX IF NOT EXISTS am_metadata_state_idx ON am_metadata ((data ->> 'state'));",
+        "CREATE INDEX IF NOT EXISTS am_metadata_is_transverse_idx ON am_metadata ((data ->> 'is_transverse'));",
+        'CREATE INDEX IF NOT EXISTS am_metadata_classements_idx'
+        " ON am_metadata USING GIN ((data -> 'classements') jsonb_path_ops);",
+        'CREATE INDEX IF NOT EXISTS parametrization_element_section_idx'
+        ' ON parametrization_element (am_id, section_id);',
+        'CREATE INDEX IF NOT EXISTS am_section_section_idx ON am_section (am_id, section_id);',
+        *[
+            f'CREATE INDEX IF NOT EXISTS {table}_version_idx ON {table} (version);'
+            for table in (*_TABLES, 'parametrization_element', 'document_change')
+        ],
+    ]
+
+
+def _changes_query() -> str:
+    selects = [f"SELECT '{table}', am_id FROM {table} WHERE version > %s" for table in _TABLES]
+    selects.append("SELECT 'parametrization', am_id FROM parametrization_element WHERE version > %s")
+    selects.append('SELECT table_name, am_id FROM document_change WHERE version > %s')
+    return ' UNION '.join(selects) + ';'
+
+
+def _record_change_query(bulk: bool = False) -> str:
+    values = '%s' if bulk else '(%s, %s)'
+    return (
+        f'INSERT INTO document_change(table_name, am_id) VALUES {values} ON CONFLICT (table_name, am_id)'
+        ' DO UPDATE SET version = EXCLUDED.version;'
+    )
+
+
+def _conditional_load_query(table: str) -> str:
+    # Documents are only transferred when their version differs from the version known by the caller.
+    columns = ', '.join([f'CASE WHEN version = %s THEN NULL ELSE {column} END' for column in _DOCUMENT_COLUMNS[table]])
+    return f'SELECT version, {columns} FROM {table} WHERE am_id = %s;'
+
+
+def _text_tables_query() -> str:
+    return (
+        'SELECT table_name FROM information_schema.columns'
+        " WHERE column_name = 'data' AND data_type = 'text' AND table_name = ANY(%s);"
+    )
+
+
+def _migrate_to_jsonb_query(table: str) -> str:
+    if table not in _TABLES:
+        raise ValueError(f'Unknown table {table}, expecting one of {_TABLES}')
+    return f'ALTER TABLE {table} ALTER COLUMN data TYPE JSONB USING data::jsonb;'
+
+
+def _migrate_to_jsonb(cursor: psycopg2.extensions.cursor) -> List[str]:
+    cursor.execute(_text_tables_query(), (list(_TABLES),))
+    text_tables = sorted(table for table, in cursor.fetchall())
+    for table in text_tables:
+        cursor.execute(_migrate_to_jsonb_query(table), ())
+    return text_tables
+
+
+def migrate_to_jsonb(psql_dsn: str) -> List[str]:
+    """Convert the data column of tables created with the former TEXT schema to JSONB.
+
+    Tables already in JSONB are left untouched. Conversion rewrites the table.
+
+    Args:
+        psql_dsn (str): PostgreSQL DSN for connecting to the server.
+
+    Returns:
+        List[str]: names of the converted tables.
+    """
+    connection = psycopg2.connect(psql_dsn)
+    cursor = connection.cursor()
+    converted_tables = _migrate_to_jsonb(cursor)
+    connection.commit()
+    cursor.close()
+    connection.close()
+    return converted_tables
+
+
 def create_tables(psql_dsn: str) -> None:
-    """Create tables required for starting the app.
+    """Create tables required for starting the app, or migrate them to the current schema.
 
     Args:
         psql_dsn (str): PostgreSQL DSN for connecting to the server.
@@ -98,11 +461,79 @@ def create_tables(psql_dsn: str) -> None:
     cursor = connection.cursor()
     for query in _create_table_queries():
         cursor.execute(query, ())
+    _migrate_to_jsonb(cursor)
+    for query in _create_index_queries():
+        cursor.execute(query, ())
     connection.commit()
     cursor.close()
     connection.close()
 
 
+@dataclass
+class BulkWriteReport:
+    """Summary of a bulk write in one table.
+
+    Args:
+        table (str): name of the written table.
+        nb_rows (int): number of upserted rows.
+        nb_bytes (int): total size of the written data.
+        duration (float): duration of the write in seconds.
+    """
+
+    table: str
+    nb_rows: int
+    nb_bytes: int
+    duration: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.nb_rows / self.duration if self.duration else float('inf')
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.nb_bytes / self.duration if self.duration else float('inf')
+
+
+@dataclass
+class ChangeSet:
+    """Ids of the documents written or deleted after a revision.
+
+    Args:
+        revision (int): revision to pass to the next call of changes_since.
+        changed_ids (Dict[str, Set[str]]): ids of the changed documents, by table.
+    """
+
+    revision: int
+    changed_ids: Dict[str, Set[str]]
+
+
+@dataclass
+class ConditionalLoad(Generic[T]):
+    """Result of a load conditioned on the version known by the caller.
+
+    Args:
+        modified (bool): False if the stored version is the known version, in which case value is None.
+        version (Optional[int]): current version of the document, None if it does not exist.
+        value (Optional[T]): loaded document, None if not modified or if it does not exist.
+    """
+
+    modified: bool
+    version: Optional[int]
+    value: Optional[T]
+
+
+def _upsert_query(table: str, bulk: bool = False) -> str:
+    if table not in _TABLES:
+        raise ValueError(f'Unknown table {table}, expecting one of {_TABLES}')
+    columns = _DOCUMENT_COLUMNS[table]
+    values = '%s' if bulk else '(' + ', '.join(['%s'] * (len(columns) + 1)) + ')'
+    updates = ', '.join([f'{column} = EXCLUDED.{column}' for column in (*columns, 'version')])
+    return (
+        f'INSERT INTO {table}(am_id, {_document_columns(table)}) VALUES {values} ON CONFLICT (am_id)'
+        f' DO UPDATE SET {updates};'
+    )
+
+
 def _enrich_and_add_parametrization(
     am: ArreteMinisteriel, metadata: AMMetadata, parametrization: Parametrization
 ) -> ArreteMinisteriel:
@@ -111,85 +542,469 @@ def _enrich_and_add_parametrization(
     return enriched_am
 
 
+def _enrich_and_add_parametrization_str(am_str: str, metadata_str: str, parametrization_str: str) -> str:
+    # Runs in worker processes: inputs and output are JSON strings, which are cheaper to pickle than models.
+    enriched_am = _enrich_and_add_parametrization(
+        _load_am_str(am_str), _load_am_metadata_str(metadata_str), _load_parametrization_str(parametrization_str)
+    )
+    return compact_json(enriched_am.to_dict())
+
+
+def _timed_enrich_and_add_parametrization_str(
+    am_str: str, metadata_str: str, parametrization_str: str
+) -> Tuple[str, float]:
+    start = time.perf_counter()
+    enriched_am_str = _enrich_and_add_parametrization_str(am_str, metadata_str, parametrization_str)
+    return enriched_am_str, time.perf_counter() - start
+
+
+def _run_in_process_pool(
+    function: Callable[[str, str, str], T], tasks: List[Tuple[str, str, str, str]], workers: int
+) -> List[T]:
+    """Run function on the (am, metadata, parametrization) of each (am_id, am, metadata, parametrization) task.
+
+    Results are returned in the order of tasks.
+
+    Raises:
+        ValueError: when function fails on a task, with the id of the AM.
+    """
+    if workers <= 0:
+        raise ValueError(f'workers must be positive, got {workers}')
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: List[Tuple[str, 'Future[T]']] = [(am_id, executor.submit(function, *texts)) for am_id, *texts in tasks]
+        results: List[T] = []
+        for am_id, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                for _, other_future in futures:
+                    other_future.cancel()
+                raise ValueError(f'Error when enriching AM {am_id}: {exc!r}') from exc
+    return results
+
+
+def _enrich_in_process_pool(tasks: List[Tuple[str, str, str, str]], workers: int) -> List[ArreteMinisteriel]:
+    enriched_am_strs = _run_in_process_pool(_enrich_and_add_parametrization_str, tasks, workers)
+    return [_load_am_str(enriched_am_str) for enriched_am_str in enriched_am_strs]
+
+
 class DataFetcher:
-    def __init__(self, psql_dsn: str) -> None:
+    """Loads and stores AMs, their metadata and their parametrization in PostgreSQL.
+
+    Connections are taken from a bounded pool. Queries executed inside a `session` share
+    one connection and one transaction.
+
+    Args:
+        psql_dsn (str):
+            PostgreSQL DSN for connecting to the server.
+        min_connections (int = 1):
+            number of connections kept open in the pool.
+        max_connections (int = 10):
+            maximal number of connections opened simultaneously by this fetcher.
+        ping_on_checkout (bool = False):
+            if True, connections are checked with a `SELECT 1` before being used.
+        cache (Optional[FetcherCache] = None):
+            if not None, load_am, load_parametrization and load_am_metadata read through this cache,
+            which is invalidated by the writes of this fetcher.
+        codec (Optional[StorageCodec] = None):
+            if not None, AMs are written compressed with this codec. AMs are decoded with the codec
+            they were written with, whatever this option.
+        parametrization_rows (bool = False):
+            if True, parametrizations are stored in table parametrization_element, one row per
+            inapplicable section, alternative section or warning, instead of one document per AM.
+            upsert_parameter and remove_parameter then write a single row and only check the
+            consistency of the modified section. Parametrizations are not cached in this mode.
+            Existing documents are copied to rows with migrate_parametrizations_to_rows.
+        section_rows (bool = False):
+            if True, writes of AMs are also stored in table am_section, one row per section, so that
+            load_sections can load some sections of an AM without decoding the whole AM. Documents
+            of structured_am are still written and read by the other methods. Existing AMs are
+            copied to rows with migrate_ams_to_sections.
+        instrumentation (Optional[InstrumentationSink] = None):
+            if not None, each call of a load method is measured (time spent connecting, executing,
+            fetching, decoding JSON and building models, number of rows and bytes) and recorded in
+            this sink. If None, methods are not measured at all.
+    """
+
+    def __init__(
+        self,
+        psql_dsn: str,
+        min_connections: int = 1,
+        max_connections: int = 10,
+        ping_on_checkout: bool = False,
+        cache: Optional[FetcherCache] = None,
+        codec: Optional[StorageCodec] = None,
+        parametrization_rows: bool = False,
+        instrumentation: Optional[InstrumentationSink] = None,
+        section_rows: bool = False,
+    ) -> None:
         self.psql_dsn: str = psql_dsn
+        self.pool = ConnectionPool(psql_dsn, min_connections, max_connections, ping_on_checkout)
+        self.cache = cache
+        self.codec = codec
+        self.parametrization_rows = parametrization_rows
+        self.instrumentation = instrumentation
+        self.section_rows = section_rows
+        self._local = threading.local()
+
+    def _timings(self) -> Optional[CallTimings]:
+        if self.instrumentation is None:
+            return None
+        return getattr(self._local, 'timings', None)
+
+    @property
+    def _parametrization_source(self) -> str:
+        return _AGGREGATED_PARAMETRIZATION if self.parametrization_rows else 'parametrization'
+
+    @contextmanager
+    def session(self) -> Iterator['DataFetcher']:
+        """Run all queries of the context on one connection and in one transaction.
+
+        The transaction is committed at exit, or rolled back if an exception is raised.
+        Nested sessions are merged into the outermost one. Cache entries of the rows written in the
+        session are invalidated again once the transaction is over, so that the cache keeps neither
+        rows read by others before the commit nor rows that were rolled back.
+
+        Example:
+            >>> with fetcher.session():
+            ...     fetcher.upsert_am(am_id, am)
+            ...     fetcher.upsert_am_metadata(metadata)
+
+        Yields:
+            DataFetcher: the fetcher itself.
+        """
+        if getattr(self._local, 'connection', None) is not None:
+            yield self
+            return
+        timings, start = self._timings(), time.perf_counter()
+        invalidations: List[Tuple[str, str]] = []
+        try:
+            with self.pool.connection() as connection:
+                if timings is not None:
+                    timings.connect += time.perf_counter() - start
+                self._local.connection = connection
+                self._local.invalidations = invalidations
+                try:
+                    yield self
+                finally:
+                    self._local.connection = None
+                    self._local.invalidations = None
+        finally:
+            if self.cache is not None:
+                for table, am_id in invalidations:
+                    self.cache.invalidate(table, am_id)
+
+    @contextmanager
+    def _cursor(self, name: Optional[str] = None) -> Iterator[psycopg2.extensions.cursor]:
+        session_connection = getattr(self._local, 'connection', None)
+        if session_connection is not None:
+            with session_connection.cursor(name) as cursor:
+                register_default_jsonb(cursor, loads=_identity)
+                yield cursor
+            return
+        timings, start = self._timings(), time.perf_counter()
+        with self.pool.connection() as connection:
+            if timings is not None:
+                timings.connect += time.perf_counter() - start
+            with connection.cursor(name) as cursor:
+                register_default_jsonb(cursor, loads=_identity)
+                yield cursor
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.pool.close()
 
     def _exectute_select_query(self, query: str, values: Tuple) -> List[Tuple]:
-        connection = psycopg2.connect(self.psql_dsn)
-        cursor = connection.cursor()
-        cursor.execute(query, values)
-        res = list(cursor.fetchall())
-        cursor.close()
-        connection.close()
-        return res
-
-    def _exectute_update_query(self, query: str, values: Tuple) -> None:
-        connection = psycopg2.connect(self.psql_dsn)
-        cursor = connection.cursor()
-        cursor.execute(query, values)
-        connection.commit()
-        cursor.close()
-        connection.close()
+        with self._cursor() as cursor:
+            timings = self._timings()
+            if timings is None:
+                cursor.execute(query, values)
+                return list(cursor.fetchall())
+            start = time.perf_counter()
+            cursor.execute(query, values)
+            executed_at = time.perf_counter()
+            rows = list(cursor.fetchall())
+            timings.execute += executed_at - start
+            timings.fetch += time.perf_counter() - executed_at
+            timings.nb_queries += 1
+            timings.nb_rows += len(rows)
+            timings.nb_bytes += sum(_row_size(row) for row in rows)
+            return rows
+
+    def _iterate_select_query(self, query: str, values: Tuple, chunk_size: Optional[int]) -> Iterator[Tuple]:
+        """Yield rows of the query result.
+
+        If chunk_size is None, all rows are fetched at once. Otherwise, rows are read through a
+        named (server-side) cursor, chunk_size rows at a time, so that memory usage does not grow
+        with the size of the result.
+        """
+        if chunk_size is None:
+            yield from self._exectute_select_query(query, values)
+            return
+        if chunk_size <= 0:
+            raise ValueError(f'chunk_size must be positive, got {chunk_size}')
+        with self._cursor(name=f'envinorma_{random_id()}') as cursor:
+            cursor.itersize = chunk_size
+            timings = self._timings()
+            if timings is None:
+                cursor.execute(query, values)
+                yield from cursor
+                return
+            start = time.perf_counter()
+            cursor.execute(query, values)
+            timings.execute += time.perf_counter() - start
+            timings.nb_queries += 1
+            rows = iter(cursor)
+            while True:
+                start = time.perf_counter()
+                row = next(rows, None)
+                timings.fetch += time.perf_counter() - start
+                if row is None:
+                    return
+                timings.nb_rows += 1
+                timings.nb_bytes += _row_size(row)
+                yield row
+
+    def _exectute_update_query(self, query: str, values: Tuple) -> int:
+        with self._cursor() as cursor:
+            cursor.execute(query, values)
+            return cursor.rowcount
 
     def _exectute_delete_query(self, query: str, values: Tuple) -> None:
-        connection = psycopg2.connect(self.psql_dsn)
-        cursor = connection.cursor()
-        cursor.execute(query, values)
-        connection.commit()
-        cursor.close()
-        connection.close()
+        with self._cursor() as cursor:
+            cursor.execute(query, values)
 
-    def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
-        query = 'SELECT data FROM am_metadata WHERE am_id = %s;'
-        json_am = self._exectute_select_query(query, (am_id,))
-        if json_am:
-            return AMMetadata.from_dict(json.loads(_ensure_one_variable(json_am)))
+    def _decode(self, decoder: Callable[[str], T], stored: Tuple) -> T:
+        timings = self._timings()
+        if timings is None:
+            return _decode_document(decoder, stored)
+        start = time.perf_counter()
+        dict_ = default_codec().loads(_document_text(stored))
+        decoded_at = time.perf_counter()
+        value = _MODEL_BUILDERS[decoder](dict_)
+        timings.json_decode += decoded_at - start
+        timings.model_construction += time.perf_counter() - decoded_at
+        return value
+
+    def _load_version(self, table: str, am_id: str) -> Optional[int]:
+        tuples = self._exectute_select_query(f'SELECT version FROM {table} WHERE am_id = %s;', (am_id,))
+        return _ensure_one_variable(tuples) if tuples else None
+
+    def _load_cached_row(self, cache: FetcherCache, table: str, am_id: str, decoder: Callable[[str], T]) -> Optional[T]:
+        table_cache = cache.tables[table]
+        entry = table_cache.get(am_id)
+        if entry is not None:
+            if not cache.check_version or self._load_version(table, am_id) == entry.version:
+                table_cache.record_hit()
+                return entry.value
+            table_cache.mark_stale(am_id)
+        query = f'SELECT {_document_columns(table)}, version FROM {table} WHERE am_id = %s;'
+        tuples = self._exectute_select_query(query, (am_id,))
+        if not tuples:
+            return None
+        if len(tuples) != 1:
+            raise ValueError(f'Expecting only one row. Got {len(tuples)}.')
+        *stored, version = tuples[0]
+        value = self._decode(decoder, tuple(stored))
+        table_cache.put(am_id, value, version, _document_size(tuple(stored)))
+        return value
+
+    def _load_row(self, table: str, am_id: str, decoder: Callable[[str], T]) -> Optional[T]:
+        if self.cache is not None:
+            return self._load_cached_row(self.cache, table, am_id, decoder)
+        query = f'SELECT {_document_columns(table)} FROM {table} WHERE am_id = %s;'
+        tuples = self._exectute_select_query(query, (am_id,))
+        if len(tuples) > 1:
+            raise ValueError(f'Expecting only one row. Got {len(tuples)}.')
+        if tuples:
+            return self._decode(decoder, tuples[0])
         return None
 
+    def _upsert_document(self, table: str, am_id: str, text: str) -> None:
+        values = _document_values(table, text, self.codec)
+        self._exectute_update_query(_upsert_query(table), (am_id, *values))
+        self._invalidate(table, am_id)
+
+    def _invalidate(self, table: str, am_id: str) -> None:
+        if self.cache is None:
+            return
+        self.cache.invalidate(table, am_id)
+        invalidations = getattr(self._local, 'invalidations', None)
+        if invalidations is not None:
+            # Done again by session once the transaction is committed or rolled back.
+            invalidations.append((table, am_id))
+
+    def _record_changes(self, table: str, am_ids: List[str]) -> None:
+        with self._cursor() as cursor:
+            execute_values(cursor, _record_change_query(bulk=True), [(table, am_id) for am_id in am_ids])
+
+    def current_revision(self) -> int:
+        """Revision of the last write, to pass to changes_since after a full load."""
+        query = 'SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM envinorma_version;'
+        return _ensure_one_variable(self._exectute_select_query(query, ()))
+
+    def changes_since(self, revision: int) -> ChangeSet:
+        """Ids of the AMs, metadata and parametrizations written or deleted after revision.
+
+        Each write draws a new version from a sequence shared by all tables, so consumers can sync
+        incrementally: load everything after calling current_revision, then periodically reload
+        the ids returned by changes_since (ids that cannot be loaded anymore were deleted).
+
+        Versions are drawn when rows are written, not when transactions commit: a long transaction
+        committing after a call may be missed if its writes are older than the returned revision.
+
+        Args:
+            revision (int): revision returned by current_revision or by the previous call.
+
+        Returns:
+            ChangeSet: changed ids by table and the revision to use for the next call.
+        """
+        changed_ids: Dict[str, Set[str]] = {table: set() for table in _TABLES}
+        with self.session():
+            new_revision = self.current_revision()
+            for table, am_id in self._exectute_select_query(_changes_query(), (revision,) * 5):
+                changed_ids[table].add(am_id)
+        return ChangeSet(new_revision, changed_ids)
+
+    def _load_row_if_modified(
+        self, table: str, am_id: str, version: Optional[int], decoder: Callable[[str], T]
+    ) -> ConditionalLoad[T]:
+        nb_columns = len(_DOCUMENT_COLUMNS[table])
+        known_version = -1 if version is None else version
+        tuples = self._exectute_select_query(_conditional_load_query(table), (*([known_version] * nb_columns), am_id))
+        if not tuples:
+            return ConditionalLoad(version is not None, None, None)
+        current_version, *stored = tuples[0]
+        if current_version == version:
+            return ConditionalLoad(False, current_version, None)
+        return ConditionalLoad(True, current_version, self._decode(decoder, tuple(stored)))
+
+    def load_am_if_modified(self, am_id: str, version: Optional[int]) -> ConditionalLoad[ArreteMinisteriel]:
+        """Load an AM only if its version differs from version, without transferring it otherwise.
+
+        Args:
+            am_id (str): id of the AM.
+            version (Optional[int]): version returned by the previous load, None if unknown.
+
+        Returns:
+            ConditionalLoad[ArreteMinisteriel]: whether the AM changed, its current version and its value if it changed.
+        """
+        return self._load_row_if_modified('structured_am', am_id, version, _load_am_str)
+
+    def load_am_metadata_if_modified(self, am_id: str, version: Optional[int]) -> ConditionalLoad[AMMetadata]:
+        return self._load_row_if_modified('am_metadata', am_id, version, _load_am_metadata_str)
+
+    def load_parametrization_if_modified(self, am_id: str, version: Optional[int]) -> ConditionalLoad[Parametrization]:
+        """Same as load_am_if_modified for parametrizations.
+
+        Raises:
+            ValueError: when parametrizations are stored one row per element.
+        """
+        if self.parametrization_rows:
+            raise ValueError('Conditional loads of parametrizations are not available with parametrization_rows.')
+        return self._load_row_if_modified('parametrization', am_id, version, _load_parametrization_str)
+
+    @_instrumented
+    def load_am_metadata(self, am_id: str) -> Optional[AMMetadata]:
+        return self._load_row('am_metadata', am_id, _load_am_metadata_str)
+
+    @_instrumented
     def load_all_am_metadata(self, with_deleted_ams: bool = False, with_fake: bool = True) -> Dict[str, AMMetadata]:
-        query = 'SELECT am_id, data FROM am_metadata;'
-        tuples = self._exectute_select_query(query, ())
-        result = {am_id: AMMetadata.from_dict(json.loads(json_)) for am_id, json_ in tuples or {}}
-        if not with_fake:
-            result = {am_id: metadata for am_id, metadata in result.items() if not am_id.startswith('FAKE')}
-        if not with_deleted_ams:
-            result = {am_id: am for am_id, am in result.items() if am.state == am.state.VIGUEUR}
-        return result
+        filters, values = _am_metadata_filters(with_deleted_ams, with_fake)
+        query = f'SELECT am_id, data FROM am_metadata{filters};'
+        tuples = self._exectute_select_query(query, values)
+        return {am_id: self._decode(_load_am_metadata_str, (json_,)) for am_id, json_ in tuples or {}}
+
+    @_instrumented
+    def load_am_ids(
+        self,
+        rubrique: Optional[str] = None,
+        regime: Optional[Regime] = None,
+        is_transverse: Optional[bool] = None,
+        with_deleted_ams: bool = False,
+        with_fake: bool = True,
+    ) -> Set[str]:
+        """Ids of the AMs whose metadata match all filters. Filtering is done with index lookups.
+
+        Args:
+            rubrique (Optional[str] = None): if not None, keep AMs having a classement with this rubrique.
+            regime (Optional[Regime] = None): if not None, keep AMs having a classement with this regime.
+                If rubrique is also given, both must match on the same classement.
+            is_transverse (Optional[bool] = None): if not None, keep AMs with this is_transverse value.
+            with_deleted_ams (bool = False): if False, keep only AMs in state VIGUEUR.
+            with_fake (bool = True): if False, exclude AMs whose id starts with FAKE.
+
+        Returns:
+            Set[str]: ids of matching AMs.
+        """
+        filters, values = _am_metadata_filters(with_deleted_ams, with_fake, rubrique, regime, is_transverse)
+        query = f'SELECT am_id FROM am_metadata{filters};'
+        return {am_id for am_id, in self._exectute_select_query(query, values)}
+
+    @_instrumented
+    def load_am_metadata_fields(
+        self,
+        fields: List[str],
+        rubrique: Optional[str] = None,
+        regime: Optional[Regime] = None,
+        is_transverse: Optional[bool] = None,
+        with_deleted_ams: bool = False,
+        with_fake: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Load some fields of the metadata of AMs matching the filters (see load_am_ids).
+
+        Only the requested fields are extracted and transferred, as serialized in AMMetadata.to_dict.
+
+        Example:
+            >>> fetcher.load_am_metadata_fields(['title', 'nickname'], rubrique='2510')
+            {'JORFTEXT000000000000': {'title': 'Arrêté du ...', 'nickname': None}}
+
+        Args:
+            fields (List[str]): names of AMMetadata fields to extract.
+
+        Raises:
+            ValueError: when a field is not an AMMetadata field.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: requested fields, by AM id.
+        """
+        _check_am_metadata_fields(fields)
+        filters, filter_values = _am_metadata_filters(with_deleted_ams, with_fake, rubrique, regime, is_transverse)
+        projection = ', '.join(['%s::text, data -> %s'] * len(fields))
+        query = f'SELECT am_id, jsonb_build_object({projection}) FROM am_metadata{filters};'
+        values = tuple(value for field_ in fields for value in (field_, field_)) + filter_values
+        return {am_id: json.loads(data) for am_id, data in self._exectute_select_query(query, values)}
 
     def upsert_am_metadata(self, am_md: AMMetadata) -> None:
-        data = json.dumps(am_md.to_dict())
-        query = (
-            'INSERT INTO am_metadata(am_id, data) VALUES(%s, %s) ON CONFLICT (am_id)'
-            ' DO UPDATE SET data = %s WHERE am_metadata.am_id = %s;'
-        )
-        self._exectute_update_query(query, (am_md.cid, data, data, am_md.cid))
+        self._upsert_document('am_metadata', am_md.cid, json.dumps(am_md.to_dict()))
 
     def delete_am_metadata(self, am_id: str, reason_deleted: str) -> None:
-        am_metadata = self.load_am_metadata(am_id)
-        if not am_metadata:
-            raise ValueError(f'AM with id {am_id} does not exist, cannot delete it.')
-        am_metadata.state = AMState.DELETED
-        am_metadata.reason_deleted = reason_deleted
-        self.upsert_am_metadata(am_metadata)
+        with self.session():
+            am_metadata = self.load_am_metadata(am_id)
+            if not am_metadata:
+                raise ValueError(f'AM with id {am_id} does not exist, cannot delete it.')
+            # replace instead of mutating: loaded metadata may be shared through the cache
+            self.upsert_am_metadata(replace(am_metadata, state=AMState.DELETED, reason_deleted=reason_deleted))
 
     def remove_parameter(self, am_id: str, parameter_type: Type[ParameterElement], parameter_id: str) -> None:
-        previous_parametrization = self._load_parametrization(am_id)
-        if not previous_parametrization:
-            raise ValueError('Expecting a non null parametrization.')
-        parametrization = _recreate_with_removed_parameter(parameter_type, parameter_id, previous_parametrization)
-        self.upsert_new_parametrization(am_id, parametrization)
+        if self.parametrization_rows:
+            self._remove_element(am_id, parameter_type, parameter_id)
+            return
+        with self.session():
+            previous_parametrization = self._load_parametrization(am_id)
+            if not previous_parametrization:
+                raise ValueError('Expecting a non null parametrization.')
+            parametrization = _recreate_with_removed_parameter(parameter_type, parameter_id, previous_parametrization)
+            self.upsert_new_parametrization(am_id, parametrization)
 
     def upsert_new_parametrization(self, am_id: str, parametrization: Parametrization) -> None:
-        data = json.dumps(parametrization.to_dict())
-        query = (
-            'INSERT INTO parametrization(am_id, data) VALUES(%s, %s) ON CONFLICT (am_id)'
-            ' DO UPDATE SET data = %s WHERE parametrization.am_id = %s;'
-        )
-        self._exectute_update_query(query, (am_id, data, data, am_id))
+        if self.parametrization_rows:
+            self._replace_elements({am_id: parametrization}, page_size=100)
+            return
+        self._upsert_document('parametrization', am_id, json.dumps(parametrization.to_dict()))
 
     def _load_parametrization(self, am_id: str) -> Optional[Parametrization]:
-        query = 'SELECT data FROM parametrization where am_id = %s LIMIT 1;'
+        query = f'SELECT data FROM {self._parametrization_source} where am_id = %s LIMIT 1;'
         tuples = self._exectute_select_query(query, (am_id,))
         if len(tuples) > 1:
             raise ValueError('Parametrization not found, which should not happen.')
@@ -197,52 +1012,357 @@ class DataFetcher:
             return None
         if len(tuples[0]) != 1:
             raise ValueError(f'Expecting one value, received {len(tuples[0])}.')
-        return Parametrization.from_dict(json.loads(tuples[0][0]))
+        return self._decode(_load_parametrization_str, tuples[0])
 
     def load_or_init_parametrization(self, am_id: str) -> Parametrization:
         return self.load_parametrization(am_id) or Parametrization([], [], [])
 
     def upsert_parameter(self, am_id: str, new_parameter: ParameterElement, parameter_id: Optional[str]) -> None:
-        previous_parametrization = self.load_or_init_parametrization(am_id)
-        parametrization = _recreate_with_upserted_parameter(new_parameter, parameter_id, previous_parametrization)
-        parametrization.check_consistency()
-        self.upsert_new_parametrization(am_id, parametrization)
+        if self.parametrization_rows:
+            self._upsert_element(am_id, new_parameter, parameter_id)
+            return
+        with self.session():
+            previous_parametrization = self._load_parametrization(am_id) or Parametrization([], [], [])
+            parametrization = _recreate_with_upserted_parameter(new_parameter, parameter_id, previous_parametrization)
+            parametrization.check_consistency()
+            self.upsert_new_parametrization(am_id, parametrization)
+
+    def _upsert_element(self, am_id: str, new_parameter: ParameterElement, parameter_id: Optional[str]) -> None:
+        """Insert new_parameter, or replace the element of the same type with id parameter_id, in one statement.
+
+        Elements of the target section are locked while checking its consistency: the advisory lock
+        serializes writers of the section, including those inserting new elements, and FOR UPDATE
+        prevents the checked rows from being modified by other statements.
+        """
+        if not isinstance(new_parameter, AMWarning):
+            new_parameter.condition.check()
+        kind = _element_kind(type(new_parameter))
+        data = json.dumps(new_parameter.to_dict())
+        with self.session():
+            lock_key = f'{am_id}/{new_parameter.section_id}'
+            self._exectute_select_query('SELECT pg_advisory_xact_lock(hashtext(%s));', (lock_key,))
+            section_query = (
+                'SELECT id, kind, data FROM parametrization_element WHERE am_id = %s AND section_id = %s'
+                ' ORDER BY rank FOR UPDATE;'
+            )
+            section_rows = self._exectute_select_query(section_query, (am_id, new_parameter.section_id))
+            other_elements = [
+                _load_element(kind_, data_)
+                for id_, kind_, data_ in section_rows
+                if (id_, kind_) != (parameter_id, kind)
+            ]
+            _check_section_consistency([*other_elements, new_parameter])
+            if parameter_id is None:
+                query = (
+                    'INSERT INTO parametrization_element(am_id, id, kind, section_id, data)'
+                    ' VALUES (%s, %s, %s, %s, %s) ON CONFLICT (am_id, kind, id) DO NOTHING;'
+                )
+                row = (am_id, new_parameter.id, kind, new_parameter.section_id, data)
+                if self._exectute_update_query(query, row) != 1:
+                    raise ValueError(f'Parameter with id {new_parameter.id} already exists.')
+                return
+            if new_parameter.id != parameter_id:
+                query = 'SELECT 1 FROM parametrization_element WHERE am_id = %s AND kind = %s AND id = %s;'
+                if self._exectute_select_query(query, (am_id, kind, new_parameter.id)):
+                    raise ValueError(f'Parameter with id {new_parameter.id} already exists.')
+            query = (
+                'UPDATE parametrization_element SET id = %s, section_id = %s, data = %s,'
+                " version = nextval('envinorma_version') WHERE am_id = %s AND id = %s AND kind = %s;"
+            )
+            values = (new_parameter.id, new_parameter.section_id, data, am_id, parameter_id, kind)
+            if self._exectute_update_query(query, values) != 1:
+                raise ValueError(f'Parameter with id {parameter_id} not found.')
+
+    def _remove_element(self, am_id: str, parameter_type: Type[ParameterElement], parameter_id: str) -> None:
+        with self.session():
+            query = 'DELETE FROM parametrization_element WHERE am_id = %s AND id = %s AND kind = %s;'
+            if self._exectute_update_query(query, (am_id, parameter_id, _element_kind(parameter_type))):
+                self._record_changes('parametrization', [am_id])
+                return
+            if not self._exectute_select_query('SELECT 1 FROM parametrization_element WHERE am_id = %s;', (am_id,)):
+                raise ValueError('Expecting a non null parametrization.')
+
+    def _replace_elements(self, parametrizations: Dict[str, Parametrization], page_size: int) -> BulkWriteReport:
+        start = time.perf_counter()
+        rows = [
+            row for am_id, parametrization in parametrizations.items() for row in _element_rows(am_id, parametrization)
+        ]
+        _check_unique_element_ids(rows)
+        with self.session():
+            query = 'DELETE FROM parametrization_element WHERE am_id = ANY(%s);'
+            self._exectute_update_query(query, (list(parametrizations),))
+            self._record_changes('parametrization', list(parametrizations))
+            with self._cursor() as cursor:
+                insert_query = 'INSERT INTO parametrization_element(am_id, id, kind, section_id, data) VALUES %s;'
+                execute_values(cursor, insert_query, rows, page_size=page_size)
+        nb_bytes = sum(len(row[-1]) for row in rows)
+        return BulkWriteReport('parametrization_element', len(rows), nb_bytes, time.perf_counter() - start)
+
+    def migrate_parametrizations_to_rows(self, page_size: int = 100) -> BulkWriteReport:
+        """Copy the parametrization documents to table parametrization_element, in one transaction.
+
+        Run once before switching to parametrization_rows. Documents are left untouched.
 
+        Args:
+            page_size (int = 100): maximal number of rows per INSERT statement.
+
+        Returns:
+            BulkWriteReport: number of written elements, total size and duration.
+        """
+        with self.session():
+            tuples = self._exectute_select_query('SELECT am_id, data FROM parametrization;', ())
+            parametrizations = {am_id: _load_parametrization_str(json_) for am_id, json_ in tuples}
+            return self._replace_elements(parametrizations, page_size)
+
+    @_instrumented
     def load_parametrization(self, am_id: str) -> Optional[Parametrization]:
-        query = 'SELECT data FROM parametrization WHERE am_id = %s;'
-        json_am = self._exectute_select_query(query, (am_id,))
-        if json_am:
-            return Parametrization.from_dict(json.loads(_ensure_one_variable(json_am)))
-        return None
+        if self.parametrization_rows:
+            return self._load_parametrization(am_id)
+        return self._load_row('parametrization', am_id, _load_parametrization_str)
 
+    @_instrumented
     def load_all_parametrizations(self) -> Dict[str, Parametrization]:
-        query = 'SELECT am_id, data FROM parametrization;'
+        query = f'SELECT am_id, data FROM {self._parametrization_source};'
         tuples = self._exectute_select_query(query, ())
-        return {am_id: Parametrization.from_dict(json.loads(json_)) for am_id, json_ in tuples or {}}
+        return {am_id: self._decode(_load_parametrization_str, (json_,)) for am_id, json_ in tuples or {}}
 
+    @_instrumented
     def load_am(self, am_id: str) -> Optional[ArreteMinisteriel]:
-        query = 'SELECT data FROM structured_am WHERE am_id = %s;'
-        json_am = self._exectute_select_query(query, (am_id,))
-        if json_am:
-            return _load_am_str(_ensure_one_variable(json_am))
-        return None
+        return self._load_row('structured_am', am_id, _load_am_str)
 
     def delete_am(self, am_id: str) -> None:
         query = 'DELETE FROM structured_am WHERE am_id = %s;'
-        self._exectute_delete_query(query, (am_id,))
+        with self.session():
+            self._exectute_delete_query(query, (am_id,))
+            if self.section_rows:
+                self._exectute_delete_query('DELETE FROM am_section WHERE am_id = %s;', (am_id,))
+            self._record_changes('structured_am', [am_id])
+        self._invalidate('structured_am', am_id)
 
     def upsert_am(self, am_id: str, am: ArreteMinisteriel) -> None:
-        query = (
-            'INSERT INTO structured_am(am_id, data) VALUES(%s, %s) ON CONFLICT (am_id)'
-            ' DO UPDATE SET data = %s WHERE structured_am.am_id =%s;'
-        )
-        data = json.dumps(am.to_dict())
-        self._exectute_update_query(query, (am_id, data, data, am_id))
+        text = compact_json(am.to_dict())
+        with self.session():
+            self._upsert_document('structured_am', am_id, text)
+            if self.section_rows:
+                self._replace_sections([(am_id, text)], page_size=100)
 
-    def load_ams(self, am_ids: Set[str]) -> List[ArreteMinisteriel]:
-        query = 'SELECT am_id, data FROM structured_am'
-        tuples = self._exectute_select_query(query, ())
-        return [_load_am_str(json_am) for id_, json_am in tuples if id_ in am_ids]
+    def _replace_sections(self, rows: List[Tuple[str, str]], page_size: int) -> BulkWriteReport:
+        start = time.perf_counter()
+        section_rows = [section_row for am_id, text in rows for section_row in _section_rows(am_id, json.loads(text))]
+        with self.session():
+            query = 'DELETE FROM am_section WHERE am_id = ANY(%s);'
+            self._exectute_update_query(query, ([am_id for am_id, _ in rows],))
+            with self._cursor() as cursor:
+                insert_query = 'INSERT INTO am_section(am_id, rank, last_rank, section_id, parent_id, data) VALUES %s;'
+                execute_values(cursor, insert_query, section_rows, page_size=page_size)
+        nb_bytes = sum(len(row[-1]) for row in section_rows)
+        return BulkWriteReport('am_section', len(section_rows), nb_bytes, time.perf_counter() - start)
+
+    def migrate_ams_to_sections(self, chunk_size: int = 100) -> BulkWriteReport:
+        """Copy all stored AMs to table am_section, in one transaction.
+
+        Run once before switching to section_rows. Documents of structured_am are left untouched.
+
+        Args:
+            chunk_size (int = 100): number of AMs read and written at a time.
+
+        Returns:
+            BulkWriteReport: number of written sections, total size and duration.
+        """
+        start = time.perf_counter()
+        query = f"SELECT am_id, {_document_columns('structured_am')} FROM structured_am;"
+        reports: List[BulkWriteReport] = []
+        with self.session():
+            rows: List[Tuple[str, str]] = []
+            for am_id, *stored in self._iterate_select_query(query, (), chunk_size):
+                rows.append((am_id, _document_text(tuple(stored))))
+                if len(rows) >= chunk_size:
+                    reports.append(self._replace_sections(rows, chunk_size))
+                    rows = []
+            reports.append(self._replace_sections(rows, chunk_size))
+        nb_rows = sum(report.nb_rows for report in reports)
+        nb_bytes = sum(report.nb_bytes for report in reports)
+        return BulkWriteReport('am_section', nb_rows, nb_bytes, time.perf_counter() - start)
+
+    def _build_from_sections(self, rows: List[Tuple[int, int, str]], builder: Callable[[Dict[str, Any]], T]) -> List[T]:
+        timings = self._timings()
+        start = time.perf_counter()
+        dicts = _nest_sections(rows)
+        decoded_at = time.perf_counter()
+        values = [builder(dict_) for dict_ in dicts]
+        if timings is not None:
+            timings.json_decode += decoded_at - start
+            timings.model_construction += time.perf_counter() - decoded_at
+        return values
+
+    @_instrumented
+    def load_sections(self, am_id: str, section_ids: List[str], with_subsections: bool = True) -> List[StructuredText]:
+        """Load some sections of an AM from table am_section, without loading the rest of the AM.
+
+        Args:
+            am_id (str): id of the AM.
+            section_ids (List[str]): ids of the sections to load. Unknown ids are ignored.
+            with_subsections (bool = True):
+                if True, sections are loaded with all their descendants, and a requested section that
+                is a descendant of another requested section is only returned within its ancestor.
+                If False, sections are returned without their subsections.
+
+        Returns:
+            List[StructuredText]: loaded sections, in the order of the AM.
+        """
+        if with_subsections:
+            query = (
+                'SELECT DISTINCT section.rank, section.last_rank, section.data FROM am_section AS root'
+                ' JOIN am_section AS section ON section.am_id = root.am_id'
+                ' AND section.rank BETWEEN root.rank AND root.last_rank'
+                ' WHERE root.am_id = %s AND root.section_id = ANY(%s) ORDER BY section.rank;'
+            )
+        else:
+            query = 'SELECT rank, rank, data FROM am_section WHERE am_id = %s AND section_id = ANY(%s) ORDER BY rank;'
+        rows = self._exectute_select_query(query, (am_id, list(section_ids)))
+        return self._build_from_sections(rows, StructuredText.from_dict)
+
+    @_instrumented
+    def load_am_from_sections(self, am_id: str) -> Optional[ArreteMinisteriel]:
+        """Load a whole AM from table am_section, with a single query ordered by rank."""
+        query = 'SELECT rank, last_rank, data FROM am_section WHERE am_id = %s ORDER BY rank;'
+        rows = self._exectute_select_query(query, (am_id,))
+        ams = self._build_from_sections(rows, ArreteMinisteriel.from_dict)
+        if len(ams) > 1:
+            raise ValueError(f'Expecting only one AM. Got {len(ams)}.')
+        return ams[0] if ams else None
+
+    def _bulk_upsert(self, table: str, rows: List[Tuple[str, str]], page_size: int) -> BulkWriteReport:
+        start = time.perf_counter()
+        stored_rows = [(am_id, *_document_values(table, text, self.codec)) for am_id, text in rows]
+        with self.session():
+            with self._cursor() as cursor:
+                execute_values(cursor, _upsert_query(table, bulk=True), stored_rows, page_size=page_size)
+            if table == 'structured_am' and self.section_rows:
+                self._replace_sections(rows, page_size)
+        duration = time.perf_counter() - start
+        for am_id, _ in rows:
+            self._invalidate(table, am_id)
+        nb_bytes = sum(_document_size(tuple(stored_row[1:])) for stored_row in stored_rows)
+        return BulkWriteReport(table, len(rows), nb_bytes, duration)
+
+    def upsert_ams(self, ams: Dict[str, ArreteMinisteriel], page_size: int = 100) -> BulkWriteReport:
+        """Upsert several AMs in one transaction, with multi-row INSERT statements.
+
+        Args:
+            ams (Dict[str, ArreteMinisteriel]): AMs to upsert, by id.
+            page_size (int = 100): maximal number of rows per INSERT statement.
+
+        Returns:
+            BulkWriteReport: number of rows, bytes and duration of the write.
+        """
+        rows = [(am_id, compact_json(am.to_dict())) for am_id, am in ams.items()]
+        return self._bulk_upsert('structured_am', rows, page_size)
+
+    def upsert_ams_metadata(self, ams_metadata: List[AMMetadata], page_size: int = 1000) -> BulkWriteReport:
+        """Upsert several AM metadata in one transaction. If two metadata share a cid, the last one is kept."""
+        id_to_data = {am_md.cid: json.dumps(am_md.to_dict()) for am_md in ams_metadata}
+        return self._bulk_upsert('am_metadata', list(id_to_data.items()), page_size)
+
+    def upsert_parametrizations(
+        self, parametrizations: Dict[str, Parametrization], page_size: int = 100
+    ) -> BulkWriteReport:
+        """Upsert several parametrizations in one transaction."""
+        if self.parametrization_rows:
+            return self._replace_elements(parametrizations, page_size)
+        rows = [(am_id, json.dumps(param.to_dict())) for am_id, param in parametrizations.items()]
+        return self._bulk_upsert('parametrization', rows, page_size)
+
+    def export_corpus(self, filename: str, chunk_size: int = 100) -> Dict[str, int]:
+        """Dump the content of all tables in a JSON lines file, without decoding stored data.
+
+        Args:
+            filename (str): path of the output file.
+            chunk_size (int = 100): number of rows fetched at a time.
+
+        Returns:
+            Dict[str, int]: number of exported rows per table.
+        """
+        nb_rows = {table: 0 for table in _TABLES}
+        with open(filename, 'w') as file_, self.session():
+            for table in _TABLES:
+                source = self._parametrization_source if table == 'parametrization' else table
+                query = f'SELECT am_id, {_document_columns(table)} FROM {source};'
+                for am_id, *stored in self._iterate_select_query(query, (), chunk_size):
+                    data = _document_text(tuple(stored))
+                    file_.write(json.dumps({'table': table, 'am_id': am_id, 'data': data}) + '\n')
+                    nb_rows[table] += 1
+        return nb_rows
+
+    def import_corpus(self, filename: str, page_size: int = 100) -> List[BulkWriteReport]:
+        """Upsert all rows of a file generated by export_corpus, in one transaction.
+
+        Args:
+            filename (str): path of the file generated by export_corpus.
+            page_size (int = 100): maximal number of rows per INSERT statement.
+
+        Returns:
+            List[BulkWriteReport]: one report per table.
+        """
+        table_to_rows: Dict[str, List[Tuple[str, str]]] = {table: [] for table in _TABLES}
+        with open(filename) as file_:
+            for line in file_:
+                row = json.loads(line)
+                table_to_rows[row['table']].append((row['am_id'], row['data']))
+        with self.session():
+            reports = [
+                self._bulk_upsert(table, rows, page_size)
+                for table, rows in table_to_rows.items()
+                if table != 'parametrization' or not self.parametrization_rows
+            ]
+            if self.parametrization_rows:
+                parametrization_rows = table_to_rows['parametrization']
+                parametrizations = {am_id: _load_parametrization_str(data) for am_id, data in parametrization_rows}
+                reports.append(self._replace_elements(parametrizations, page_size))
+            return reports
+
+    def reencode_ams(self, chunk_size: int = 100) -> BulkWriteReport:
+        """Rewrite all stored AMs with the codec of this fetcher, in one transaction.
+
+        This is the migration step to run after changing codec (or to decompress AMs when the
+        fetcher has no codec). Documents are also re-serialized in compact JSON.
+
+        Args:
+            chunk_size (int = 100): number of AMs read and written at a time.
+
+        Returns:
+            BulkWriteReport: number of rewritten AMs, total stored size and duration.
+        """
+        start = time.perf_counter()
+        query = f"SELECT am_id, {_document_columns('structured_am')} FROM structured_am;"
+        reports: List[BulkWriteReport] = []
+        with self.session():
+            rows: List[Tuple[str, str]] = []
+            for am_id, *stored in self._iterate_select_query(query, (), chunk_size):
+                rows.append((am_id, compact_json(json.loads(_document_text(tuple(stored))))))
+                if len(rows) >= chunk_size:
+                    reports.append(self._bulk_upsert('structured_am', rows, chunk_size))
+                    rows = []
+            reports.append(self._bulk_upsert('structured_am', rows, chunk_size))
+        nb_rows = sum(report.nb_rows for report in reports)
+        nb_bytes = sum(report.nb_bytes for report in reports)
+        return BulkWriteReport('structured_am', nb_rows, nb_bytes, time.perf_counter() - start)
+
+    @_instrumented
+    def load_ams(self, am_ids: Set[str], chunk_size: Optional[int] = None) -> List[ArreteMinisteriel]:
+        """Load AMs whose id is in am_ids. Ids without AM are ignored.
+
+        Args:
+            am_ids (Set[str]): ids of the AMs to load.
+            chunk_size (Optional[int] = None):
+                if not None, rows are streamed from a server-side cursor chunk_size rows at a time.
+
+        Returns:
+            List[ArreteMinisteriel]: loaded AMs, in no particular order.
+        """
+        query = f"SELECT {_document_columns('structured_am')} FROM structured_am WHERE am_id = ANY(%s);"
+        tuples = self._iterate_select_query(query, (list(am_ids),), chunk_size)
+        return [self._decode(_load_am_str, stored) for stored in tuples]
 
     def safe_load_am(self, am_id: str) -> ArreteMinisteriel:
         am = self.load_am(am_id)
@@ -250,25 +1370,156 @@ class DataFetcher:
             raise ValueError('Expecting one AM to proceed.')
         return am
 
-    def load_id_to_am(self, ids: Optional[Set[str]] = None) -> Dict[str, ArreteMinisteriel]:
-        ids = ids or set(self.load_all_am_metadata().keys())
-        structured_texts = self.load_ams(ids)
+    @_instrumented
+    def load_id_to_am(
+        self, ids: Optional[Set[str]] = None, chunk_size: Optional[int] = None
+    ) -> Dict[str, ArreteMinisteriel]:
+        ids = ids or self.load_am_ids()
+        structured_texts = self.load_ams(ids, chunk_size)
         id_to_structured_text = {text.id or '': text for text in structured_texts}
         return {id_: id_to_structured_text[id_] for id_ in ids if id_ in id_to_structured_text}
 
+    def _upsert_deduplicated(
+        self, table_name: str, roots: Dict[str, Dict[str, Any]], store: ContentStore, page_size: int
+    ) -> BulkWriteReport:
+        start = time.perf_counter()
+        nodes = store.unsaved_nodes()
+        rows = [(table_name, am_id, json.dumps(root)) for am_id, root in roots.items()]
+        with self.session():
+            with self._cursor() as cursor:
+                # Nodes are immutable: a node with the same hash has the same content.
+                node_query = 'INSERT INTO content_node(hash, kind, data) VALUES %s ON CONFLICT (hash) DO NOTHING;'
+                execute_values(cursor, node_query, nodes, page_size=page_size)
+                document_query = (
+                    'INSERT INTO deduplicated_document(table_name, am_id, data) VALUES %s'
+                    ' ON CONFLICT (table_name, am_id) DO UPDATE SET data = EXCLUDED.data;'
+                )
+                execute_values(cursor, document_query, rows, page_size=page_size)
+        store.mark_saved(hash_ for hash_, _, _ in nodes)
+        nb_bytes = sum(len(data) for _, _, data in nodes) + sum(len(row[-1]) for row in rows)
+        return BulkWriteReport('deduplicated_document', len(nodes) + len(rows), nb_bytes, time.perf_counter() - start)
+
+    def upsert_deduplicated_ams(
+        self, ams: Dict[str, ArreteMinisteriel], store: ContentStore, page_size: int = 100
+    ) -> BulkWriteReport:
+        """Upsert AMs in the content-addressed tables, in one transaction.
+
+        Subtrees of the AMs are put in store, and the nodes of store that were not saved yet are
+        inserted in table content_node, so that a store shared by successive calls only writes
+        new subtrees. Documents of structured_am are left untouched.
+
+        Args:
+            ams (Dict[str, ArreteMinisteriel]): AMs to upsert, by id.
+            store (ContentStore): store deduplicating the subtrees.
+            page_size (int = 100): maximal number of rows per INSERT statement.
+
+        Returns:
+            BulkWriteReport: number of written nodes and documents, total size and duration.
+            Deduplication statistics are in store.stats.
+        """
+        roots = {am_id: store.put_am(am) for am_id, am in ams.items()}
+        return self._upsert_deduplicated('structured_am', roots, store, page_size)
+
+    def upsert_deduplicated_parametrizations(
+        self, parametrizations: Dict[str, Parametrization], store: ContentStore, page_size: int = 100
+    ) -> BulkWriteReport:
+        """Same as upsert_deduplicated_ams, for parametrizations."""
+        roots = {am_id: store.put_parametrization(param) for am_id, param in parametrizations.items()}
+        return self._upsert_deduplicated('parametrization', roots, store, page_size)
+
+    def _load_content_nodes(self, store: ContentStore, hashes: Set[str]) -> None:
+        # Nodes are fetched level by level, with one query per level of the subtrees.
+        missing = {hash_ for hash_ in hashes if hash_ not in store}
+        while missing:
+            query = 'SELECT hash, kind, data FROM content_node WHERE hash = ANY(%s);'
+            nodes = self._exectute_select_query(query, (list(missing),))
+            if len(nodes) != len(missing):
+                raise ValueError(f'{len(missing) - len(nodes)} referenced nodes are missing in content_node.')
+            store.add_nodes(nodes)
+            missing = {reference for hash_, _, _ in nodes for reference in store.references(hash_)}
+            missing = {hash_ for hash_ in missing if hash_ not in store}
+
+    def _load_deduplicated_roots(
+        self, table_name: str, am_ids: Set[str], store: ContentStore
+    ) -> Dict[str, Dict[str, Any]]:
+        query = 'SELECT am_id, data FROM deduplicated_document WHERE table_name = %s AND am_id = ANY(%s);'
+        rows = self._exectute_select_query(query, (table_name, list(am_ids)))
+        roots = {am_id: json.loads(data) for am_id, data in rows}
+        kind = 'am' if table_name == 'structured_am' else 'parametrization'
+        self._load_content_nodes(store, {ref for root in roots.values() for ref in root_references(kind, root)})
+        return roots
+
+    @_instrumented
+    def load_deduplicated_ams(self, am_ids: Set[str], store: ContentStore) -> Dict[str, ArreteMinisteriel]:
+        """Load AMs written by upsert_deduplicated_ams. Ids without AM are ignored.
+
+        Only the nodes missing in store are fetched, and loaded AMs share their equal EnrichedStrings
+        (see ContentStore): reuse the same store across calls to share them across AMs.
+        """
+        with self.session():
+            roots = self._load_deduplicated_roots('structured_am', am_ids, store)
+        return {am_id: store.load_am(root) for am_id, root in roots.items()}
+
+    @_instrumented
+    def load_deduplicated_parametrizations(self, am_ids: Set[str], store: ContentStore) -> Dict[str, Parametrization]:
+        """Same as load_deduplicated_ams, for parametrizations."""
+        with self.session():
+            roots = self._load_deduplicated_roots('parametrization', am_ids, store)
+        return {am_id: store.load_parametrization(root) for am_id, root in roots.items()}
+
     def _load_validated_parametrizations(self) -> Dict[str, Parametrization]:
         parametizations = self.load_all_parametrizations()
-        all_metadata = self.load_all_am_metadata()  # only state == 'VIGUEUR'
-        return {
-            am_id: parametization
-            for am_id, parametization in parametizations.items()
-            if am_id in all_metadata and all_metadata[am_id].state == AMState.VIGUEUR
-        }
-
-    def build_enriched_ams(self, with_deleted_ams: bool = False, with_fake: bool = False) -> List[ArreteMinisteriel]:
-        metadata = self.load_all_am_metadata(with_deleted_ams, with_fake)
-        id_to_am = self.load_id_to_am()
-        parametizations = self._load_validated_parametrizations()
+        am_ids = self.load_am_ids()  # only state == 'VIGUEUR'
+        return {am_id: parametization for am_id, parametization in parametizations.items() if am_id in am_ids}
+
+    def _load_am_texts(self, am_ids: Set[str], chunk_size: Optional[int] = None) -> Dict[str, str]:
+        query = f"SELECT am_id, {_document_columns('structured_am')} FROM structured_am WHERE am_id = ANY(%s);"
+        rows = self._iterate_select_query(query, (list(am_ids),), chunk_size)
+        return {am_id: _document_text(tuple(stored)) for am_id, *stored in rows}
+
+    def _load_enrichment_tasks(self, with_deleted_ams: bool, with_fake: bool) -> List[Tuple[str, str, str, str]]:
+        """Load (am_id, am, metadata, parametrization) JSON strings of the AMs to enrich."""
+        with self.session():
+            metadata = self.load_all_am_metadata(with_deleted_ams, with_fake)
+            id_to_am_str = self._load_am_texts(self.load_am_ids())
+            parametizations = self._load_validated_parametrizations()
+        return [
+            (
+                am_id,
+                id_to_am_str[am_id],
+                json.dumps(am_md.to_dict()),
+                json.dumps((parametizations.get(am_id) or Parametrization([], [], [])).to_dict()),
+            )
+            for am_id, am_md in metadata.items()
+            if am_id in id_to_am_str
+        ]
+
+    @_instrumented
+    def build_enriched_ams(
+        self, with_deleted_ams: bool = False, with_fake: bool = False, workers: Optional[int] = None
+    ) -> List[ArreteMinisteriel]:
+        """Load all AMs with their metadata and parametrization, and return enriched AMs.
+
+        Args:
+            with_deleted_ams (bool = False):
+                has no effect, kept for compatibility: only AMs whose metadata state is VIGUEUR are enriched.
+            with_fake (bool = False): if True, fake AMs (whose id starts with FAKE) are included.
+            workers (Optional[int] = None):
+                if not None, AMs are decoded, enriched and parametrized in a pool of `workers` processes.
+                Otherwise, this is done sequentially in the current process.
+
+        Raises:
+            ValueError: in parallel mode, when the enrichment of an AM fails, with the id of the AM.
+
+        Returns:
+            List[ArreteMinisteriel]: enriched AMs, in the same order whatever workers.
+        """
+        if workers is not None:
+            return _enrich_in_process_pool(self._load_enrichment_tasks(with_deleted_ams, with_fake), workers)
+        with self.session():
+            metadata = self.load_all_am_metadata(with_deleted_ams, with_fake)
+            id_to_am = self.load_id_to_am()
+            parametizations = self._load_validated_parametrizations()
         return [
             _enrich_and_add_parametrization(
                 id_to_am[am_id], am_md, parametizations.get(am_id) or Parametrization([], [], [])
@@ -276,3 +1527,84 @@ class DataFetcher:
             for am_id, am_md in metadata.items()
             if am_id in id_to_am
         ]
+
+    def iter_enriched_ams(
+        self, with_deleted_ams: bool = False, with_fake: bool = False, chunk_size: int = 10
+    ) -> Iterator[ArreteMinisteriel]:
+        """Stream the AMs of build_enriched_ams, ordered by id.
+
+        AMs are read together with their metadata and parametrization from a server-side cursor
+        and enriched one at a time, so that memory usage is proportional to the largest AM rather
+        than to the corpus. The connection is held until the iterator is exhausted or closed.
+
+        Args:
+            with_deleted_ams (bool = False):
+                has no effect, kept for compatibility: only AMs whose metadata state is VIGUEUR are enriched.
+            with_fake (bool = False): if True, fake AMs (whose id starts with FAKE) are included.
+            chunk_size (int = 10): number of rows fetched at a time.
+
+        Yields:
+            ArreteMinisteriel: enriched AMs.
+        """
+        query, values = _enriched_ams_query(with_fake, self._parametrization_source)
+        for _, metadata_str, *stored, parametrization_str in self._iterate_select_query(query, values, chunk_size):
+            parametrization = (
+                self._decode(_load_parametrization_str, (parametrization_str,))
+                if parametrization_str
+                else Parametrization([], [], [])
+            )
+            am = self._decode(_load_am_str, tuple(stored))
+            yield _enrich_and_add_parametrization(
+                am, self._decode(_load_am_metadata_str, (metadata_str,)), parametrization
+            )
+
+    @_instrumented
+    def build_enriched_ams_incrementally(
+        self,
+        build_cache: BuildCache,
+        with_deleted_ams: bool = False,
+        with_fake: bool = False,
+        workers: Optional[int] = None,
+    ) -> Tuple[List[ArreteMinisteriel], BuildReport]:
+        """Same as build_enriched_ams, but AMs whose inputs did not change since the last build are reused.
+
+        An AM is rebuilt when the hash of its raw JSON, its metadata and its parametrization is not
+        in build_cache. Rebuilt AMs are added to build_cache.
+
+        Args:
+            build_cache (BuildCache): persistent cache of enriched AMs.
+            with_deleted_ams (bool = False):
+                has no effect, kept for compatibility: only AMs whose metadata state is VIGUEUR are enriched.
+            with_fake (bool = False): if True, fake AMs (whose id starts with FAKE) are included.
+            workers (Optional[int] = None): if not None, AMs to rebuild are enriched in a pool of `workers` processes.
+
+        Raises:
+            ValueError: in parallel mode, when the enrichment of an AM fails, with the id of the AM.
+
+        Returns:
+            Tuple[List[ArreteMinisteriel], BuildReport]:
+                enriched AMs, in the same order as build_enriched_ams, and the ids of rebuilt and reused AMs.
+        """
+        start = time.perf_counter()
+        tasks = self._load_enrichment_tasks(with_deleted_ams, with_fake)
+        keys = [build_key(*texts) for _, *texts in tasks]
+        entries = [build_cache.get(key) for key in keys]
+        tasks_to_build = [task for task, entry in zip(tasks, entries) if entry is None]
+        if workers is None:
+            built_entries = [_timed_enrich_and_add_parametrization_str(*texts) for _, *texts in tasks_to_build]
+        else:
+            built_entries = _run_in_process_pool(_timed_enrich_and_add_parametrization_str, tasks_to_build, workers)
+        new_entries = iter(built_entries)
+        report = BuildReport()
+        enriched_ams: List[ArreteMinisteriel] = []
+        for (am_id, *_), key, entry in zip(tasks, keys, entries):
+            if entry is None:
+                entry = next(new_entries)
+                build_cache.put(key, *entry)
+                report.rebuilt.append(am_id)
+            else:
+                report.reused.append(am_id)
+                report.time_saved += entry[1]
+            enriched_ams.append(_load_am_str(entry[0]))
+        report.duration = time.perf_counter() - start
+        return enriched_ams, report
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+CACHED_TABLES = ('am_metadata', 'parametrization', 'structured_am')
+
+
+@dataclass
+class CacheStats:
+    """Counters of a table cache.
+
+    Args:
+        hits (int): number of lookups served from the cache.
+        misses (int): number of lookups for which the key was not cached.
+        evictions (int): number of entries removed to respect the size limit.
+        expirations (int): number of entries removed because they were older than the TTL.
+        stale (int): number of entries removed because their version no longer matched the database.
+        invalidations (int): number of entries removed because the fetcher wrote the corresponding row.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    stale: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        nb_lookups = self.hits + self.misses
+        return self.hits / nb_lookups if nb_lookups else 0.0
+
+
+@dataclass
+class CacheEntry(Generic[T]):
+    value: T
+    version: Optional[int]
+    nb_bytes: int
+    created_at: float
+
+
+class LRUCache(Generic[T]):
+    """Thread-safe LRU cache bounded by the total size of its entries.
+
+    Args:
+        max_bytes (int):
+            maximal total size of cached entries. Least recently used entries are evicted first.
+        ttl (Optional[float] = None):
+            lifetime of an entry in seconds. If None, entries never expire.
+        clock (Callable[[], float] = time.monotonic):
+            clock used for expiration.
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if max_bytes < 0:
+            raise ValueError(f'max_bytes must be non negative, got {max_bytes}')
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: 'OrderedDict[str, CacheEntry[T]]' = OrderedDict()
+        self._nb_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nb_bytes(self) -> int:
+        return self._nb_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        self._nb_bytes -= self._entries.pop(key).nb_bytes
+
+    def get(self, key: str) -> Optional[CacheEntry[T]]:
+        """Return the entry associated with key, or None if absent or expired. Does not count hits."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if self.ttl is not None and self._clock() - entry.created_at > self.ttl:
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.stats.hits += 1
+
+    def mark_stale(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self.stats.stale += 1
+            self.stats.misses += 1
+
+    def put(self, key: str, value: T, version: Optional[int], nb_bytes: int) -> None:
+        """Store value, evicting least recently used entries if needed. Too large values are not cached."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nb_bytes > self.max_bytes:
+                return
+            while self._nb_bytes + nb_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+            self._entries[key] = CacheEntry(value, version, nb_bytes, self._clock())
+            self._nb_bytes += nb_bytes
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+            self._nb_bytes = 0
+
+
+class FetcherCache:
+    """In-process read-through cache for DataFetcher, with one LRU cache per table.
+
+    Cached objects are shared between callers and must be treated as read-only.
+
+    Args:
+        max_bytes (int = 256 MiB):
+            size limit of each table cache, measured on the stored JSON.
+        ttl (Optional[float] = None):
+            lifetime of cached entries in seconds. If None, entries never expire.
+        check_version (bool = True):
+            if True, the version of the row is read from the database before serving a cached
+            entry, so that rows written by other processes are never served stale. This costs one
+            cheap query but avoids transferring and decoding the row.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20, ttl: Optional[float] = None, check_version: bool = True):
+        self.check_version = check_version
+        self.tables: Dict[str, LRUCache[Any]] = {table: LRUCache(max_bytes, ttl) for table in CACHED_TABLES}
+
+    def configure_table(self, table: str, max_bytes: int, ttl: Optional[float] = None) -> None:
+        """Replace the cache of a table with an empty cache with specific limits."""
+        if table not in self.tables:
+            raise ValueError(f'Unknown table {table}, expecting one of {CACHED_TABLES}')
+        self.tables[table] = LRUCache(max_bytes, ttl)
+
+    def invalidate(self, table: str, key: str) -> None:
+        self.tables[table].invalidate(key)
+
+    def clear(self) -> None:
+        for cache in self.tables.values():
+            cache.clear()
+
+    def stats(self) -> Dict[str, CacheStats]:
+        return {table: cache.stats for table, cache in self.tables.items()}
@@ -0,0 +1,148 @@
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+PHASES = ('connect', 'execute', 'fetch', 'json_decode', 'model_construction')
+
+
+@dataclass
+class CallTimings:
+    """Measures of one DataFetcher call. Durations are in seconds.
+
+    Queries and decodings of nested calls (e.g. load_am_ids within load_id_to_am) are
+    accumulated in the outermost call.
+
+    Args:
+        operation (str): name of the DataFetcher method.
+        connect (float): time spent checking out connections from the pool.
+        execute (float): time spent running queries on the server.
+        fetch (float): time spent transferring rows to the client.
+        json_decode (float): time spent decompressing stored payloads and parsing JSON.
+        model_construction (float): time spent building models with from_dict.
+        total (float): duration of the call.
+        nb_queries (int): number of executed queries.
+        nb_rows (int): number of fetched rows.
+        nb_bytes (int): size of the fetched strings and binary values.
+    """
+
+    operation: str
+    connect: float = 0.0
+    execute: float = 0.0
+    fetch: float = 0.0
+    json_decode: float = 0.0
+    model_construction: float = 0.0
+    total: float = 0.0
+    nb_queries: int = 0
+    nb_rows: int = 0
+    nb_bytes: int = 0
+
+
+_METRICS = tuple(field_.name for field_ in fields(CallTimings) if field_.name != 'operation')
+
+
+class InstrumentationSink(ABC):
+    """Receives the measures of each instrumented DataFetcher call."""
+
+    @abstractmethod
+    def record(self, timings: CallTimings) -> None:
+        """Handle the measures of one call, once it is over."""
+
+
+class CallbackSink(InstrumentationSink):
+    def __init__(self, callback: Callable[[CallTimings], None]) -> None:
+        self.callback = callback
+
+    def record(self, timings: CallTimings) -> None:
+        self.callback(timings)
+
+
+class LoggingSink(InstrumentationSink):
+    """Logs one line per call.
+
+    Args:
+        logger (Optional[logging.Logger] = None): logger to use, defaults to the envinorma.data_fetcher logger.
+        level (int = logging.DEBUG): level of the log records.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        self.logger = logger or logging.getLogger('envinorma.data_fetcher')
+        self.level = level
+
+    def record(self, timings: CallTimings) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        phases = ' '.join(f'{phase}={getattr(timings, phase) * 1000:.2f}ms' for phase in PHASES)
+        self.logger.log(
+            self.level,
+            f'{timings.operation}: total={timings.total * 1000:.2f}ms {phases} queries={timings.nb_queries}'
+            f' rows={timings.nb_rows} bytes={timings.nb_bytes}',
+        )
+
+
+@dataclass
+class PercentileSummary:
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a non empty sorted list."""
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(values: List[float]) -> PercentileSummary:
+    if not values:
+        raise ValueError('Cannot summarize an empty list of values.')
+    sorted_values = sorted(values)
+    return PercentileSummary(
+        count=len(sorted_values),
+        mean=sum(sorted_values) / len(sorted_values),
+        p50=_percentile(sorted_values, 50),
+        p90=_percentile(sorted_values, 90),
+        p99=_percentile(sorted_values, 99),
+        max=sorted_values[-1],
+    )
+
+
+class HistogramRegistry(InstrumentationSink):
+    """Keeps the last measures of each operation in memory for percentile summaries.
+
+    Args:
+        max_samples (int = 10000): number of calls kept per operation. Older calls are dropped.
+    """
+
+    def __init__(self, max_samples: int = 10000) -> None:
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[Tuple[float, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: CallTimings) -> None:
+        sample = tuple(float(getattr(timings, metric)) for metric in _METRICS)
+        with self._lock:
+            if timings.operation not in self._samples:
+                self._samples[timings.operation] = deque(maxlen=self.max_samples)
+            self._samples[timings.operation].append(sample)
+
+    def summary(self) -> Dict[str, Dict[str, PercentileSummary]]:
+        """Return, for each operation, the summary of each metric (phases, total, nb_queries, nb_rows, nb_bytes)."""
+        with self._lock:
+            samples = {operation: list(operation_samples) for operation, operation_samples in self._samples.items()}
+        return {
+            operation: {
+                metric: summarize([sample[i] for sample in operation_samples]) for i, metric in enumerate(_METRICS)
+            }
+            for operation, operation_samples in samples.items()
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
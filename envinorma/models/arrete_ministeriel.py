@@ -1,6 +1,6 @@
 import warnings
 from copy import copy
-from dataclasses import asdict, dataclass, field, fields
+from dataclasses import dataclass, field, fields
 from datetime import date
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -16,7 +16,7 @@ from .helpers import (
     transfer_ids_based_on_other_am,
 )
 from .lost_topic import LostTopic
-from .structured_text import Annotations, EnrichedString, StructuredText
+from .structured_text import Annotations, EnrichedString, LazyStructuredText, StructuredText
 
 
 def _is_probably_cid(candidate: str) -> bool:
@@ -91,19 +91,37 @@ class ArreteMinisteriel:
             warnings.warn(f'AM id does not look like a CID : {self.id} (title={self.title.text})')
 
     def to_dict(self) -> Dict[str, Any]:
-        res = asdict(self)
-        if res['date_of_signature']:
-            res['date_of_signature'] = str(res['date_of_signature'])
-        res['title'] = self.title.to_dict()
-        res['visa'] = [vi.to_dict() for vi in self.visa]
-        res['sections'] = [section.to_dict() for section in self.sections]
-        res['classements'] = [cl.to_dict() for cl in self.classements]
-        res['classements_with_alineas'] = [cl.to_dict() for cl in self.classements_with_alineas]
-        res['applicability'] = self.applicability.to_dict()
-        return res
+        # Same keys, in the same order, as dataclasses.asdict, without its deep copy (see StructuredText.to_dict).
+        return {
+            'title': self.title.to_dict(),
+            'sections': [section.to_dict() for section in self.sections],
+            'visa': [vi.to_dict() for vi in self.visa],
+            'date_of_signature': str(self.date_of_signature) if self.date_of_signature else None,
+            'aida_url': self.aida_url,
+            'legifrance_url': self.legifrance_url,
+            'classements': [cl.to_dict() for cl in self.classements],
+            'classements_with_alineas': [cl.to_dict() for cl in self.classements_with_alineas],
+            'id': self.id,
+            'is_transverse': self.is_transverse,
+            'nickname': self.nickname,
+            'applicability': self.applicability.to_dict(),
+            'orphan_titles': (
+                {section_id: list(titles) for section_id, titles in self.orphan_titles.items()}
+                if self.orphan_titles is not None
+                else None
+            ),
+        }
 
     @classmethod
-    def from_dict(cls, dict_: Dict[str, Any]) -> 'ArreteMinisteriel':
+    def from_dict(cls, dict_: Dict[str, Any], lazy: bool = False) -> 'ArreteMinisteriel':
+        """Build an AM from its serialization.
+
+        Args:
+            dict_ (Dict[str, Any]): output of to_dict.
+            lazy (bool = False):
+                if True, sections are LazyStructuredTexts, built on first access. Reading the title,
+                classements or any other field than sections then costs no section construction.
+        """
         dict_ = dict_.copy()
         if 'short_title' in dict_:
             del dict_['short_title']
@@ -111,7 +129,8 @@ class ArreteMinisteriel:
         dict_['date_of_signature'] = (
             date.fromisoformat(dict_['date_of_signature']) if dict_.get('date_of_signature') else None
         )
-        dict_['sections'] = [StructuredText.from_dict(sec) for sec in dict_['sections']]
+        section_builder = LazyStructuredText.from_raw if lazy else StructuredText.from_dict
+        dict_['sections'] = [section_builder(sec) for sec in dict_['sections']]
         dict_['visa'] = [EnrichedString.from_dict(vu) for vu in dict_['visa']]
         classements = [Classement.from_dict(cl) for cl in dict_.get('classements') or []]
         dict_['classements'] = sorted(classements, key=lambda x: x.regime.value)
@@ -0,0 +1,227 @@
+"""Compact binary encoding of the output of to_dict methods, in the spirit of MessagePack.
+
+A document holds a string table, a parameter table and the encoded tree:
+
+    magic (b'ENVB') | format version (1 byte)
+    varint: number of strings | for each string: varint byte length, UTF-8 bytes
+    varint: number of parameters | for each parameter: encoded value
+    encoded root value
+
+Every string (dict keys included) is stored once in the string table and referenced by its index.
+Dicts found under the key 'parameter' (the parameters of conditions) are stored once in the
+parameter table. On load, each string is decoded once and each parameter dict is built once, so
+repeated values are shared.
+
+Use it through envinorma.models.codec:
+    >>> payload = encode_am(am, BinaryCodec())
+    >>> decode_am(payload, BinaryCodec()) == am
+    True
+"""
+import struct
+from typing import Any, Dict, List, Tuple, Union
+
+from envinorma.models.codec import ModelCodec
+
+MAGIC = b'ENVB'
+FORMAT_VERSION = 1
+
+_NONE = 0x00
+_FALSE = 0x01
+_TRUE = 0x02
+_INT = 0x03
+_FLOAT = 0x04
+_STR = 0x05
+_LIST = 0x06
+_DICT = 0x07
+_PARAMETER = 0x08
+# Tags from 0x80 are non negative integers smaller than 128, stored in the tag itself.
+_FIXINT = 0x80
+_PARAMETER_KEY = 'parameter'
+_FLOAT_STRUCT = struct.Struct('<d')
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _is_flat(dict_: Dict[str, Any]) -> bool:
+    return all(isinstance(value, (str, int, float, type(None))) for value in dict_.values())
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.strings: Dict[str, int] = {}
+        self.parameters: Dict[Tuple, int] = {}
+        self.parameters_out = bytearray()
+
+    def _string_index(self, str_: str) -> int:
+        index = self.strings.get(str_)
+        if index is None:
+            index = self.strings[str_] = len(self.strings)
+        return index
+
+    def _write_parameter(self, out: bytearray, parameter: Dict[str, Any]) -> None:
+        # Types are part of the key, as 1 == 1.0 == True but they are not encoded alike.
+        key = tuple((name, type(value), value) for name, value in parameter.items())
+        index = self.parameters.get(key)
+        if index is None:
+            index = self.parameters[key] = len(self.parameters)
+            self.write(self.parameters_out, parameter)
+        out.append(_PARAMETER)
+        _write_varint(out, index)
+
+    def write(self, out: bytearray, value: Any) -> None:
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, str):
+            out.append(_STR)
+            _write_varint(out, self._string_index(value))
+        elif isinstance(value, int):
+            if 0 <= value < 0x80:
+                out.append(_FIXINT | value)
+            else:
+                out.append(_INT)
+                _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)  # zigzag
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out.extend(_FLOAT_STRUCT.pack(value))
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for element in value:
+                self.write(out, element)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, element in value.items():
+                if not isinstance(key, str):
+                    raise ValueError(f'Only string keys are supported, got {key!r}')
+                _write_varint(out, self._string_index(key))
+                if key == _PARAMETER_KEY and isinstance(element, dict) and _is_flat(element):
+                    self._write_parameter(out, element)
+                else:
+                    self.write(out, element)
+        else:
+            raise ValueError(f'Cannot encode value of type {type(value)}')
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a tree of dicts, lists, strings, numbers, booleans and None."""
+    encoder = _Encoder()
+    body = bytearray()
+    encoder.write(body, obj)
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _write_varint(out, len(encoder.strings))
+    for str_ in encoder.strings:
+        data = str_.encode('utf-8')
+        _write_varint(out, len(data))
+        out.extend(data)
+    _write_varint(out, len(encoder.parameters))
+    out.extend(encoder.parameters_out)
+    out.extend(body)
+    return bytes(out)
+
+
+class _Decoder:
+    def __init__(self, payload: bytes) -> None:
+        self.payload = payload
+        self.position = 0
+        self.strings: List[str] = []
+        self.parameters: List[Any] = []
+
+    def read_varint(self) -> int:
+        payload, position = self.payload, self.position
+        result = shift = 0
+        while True:
+            byte = payload[position]
+            position += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.position = position
+                return result
+            shift += 7
+
+    def _read_index(self) -> int:
+        # Fast path of read_varint for indices smaller than 128.
+        byte = self.payload[self.position]
+        if byte < 0x80:
+            self.position += 1
+            return byte
+        return self.read_varint()
+
+    def read(self) -> Any:  # noqa: C901 - tags are tested by decreasing frequency
+        tag = self.payload[self.position]
+        self.position += 1
+        if tag == _STR:
+            return self.strings[self._read_index()]
+        if tag == _DICT:
+            strings, read = self.strings, self.read
+            return {strings[self._read_index()]: read() for _ in range(self._read_index())}
+        if tag == _LIST:
+            read = self.read
+            return [read() for _ in range(self._read_index())]
+        if tag >= _FIXINT:
+            return tag - _FIXINT
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _PARAMETER:
+            return self.parameters[self._read_index()]
+        if tag == _INT:
+            value = self.read_varint()
+            return value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if tag == _FLOAT:
+            (float_,) = _FLOAT_STRUCT.unpack_from(self.payload, self.position)
+            self.position += _FLOAT_STRUCT.size
+            return float_
+        raise ValueError(f'Unknown tag {tag} at position {self.position - 1}')
+
+    def read_string(self) -> str:
+        length = self.read_varint()
+        str_ = bytes(self.payload[self.position : self.position + length]).decode('utf-8')
+        self.position += length
+        return str_
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """Decode a document written by dumps.
+
+    Raises:
+        ValueError: when payload is not a document of a supported format version, or is truncated.
+    """
+    if isinstance(payload, str) or len(payload) <= len(MAGIC) or payload[: len(MAGIC)] != MAGIC:
+        raise ValueError('Payload is not a binary envinorma document.')
+    if payload[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f'Unsupported format version {payload[len(MAGIC)]}, expecting {FORMAT_VERSION}.')
+    decoder = _Decoder(payload)
+    decoder.position = len(MAGIC) + 1
+    try:
+        decoder.strings = [decoder.read_string() for _ in range(decoder.read_varint())]
+        for _ in range(decoder.read_varint()):
+            decoder.parameters.append(decoder.read())
+        return decoder.read()
+    except (IndexError, struct.error) as exc:
+        raise ValueError(f'Truncated or corrupted payload, {len(payload)} bytes.') from exc
+
+
+class BinaryCodec(ModelCodec):
+    """ModelCodec writing the binary format of this module, for envinorma.models.codec functions."""
+
+    name = 'binary'
+
+    def dumps(self, obj: Any) -> bytes:
+        return dumps(obj)
+
+    def loads(self, payload: Union[bytes, str]) -> Any:
+        return loads(payload)
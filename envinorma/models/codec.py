@@ -0,0 +1,111 @@
+"""Encoding of models to JSON bytes, and back.
+
+Documents are the JSON serialization of the to_dict methods: they can be read with json.loads and
+from_dict, and documents written by json.dumps can be decoded here. JSON is encoded and parsed by
+orjson when it is installed (`pip install envinorma[fast]`), and by the json module otherwise.
+
+Example:
+    >>> payload = encode_am(am)
+    >>> decode_am(payload) == am
+    True
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Union
+
+from envinorma.models.am_metadata import AMMetadata
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.parametrization.apply_parameter_values import AMWithApplicability
+from envinorma.parametrization.models.parametrization import Parametrization
+
+try:
+    import orjson  # noqa: WPS433 - optional dependency
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+class ModelCodec(ABC):
+    """Encodes the output of to_dict methods in bytes, and decodes it back."""
+
+    name: str = ''
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj, a JSON-compatible object as returned by to_dict methods."""
+
+    @abstractmethod
+    def loads(self, payload: Union[bytes, str]) -> Any:
+        """Decode a payload built by dumps."""
+
+
+class JSONCodec(ModelCodec):
+    """Encodes JSON-compatible objects in UTF-8 JSON bytes with the json module."""
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, payload: Union[bytes, str]) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonCodec(JSONCodec):
+    """Same as JSONCodec, with orjson.
+
+    Raises:
+        ImportError: when orjson is not installed.
+    """
+
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires orjson: pip install envinorma[fast]')
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, payload: Union[bytes, str]) -> Any:
+        return orjson.loads(payload)
+
+
+_DEFAULT_CODEC: ModelCodec = OrjsonCodec() if orjson is not None else JSONCodec()
+
+
+def default_codec() -> ModelCodec:
+    """OrjsonCodec if orjson is installed, JSONCodec otherwise."""
+    return _DEFAULT_CODEC
+
+
+def encode_am(am: ArreteMinisteriel, codec: Optional[ModelCodec] = None) -> bytes:
+    return (codec or _DEFAULT_CODEC).dumps(am.to_dict())
+
+
+def decode_am(payload: Union[bytes, str], codec: Optional[ModelCodec] = None, lazy: bool = False) -> ArreteMinisteriel:
+    """Decode an AM, with lazy sections if lazy is True (see ArreteMinisteriel.from_dict)."""
+    return ArreteMinisteriel.from_dict((codec or _DEFAULT_CODEC).loads(payload), lazy)
+
+
+def encode_parametrization(parametrization: Parametrization, codec: Optional[ModelCodec] = None) -> bytes:
+    return (codec or _DEFAULT_CODEC).dumps(parametrization.to_dict())
+
+
+def decode_parametrization(payload: Union[bytes, str], codec: Optional[ModelCodec] = None) -> Parametrization:
+    return Parametrization.from_dict((codec or _DEFAULT_CODEC).loads(payload))
+
+
+def encode_am_with_applicability(am: AMWithApplicability, codec: Optional[ModelCodec] = None) -> bytes:
+    return (codec or _DEFAULT_CODEC).dumps(am.to_dict())
+
+
+def decode_am_with_applicability(payload: Union[bytes, str], codec: Optional[ModelCodec] = None) -> AMWithApplicability:
+    return AMWithApplicability.from_dict((codec or _DEFAULT_CODEC).loads(payload))
+
+
+def encode_am_metadata(metadata: AMMetadata, codec: Optional[ModelCodec] = None) -> bytes:
+    return (codec or _DEFAULT_CODEC).dumps(metadata.to_dict())
+
+
+def decode_am_metadata(payload: Union[bytes, str], codec: Optional[ModelCodec] = None) -> AMMetadata:
+    return AMMetadata.from_dict((codec or _DEFAULT_CODEC).loads(payload))
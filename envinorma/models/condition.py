@@ -1,6 +1,9 @@
-from dataclasses import asdict, dataclass
+import weakref
+from dataclasses import asdict, dataclass, fields
 from enum import Enum
-from typing import Any, Dict, FrozenSet, List, Literal, Union
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Literal, Union
+
+from envinorma.utils import cache_hash
 
 from .parameter import Parameter, dump_parameter_value, load_parameter_value, parameter_value_to_str
 
@@ -15,6 +18,11 @@ class ConditionType(Enum):
 
 
 def load_condition(dict_: Dict[str, Any]) -> 'Condition':
+    """Load a condition from its serialization, as its interned instance (see intern_condition)."""
+    return intern_condition(_load_condition(dict_))
+
+
+def _load_condition(dict_: Dict[str, Any]) -> 'Condition':
     type_ = ConditionType(dict_['type'])
     if type_ == ConditionType.AND:
         return AndCondition.from_dict(dict_)
@@ -35,6 +43,7 @@ def _sort_conditions(conditions: FrozenSet['Condition']) -> List['Condition']:
     return sorted(conditions, key=lambda x: str(x))
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class AndCondition:
     conditions: FrozenSet['Condition']
@@ -57,7 +66,7 @@ class AndCondition:
             cd.check()
 
     def is_satisfied(self, parameter_values: Dict[Parameter, Any]) -> bool:
-        return all([cd.is_satisfied(parameter_values) for cd in self.conditions])
+        return all(cd.is_satisfied(parameter_values) for cd in self.conditions)
 
     def parameters(self) -> List[Parameter]:
         return [param for cd in self.conditions for param in cd.parameters()]
@@ -66,6 +75,7 @@ class AndCondition:
         return '(' + ') and ('.join([cd.to_str() for cd in self.conditions]) + ')'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class OrCondition:
     conditions: FrozenSet['Condition']
@@ -88,7 +98,7 @@ class OrCondition:
             cd.check()
 
     def is_satisfied(self, parameter_values: Dict[Parameter, Any]) -> bool:
-        return any([cd.is_satisfied(parameter_values) for cd in self.conditions])
+        return any(cd.is_satisfied(parameter_values) for cd in self.conditions)
 
     def parameters(self) -> List[Parameter]:
         return [param for cd in self.conditions for param in cd.parameters()]
@@ -97,6 +107,7 @@ class OrCondition:
         return '(' + ') or ('.join([cd.to_str() for cd in self.conditions]) + ')'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class Littler:
     parameter: Parameter
@@ -134,6 +145,7 @@ class Littler:
         return f'{self.parameter.id} {comp} {parameter_value_to_str(self.target)}'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class Greater:
     parameter: Parameter
@@ -171,6 +183,7 @@ class Greater:
         return f'{self.parameter.id} {comp} {parameter_value_to_str(self.target)}'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class Equal:
     parameter: Parameter
@@ -205,6 +218,7 @@ class Equal:
         return f'{self.parameter.id} == {parameter_value_to_str(self.target)}'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class Range:
     parameter: Parameter
@@ -277,6 +291,93 @@ MonoCondition = Union[Equal, Greater, Littler]
 
 MergeType = Literal['AND', 'OR']
 
+# Weak values: a condition leaves the table once it is no longer referenced.
+_INTERNED_CONDITIONS: 'weakref.WeakValueDictionary[Hashable, Condition]' = weakref.WeakValueDictionary()
+
+
+def _interning_key(condition: Condition) -> Hashable:
+    # Equal conditions may differ by the types of their targets (1, 1.0 and True are equal),
+    # which would change their serialization: types are part of the key. The key is built from
+    # field values, since a key referencing the condition would keep it in _INTERNED_CONDITIONS.
+    if isinstance(condition, MergeConditions):
+        return (condition.type, frozenset(_interning_key(cd) for cd in condition.conditions))
+    values = tuple(getattr(condition, field_.name) for field_ in fields(condition))
+    return (type(condition), values, tuple(type(value) for value in values))
+
+
+def intern_condition(condition: Condition) -> Condition:
+    """Canonical instance of condition, shared by all equal conditions loaded with load_condition.
+
+    Since load_condition interns subconditions first, equal condition trees loaded anywhere in
+    the corpus are one instance, and their hashes are computed once. Interned conditions are
+    weakly referenced: they are dropped once no loaded model uses them.
+    """
+    return _INTERNED_CONDITIONS.setdefault(_interning_key(condition), condition)
+
+
+CompiledCondition = Callable[[Dict[Parameter, Any]], bool]
+
+
+class _ConditionCompiler:
+    # Builds a Python expression evaluating a condition tree, with the parameters and targets of
+    # the leaves passed as constants of the generated function.
+    def __init__(self) -> None:
+        self.constants: Dict[str, Any] = {}
+
+    def constant(self, value: Any) -> str:
+        name = f'_c{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def expression(self, condition: Condition) -> str:
+        if isinstance(condition, MergeConditions):
+            operator, empty_value = (' and ', 'True') if isinstance(condition, AndCondition) else (' or ', 'False')
+            return '(' + (operator.join(self.expression(cd) for cd in condition.conditions) or empty_value) + ')'
+        parameter = self.constant(condition.parameter)
+        value = f'values[{parameter}]'
+        if isinstance(condition, Equal):
+            comparison = f'{value} == {self.constant(condition.target)}'
+        elif isinstance(condition, Greater):
+            comparison = f'{value} {">" if condition.strict else ">="} {self.constant(condition.target)}'
+        elif isinstance(condition, Littler):
+            comparison = f'{value} {"<" if condition.strict else "<="} {self.constant(condition.target)}'
+        elif isinstance(condition, Range):
+            left, right = self.constant(condition.left), self.constant(condition.right)
+            left_operator = '<' if condition.left_strict else '<='
+            right_operator = '<' if condition.right_strict else '<='
+            comparison = f'{left} {left_operator} {value} {right_operator} {right}'
+        else:
+            raise ValueError(f'Unknown condition type {type(condition)}')
+        return f'({parameter} in values and {comparison})'
+
+    def compile(self, condition: Condition) -> CompiledCondition:
+        source = f'def _compiled_condition(values):\n    return {self.expression(condition)}\n'
+        namespace = dict(self.constants)
+        exec(compile(source, '<compiled condition>', 'exec'), namespace)  # noqa: S102 - source has no user input
+        return namespace['_compiled_condition']
+
+
+def compile_condition(condition: Condition) -> CompiledCondition:
+    """Compile condition into a function equivalent to condition.is_satisfied.
+
+    The condition tree is turned once into a single short-circuiting boolean expression, whose
+    function is memoized on the condition: compiling an interned condition again is a lookup.
+
+    Example:
+        >>> compile_condition(Equal(ParameterEnum.REGIME.value, Regime.A))({ParameterEnum.REGIME.value: Regime.A})
+        True
+
+    Args:
+        condition (Condition): condition to compile.
+
+    Returns:
+        CompiledCondition: function of the parameter values returning whether condition is satisfied.
+    """
+    compiled = condition.__dict__.get('_compiled')
+    if compiled is None:
+        compiled = condition.__dict__['_compiled'] = _ConditionCompiler().compile(condition)
+    return compiled
+
 
 def ensure_mono_condition(condition: Condition) -> MonoCondition:
     if isinstance(condition, MonoConditions):
@@ -1,7 +1,11 @@
+import weakref
 from dataclasses import asdict, dataclass
 from datetime import date, datetime
 from enum import Enum
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from envinorma.utils import cache_hash
 
 from .regime import Regime
 
@@ -18,6 +22,7 @@ class ParameterType(Enum):
         return f'ParameterType("{self.value}")'
 
 
+@cache_hash
 @dataclass(eq=True, frozen=True)
 class Parameter:
     id: str
@@ -30,7 +35,7 @@ class Parameter:
 
     @classmethod
     def from_dict(cls, dict_: Dict[str, Any]) -> 'Parameter':
-        return Parameter(dict_['id'], ParameterType(dict_['type']))
+        return intern_parameter(Parameter(dict_['id'], ParameterType(dict_['type'])))
 
 
 class ParameterEnum(Enum):
@@ -47,6 +52,21 @@ class ParameterEnum(Enum):
         return f'ParameterEnum("{self.value}")'
 
 
+# Weak values, keyed by fields: a parameter leaves the table once it is no longer referenced.
+# Parameters of ParameterEnum are kept alive by the enum.
+_INTERNED_PARAMETERS: 'weakref.WeakValueDictionary[Tuple[str, ParameterType], Parameter]' = weakref.WeakValueDictionary(
+    {(parameter.value.id, parameter.value.type): parameter.value for parameter in ParameterEnum}
+)
+
+
+def intern_parameter(parameter: Parameter) -> Parameter:
+    """Canonical instance of parameter, shared by all equal parameters loaded with Parameter.from_dict.
+
+    Parameters of ParameterEnum are their own canonical instances.
+    """
+    return _INTERNED_PARAMETERS.setdefault((parameter.id, parameter.type), parameter)
+
+
 def dump_parameter_value(value: Any, type_: ParameterType) -> Any:
     if type_ == ParameterType.DATE:
         if isinstance(value, datetime):
@@ -57,13 +77,17 @@ def dump_parameter_value(value: Any, type_: ParameterType) -> Any:
     return value
 
 
+@lru_cache(maxsize=4096)
+def _load_date(json_value: Any) -> date:
+    # Memoized so that equal dates of the loaded conditions are one shared instance.
+    if isinstance(json_value, int):
+        return datetime.fromtimestamp(json_value).date()
+    return date.fromisoformat(json_value)
+
+
 def load_parameter_value(json_value: Any, type_: ParameterType) -> Any:
     if type_ == ParameterType.DATE:
-        if isinstance(json_value, int):
-            date_ = datetime.fromtimestamp(json_value).date()
-        else:
-            date_ = date.fromisoformat(json_value)
-        return date_
+        return _load_date(json_value)
     if type_ == ParameterType.REGIME:
         return Regime(json_value)
     return json_value
@@ -1,29 +1,28 @@
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Any, Dict, List, Optional, Union
 
 from envinorma.topics.patterns import TopicName
-from envinorma.utils import random_id
+from envinorma.utils import add_slots, random_id
 
 from .condition import Condition, load_condition
 from .helpers.condition_satisfiability import could_be_simultaneously_satisfied_with
 from .text_elements import EnrichedString
 
 
+@add_slots
 @dataclass
 class Annotations:
     topic: Optional[TopicName] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        res = asdict(self)
-        if self.topic:
-            res['topic'] = self.topic.value
-        return res
+        return {'topic': self.topic.value if self.topic else None}
 
     @classmethod
     def from_dict(cls, dict_: Dict) -> 'Annotations':
         return cls(topic=TopicName(dict_['topic']) if dict_['topic'] else None)
 
 
+@add_slots
 @dataclass
 class Applicability:
     """Describes the applicability of a StructuredText.
@@ -56,10 +55,12 @@ class Applicability:
                 raise ValueError('when modified is True, previous_version must be provided.')
 
     def to_dict(self) -> Dict[str, Any]:
-        dict_ = asdict(self)
-        if self.previous_version:
-            dict_['previous_version'] = self.previous_version.to_dict()
-        return dict_
+        return {
+            'active': self.active,
+            'modified': self.modified,
+            'warnings': list(self.warnings),
+            'previous_version': self.previous_version.to_dict() if self.previous_version else None,
+        }
 
     @classmethod
     def from_dict(cls, dict_: Dict) -> 'Applicability':
@@ -70,6 +71,7 @@ class Applicability:
         return cls(**dict_)
 
 
+@add_slots
 @dataclass
 class PotentialInapplicability:
     condition: Condition
@@ -126,6 +128,7 @@ def _alineas_content(strings: List[EnrichedString]) -> List[str]:
     return [_alinea_content(str_) for str_ in strings]
 
 
+@add_slots
 @dataclass
 class PotentialModification:
     condition: Condition
@@ -174,6 +177,7 @@ class PotentialModification:
 InapplicabilityOrModification = Union[PotentialInapplicability, PotentialModification]
 
 
+@add_slots
 @dataclass
 class SectionParametrization:
     potential_inapplicabilities: List[PotentialInapplicability] = field(default_factory=list)
@@ -181,10 +185,11 @@ class SectionParametrization:
     warnings: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
-        dict_ = asdict(self)
-        dict_['potential_inapplicabilities'] = [p.to_dict() for p in self.potential_inapplicabilities]
-        dict_['potential_modifications'] = [p.to_dict() for p in self.potential_modifications]
-        return dict_
+        return {
+            'potential_inapplicabilities': [p.to_dict() for p in self.potential_inapplicabilities],
+            'potential_modifications': [p.to_dict() for p in self.potential_modifications],
+            'warnings': list(self.warnings),
+        }
 
     @classmethod
     def from_dict(cls, dict_: Dict) -> 'SectionParametrization':
@@ -198,6 +203,7 @@ class SectionParametrization:
         return cls(**dict_)
 
 
+@add_slots
 @dataclass
 class Reference:
     nb: str
@@ -214,6 +220,7 @@ class Reference:
         return cls(**dict_)
 
 
+@add_slots
 @dataclass
 class StructuredText:
     """Section of a text. This data structure can contain sections itself.
@@ -249,29 +256,42 @@ class StructuredText:
             raise TypeError
 
     def to_dict(self) -> Dict[str, Any]:
-        res = asdict(self)
-        res['title'] = self.title.to_dict()
-        res['outer_alineas'] = [al.to_dict() for al in self.outer_alineas]
-        res['sections'] = [se.to_dict() for se in self.sections]
-        res['applicability'] = self.applicability.to_dict() if self.applicability else None
-        res['annotations'] = self.annotations.to_dict() if self.annotations else None
-        res['parametrization'] = self.parametrization.to_dict()
-        res['reference'] = self.reference.to_dict() if self.reference else None
-        return res
+        # Fields are serialized one by one, in their order of declaration: dataclasses.asdict would
+        # deep copy the whole subtree before it is serialized again by the to_dict of each field.
+        return {
+            'title': self.title.to_dict(),
+            'outer_alineas': [al.to_dict() for al in self.outer_alineas],
+            'sections': [se.to_dict() for se in self.sections],
+            'applicability': self.applicability.to_dict() if self.applicability else None,
+            'reference': self.reference.to_dict() if self.reference else None,
+            'annotations': self.annotations.to_dict() if self.annotations else None,
+            'id': self.id,
+            'parametrization': self.parametrization.to_dict(),
+        }
 
     @classmethod
-    def from_dict(cls, dict_: Dict[str, Any]) -> 'StructuredText':
+    def from_dict(cls, dict_: Dict[str, Any], lazy: bool = False) -> 'StructuredText':
+        """Build a StructuredText from its serialization.
+
+        Args:
+            dict_ (Dict[str, Any]): output of to_dict.
+            lazy (bool = False): if True, subsections are LazyStructuredTexts.
+        """
         return cls(
             title=EnrichedString.from_dict(dict_['title']),
             outer_alineas=[EnrichedString.from_dict(al) for al in dict_['outer_alineas']],
-            sections=[StructuredText.from_dict(sec) for sec in dict_['sections']],
+            sections=[
+                LazyStructuredText.from_raw(sec) if lazy else StructuredText.from_dict(sec) for sec in dict_['sections']
+            ],
             applicability=Applicability.from_dict(dict_['applicability']) if dict_.get('applicability') else None,
             reference=Reference.from_dict(dict_['reference']) if dict_.get('reference') else None,
             annotations=Annotations.from_dict(dict_['annotations']) if dict_.get('annotations') else None,
             id=dict_['id'] if 'id' in dict_ else random_id(),
-            parametrization=SectionParametrization.from_dict(dict_['parametrization'])
-            if dict_.get('parametrization')
-            else SectionParametrization(),
+            parametrization=(
+                SectionParametrization.from_dict(dict_['parametrization'])
+                if dict_.get('parametrization')
+                else SectionParametrization()
+            ),
         )
 
     def text_lines(self, level: int = 0) -> List[str]:
@@ -301,3 +321,44 @@ class StructuredText:
             *self.parametrization.potential_modifications,
         ]
         return all([elts[i].is_compatible_with(elts[j]) for i in range(len(elts) - 1) for j in range(i + 1, len(elts))])
+
+
+_STRUCTURED_TEXT_FIELDS = frozenset(field_.name for field_ in fields(StructuredText))
+
+
+class LazyStructuredText(StructuredText):
+    """StructuredText kept as its serialization until one of its fields other than id is read.
+
+    On first access, the section is built with StructuredText.from_dict(lazy=True): its own fields
+    are built and memoized, its subsections stay lazy. A LazyStructuredText behaves like the
+    StructuredText it stands for, including equality, copies and pickling.
+    """
+
+    __slots__ = ('_raw',)
+    _raw: Dict[str, Any]
+
+    @classmethod
+    def from_raw(cls, dict_: Dict[str, Any]) -> 'LazyStructuredText':
+        text = cls.__new__(cls)
+        text._raw = dict_
+        text.id = dict_['id'] if 'id' in dict_ else random_id()
+        return text
+
+    @property
+    def is_materialized(self) -> bool:
+        return not hasattr(self, '_raw')
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for empty slots, i.e. fields of a section not materialized yet.
+        if name not in _STRUCTURED_TEXT_FIELDS or self.is_materialized:
+            raise AttributeError(name)
+        text = StructuredText.from_dict(self._raw, lazy=True)
+        for field_ in _STRUCTURED_TEXT_FIELDS - {'id'}:
+            setattr(self, field_, getattr(text, field_))
+        del self._raw
+        return getattr(self, name)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StructuredText):
+            return NotImplemented
+        return all(getattr(self, field_) == getattr(other, field_) for field_ in _STRUCTURED_TEXT_FIELDS)
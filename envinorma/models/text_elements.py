@@ -3,7 +3,10 @@ from dataclasses import asdict, dataclass, field
 from string import ascii_letters
 from typing import Any, Dict, List, Optional, Union
 
+from envinorma.utils import add_slots
 
+
+@add_slots
 @dataclass
 class Link:
     target: str
@@ -15,7 +18,11 @@ class Link:
         dict_ = dict_.copy()
         return cls(**dict_)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {'target': self.target, 'position': self.position, 'content_size': self.content_size}
+
 
+@add_slots
 @dataclass
 class Cell:
     content: 'EnrichedString'
@@ -46,6 +53,7 @@ def _cells_to_html(cells: List[Cell], is_header: bool, with_links: bool = False)
     return ''.join([cell.to_html(is_header, with_links) for cell in cells])
 
 
+@add_slots
 @dataclass
 class Row:
     cells: List[Cell]
@@ -69,6 +77,7 @@ def _rows_to_html(rows: List[Row], with_links: bool = False) -> str:
     return ''.join([row.to_html(with_links) for row in rows])
 
 
+@add_slots
 @dataclass
 class Table:
     rows: List[Row]
@@ -93,6 +102,7 @@ def _split_html_in_lines(html: str) -> List[str]:
     return [x.strip() for x in html.split('\n')]
 
 
+@add_slots
 @dataclass
 class EnrichedString:
     """Model for enriched strings.
@@ -128,14 +138,13 @@ class EnrichedString:
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        dict_ = asdict(self)
-        dict_['table'] = self.table.to_dict() if self.table else None
-        if not dict_['table']:
-            del dict_['table']
-        if not self.links:
-            del dict_['links']
-        if not self.inactive:
-            del dict_['inactive']
+        dict_: Dict[str, Any] = {'text': self.text}
+        if self.links:
+            dict_['links'] = [link.to_dict() for link in self.links]
+        if self.table:
+            dict_['table'] = self.table.to_dict()
+        if self.inactive:
+            dict_['inactive'] = self.inactive
         return dict_
 
     def text_lines(self) -> List[str]:
@@ -164,11 +173,13 @@ def _enriched_text_to_html(str_: EnrichedString, with_links: bool = False) -> st
     return text.replace('\n', '<br/>')
 
 
+@add_slots
 @dataclass(eq=True)
 class Linebreak:
     pass
 
 
+@add_slots
 @dataclass
 class Title:
     text: str
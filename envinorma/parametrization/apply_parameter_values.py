@@ -1,10 +1,20 @@
 from copy import copy
 from dataclasses import dataclass, replace
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from envinorma.models import ArreteMinisteriel, Regime
 from envinorma.models.arrete_ministeriel import AMApplicability
-from envinorma.models.condition import AndCondition, Condition, Greater, Littler, OrCondition, Range
+from envinorma.models.condition import (
+    AndCondition,
+    Condition,
+    Greater,
+    LeafCondition,
+    Littler,
+    MergeConditions,
+    OrCondition,
+    Range,
+    compile_condition,
+)
 from envinorma.models.parameter import Parameter, ParameterEnum
 from envinorma.models.structured_text import (
     Applicability,
@@ -63,7 +73,7 @@ def _keep_satisfied_conditions(
     satisfied: List[PotentialInapplicability] = []
     warnings: List[str] = []
     for inapplicable_section in inapplicable_sections:
-        if inapplicable_section.condition.is_satisfied(parameter_values):
+        if compile_condition(inapplicable_section.condition)(parameter_values):
             satisfied.append(inapplicable_section)
         else:
             warnings = _compute_warnings(inapplicable_section, parameter_values, whole_text)
@@ -76,7 +86,7 @@ def _keep_satisfied_mofications(
     satisfied: List[PotentialModification] = []
     warnings: List[str] = []
     for alt in alternative_sections:
-        if alt.condition.is_satisfied(parameter_values):
+        if compile_condition(alt.condition)(parameter_values):
             satisfied.append(alt)
         else:
             warnings = _compute_warnings(alt, parameter_values, False)
@@ -190,9 +200,9 @@ def _compute_whole_text_applicability(
     condition = applicability.condition_of_inapplicability
     if not condition:
         return True, applicability.warnings
-    if condition.is_satisfied(parameter_values):
+    if compile_condition(condition)(parameter_values):
         return False, [_generate_whole_text_reason_inactive(condition, parameter_values)]
-    warnings = applicability.warnings
+    warnings = list(applicability.warnings)
     if _has_undefined_parameters(condition, parameter_values):
         warnings.append(generate_warning_missing_value(condition, parameter_values, None, False, True))
     return True, warnings
@@ -246,3 +256,101 @@ def build_am_with_applicability(
     return AMWithApplicability(
         arrete=apply_parameter_values_to_am(am, parameter_values), applicable=applicable, warnings=warnings
     )
+
+
+@dataclass
+class AMsWithApplicability:
+    """Versions of an AM for a list of installations, built by build_ams_with_applicability.
+
+    Installations with the same decision signature share one AMWithApplicability: results must not
+    be modified in place.
+
+    Args:
+        versions (List[AMWithApplicability]):
+            distinct versions of the AM, in the order of their first installation.
+        version_ranks (List[int]):
+            for each installation, the rank of its version in versions.
+    """
+
+    versions: List[AMWithApplicability]
+    version_ranks: List[int]
+
+    def __len__(self) -> int:
+        return len(self.version_ranks)
+
+    def __getitem__(self, rank: int) -> AMWithApplicability:
+        return self.versions[self.version_ranks[rank]]
+
+    @property
+    def nb_versions(self) -> int:
+        return len(self.versions)
+
+
+def _leaf_conditions(condition: Condition) -> List[LeafCondition]:
+    if isinstance(condition, MergeConditions):
+        return [leaf for cd in condition.conditions for leaf in _leaf_conditions(cd)]
+    return [condition]
+
+
+def _am_conditions(am: ArreteMinisteriel) -> List[Condition]:
+    conditions: List[Condition] = []
+    for section in am.descendent_sections():
+        conditions.extend(
+            inapplicability.condition for inapplicability in section.parametrization.potential_inapplicabilities
+        )
+        conditions.extend(modification.condition for modification in section.parametrization.potential_modifications)
+    if am.applicability.condition_of_inapplicability:
+        conditions.append(am.applicability.condition_of_inapplicability)
+    return conditions
+
+
+def _signature_function(am: ArreteMinisteriel) -> Callable[[Dict[Parameter, Any]], Tuple[bool, ...]]:
+    # Parameter values are only used through the satisfaction of leaf conditions (which decides
+    # applicability, and which subconditions of OR conditions are named in warnings) and through
+    # the definition of parameters (for missing value warnings).
+    leaves = list(dict.fromkeys(leaf for condition in _am_conditions(am) for leaf in _leaf_conditions(condition)))
+    compiled_leaves = [compile_condition(leaf) for leaf in leaves]
+    parameters = list(dict.fromkeys(leaf.parameter for leaf in leaves))
+
+    def _signature(parameter_values: Dict[Parameter, Any]) -> Tuple[bool, ...]:
+        return (
+            *(compiled_leaf(parameter_values) for compiled_leaf in compiled_leaves),
+            *(parameter in parameter_values for parameter in parameters),
+        )
+
+    return _signature
+
+
+def build_ams_with_applicability(
+    am: ArreteMinisteriel,
+    parametrization: Optional[Parametrization],
+    list_of_parameter_values: Sequence[Dict[Parameter, Any]],
+) -> AMsWithApplicability:
+    """Batch version of build_am_with_applicability, for many installations.
+
+    The result of build_am_with_applicability only depends on the decision signature of the
+    parameter values: which leaf conditions of the AM are satisfied and which of their parameters
+    are defined. Each distinct version is therefore built once, for the first installation of its
+    signature, and shared by all installations with the same signature.
+
+    Args:
+        am (ArreteMinisteriel): AM to apply parameter values to.
+        parametrization (Optional[Parametrization]): if given, tied to am first.
+        list_of_parameter_values (Sequence[Dict[Parameter, Any]]): parameter values of each installation.
+
+    Returns:
+        AMsWithApplicability: the version of the AM of each installation, with the distinct versions.
+    """
+    if parametrization:
+        add_parametrization(am, parametrization)
+    signature = _signature_function(am)
+    signature_to_rank: Dict[Tuple[bool, ...], int] = {}
+    versions: List[AMWithApplicability] = []
+    version_ranks: List[int] = []
+    for parameter_values in list_of_parameter_values:
+        key = signature(parameter_values)
+        if key not in signature_to_rank:
+            signature_to_rank[key] = len(versions)
+            versions.append(build_am_with_applicability(am, None, parameter_values))
+        version_ranks.append(signature_to_rank[key])
+    return AMsWithApplicability(versions, version_ranks)
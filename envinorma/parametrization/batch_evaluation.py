@@ -0,0 +1,223 @@
+"""Vectorized evaluation of parametrization conditions for many installations at once.
+
+Requires the optional dependency numpy (`pip install envinorma[batch]`).
+
+Parameter values of installations are stored by column in a ParameterTable: one array per
+parameter, with a mask of defined values. Dates are stored as ordinals, and regimes, rubriques and
+other strings as codes in the list of distinct values of the column. Conditions are then evaluated
+as boolean arrays, with one value per installation.
+
+Example:
+    >>> table = ParameterTable.from_records([{regime: Regime.A}, {regime: Regime.E}, {}])
+    >>> evaluation = evaluate_parametrization(parametrization, table, am.applicability)
+    >>> evaluation.inapplicable_sections[inapplicable_section.id]
+    array([ True, False, False])
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from envinorma.models.am_applicability import AMApplicability
+from envinorma.models.condition import (
+    AndCondition,
+    Condition,
+    Equal,
+    Greater,
+    LeafCondition,
+    Littler,
+    MergeConditions,
+    Range,
+)
+from envinorma.models.parameter import Parameter, ParameterType
+
+from .models.parametrization import Parametrization
+
+_CATEGORICAL_TYPES = (ParameterType.REGIME, ParameterType.RUBRIQUE, ParameterType.STRING)
+
+
+def _date_ordinal(value: Any) -> float:
+    if isinstance(value, datetime):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+        return value.toordinal() + seconds / 86400
+    if isinstance(value, date):
+        return float(value.toordinal())
+    raise ValueError(f'Expecting a date, got {value!r}')
+
+
+@dataclass
+class ParameterColumn:
+    """Values of one parameter for all installations of a ParameterTable.
+
+    Args:
+        values (np.ndarray):
+            encoded values: ordinals for dates, codes in categories for regimes, rubriques and
+            strings, booleans and floats otherwise. Values where mask is False are meaningless.
+        mask (np.ndarray):
+            boolean array, True where the parameter is defined.
+        categories (Optional[Tuple[Any, ...]] = None):
+            for categorical parameters, the distinct values whose ranks are stored in values.
+    """
+
+    values: np.ndarray
+    mask: np.ndarray
+    categories: Optional[Tuple[Any, ...]] = None
+
+    @classmethod
+    def from_values(cls, type_: ParameterType, values: Sequence[Any]) -> 'ParameterColumn':
+        """Encode values of a parameter of type type_, None meaning undefined."""
+        mask = np.array([value is not None for value in values], dtype=bool)
+        if type_ in _CATEGORICAL_TYPES:
+            categories = tuple(dict.fromkeys(value for value in values if value is not None))
+            codes = {category: rank for rank, category in enumerate(categories)}
+            encoded = np.array([-1 if value is None else codes[value] for value in values], dtype=np.int64)
+            return cls(encoded, mask, categories)
+        if type_ == ParameterType.DATE:
+            encoded = np.array([0.0 if value is None else _date_ordinal(value) for value in values], dtype=np.float64)
+        elif type_ == ParameterType.BOOLEAN:
+            encoded = np.array([bool(value) for value in values], dtype=bool)
+        elif type_ == ParameterType.REAL_NUMBER:
+            encoded = np.array([0.0 if value is None else value for value in values], dtype=np.float64)
+        else:
+            raise ValueError(f'Unhandled parameter type {type_}')
+        return cls(encoded, mask)
+
+
+@dataclass
+class ParameterTable:
+    """Parameter values of several installations, stored by parameter.
+
+    Args:
+        size (int):
+            number of installations.
+        columns (Dict[Parameter, ParameterColumn]):
+            values of each parameter. Parameters without column are undefined for all installations.
+    """
+
+    size: int
+    columns: Dict[Parameter, ParameterColumn] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for parameter, column in self.columns.items():
+            if column.values.shape != (self.size,) or column.mask.shape != (self.size,):
+                raise ValueError(f'Column of parameter {parameter.id} does not have {self.size} values.')
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[Parameter, Any]]) -> 'ParameterTable':
+        """Build the table of the parameter values of each installation, as given to apply_parameter_values."""
+        parameters = list(dict.fromkeys(parameter for record in records for parameter in record))
+        columns = {
+            parameter: ParameterColumn.from_values(parameter.type, [record.get(parameter) for record in records])
+            for parameter in parameters
+        }
+        return cls(len(records), columns)
+
+
+class _BatchEvaluator:
+    def __init__(self, table: ParameterTable) -> None:
+        self.table = table
+        self._results: Dict[Condition, np.ndarray] = {}
+
+    def _target(self, column: ParameterColumn, parameter: Parameter, target: Any) -> Any:
+        if parameter.type == ParameterType.DATE:
+            return _date_ordinal(target)
+        if column.categories is not None:
+            raise ValueError(f'Parameter {parameter.id} of type {parameter.type.value} only supports Equal conditions.')
+        return target
+
+    def _equal(self, column: ParameterColumn, condition: Equal) -> np.ndarray:
+        if column.categories is None:
+            return column.values == self._target(column, condition.parameter, condition.target)
+        if condition.target not in column.categories:
+            return np.zeros(self.table.size, dtype=bool)
+        return column.values == column.categories.index(condition.target)
+
+    def _leaf(self, condition: LeafCondition) -> np.ndarray:
+        column = self.table.columns.get(condition.parameter)
+        if column is None:
+            return np.zeros(self.table.size, dtype=bool)
+        values = column.values
+        if isinstance(condition, Equal):
+            satisfied = self._equal(column, condition)
+        elif isinstance(condition, Greater):
+            target = self._target(column, condition.parameter, condition.target)
+            satisfied = values > target if condition.strict else values >= target
+        elif isinstance(condition, Littler):
+            target = self._target(column, condition.parameter, condition.target)
+            satisfied = values < target if condition.strict else values <= target
+        elif isinstance(condition, Range):
+            left = self._target(column, condition.parameter, condition.left)
+            right = self._target(column, condition.parameter, condition.right)
+            satisfied = (values > left if condition.left_strict else values >= left) & (
+                values < right if condition.right_strict else values <= right
+            )
+        else:
+            raise ValueError(f'Unknown condition type {type(condition)}')
+        return satisfied & column.mask
+
+    def evaluate(self, condition: Condition) -> np.ndarray:
+        # Conditions shared by several sections are evaluated once.
+        if condition not in self._results:
+            if isinstance(condition, MergeConditions):
+                results = [self.evaluate(cd) for cd in condition.conditions]
+                if isinstance(condition, AndCondition):
+                    result = np.logical_and.reduce(results) if results else np.ones(self.table.size, dtype=bool)
+                else:
+                    result = np.logical_or.reduce(results) if results else np.zeros(self.table.size, dtype=bool)
+            else:
+                result = self._leaf(condition)
+            self._results[condition] = result
+        return self._results[condition]
+
+
+def evaluate_condition(condition: Condition, table: ParameterTable) -> np.ndarray:
+    """Vectorized version of condition.is_satisfied: one boolean per installation of table."""
+    return _BatchEvaluator(table).evaluate(condition)
+
+
+@dataclass
+class BatchEvaluation:
+    """Conditions satisfied by each installation of a ParameterTable.
+
+    Args:
+        inapplicable_sections (Dict[str, np.ndarray]):
+            for each InapplicableSection id, True for installations satisfying its condition.
+        alternative_sections (Dict[str, np.ndarray]):
+            for each AlternativeSection id, True for installations satisfying its condition.
+        am_inapplicable (np.ndarray):
+            True for installations satisfying the condition of inapplicability of the AM.
+    """
+
+    inapplicable_sections: Dict[str, np.ndarray]
+    alternative_sections: Dict[str, np.ndarray]
+    am_inapplicable: np.ndarray
+
+    def satisfied_ids(self, rank: int) -> Tuple[List[str], List[str]]:
+        """Ids of the inapplicable sections and alternative sections satisfied by installation rank."""
+        return (
+            [id_ for id_, satisfied in self.inapplicable_sections.items() if satisfied[rank]],
+            [id_ for id_, satisfied in self.alternative_sections.items() if satisfied[rank]],
+        )
+
+
+def evaluate_parametrization(
+    parametrization: Parametrization, table: ParameterTable, am_applicability: Optional[AMApplicability] = None
+) -> BatchEvaluation:
+    """Evaluate all conditions of parametrization and of am_applicability for the installations of table.
+
+    Args:
+        parametrization (Parametrization): parametrization of the AM.
+        table (ParameterTable): parameter values of the installations.
+        am_applicability (Optional[AMApplicability] = None): applicability of the AM.
+
+    Returns:
+        BatchEvaluation: boolean arrays of satisfied conditions, one value per installation.
+    """
+    evaluator = _BatchEvaluator(table)
+    condition = am_applicability.condition_of_inapplicability if am_applicability else None
+    return BatchEvaluation(
+        {section.id: evaluator.evaluate(section.condition) for section in parametrization.inapplicable_sections},
+        {section.id: evaluator.evaluate(section.condition) for section in parametrization.alternative_sections},
+        evaluator.evaluate(condition) if condition else np.zeros(table.size, dtype=bool),
+    )
@@ -3,8 +3,9 @@ import math
 import random
 import string
 import traceback
+from dataclasses import fields
 from datetime import datetime
-from typing import Dict, Iterable, List, Optional, TypeVar, Union
+from typing import Any, Dict, Iterable, List, Optional, Type, TypeVar, Union
 
 from tqdm import tqdm
 
@@ -93,3 +94,53 @@ def safely_replace(string: str, replaced_substring: str, new_substring: str) ->
 
 def random_id(size: int = 12) -> str:
     return ''.join([random.choice(string.hexdigits) for _ in range(size)])  # noqa: S311
+
+
+def add_slots(cls: Type[T]) -> Type[T]:
+    """Rebuild a dataclass with __slots__, to be applied above the @dataclass decorator.
+
+    Instances have no __dict__, which saves a dict per instance for the many small objects of a
+    text tree. Equivalent to dataclass(slots=True), which requires Python 3.10. Methods must not
+    use super() without arguments, since the class is replaced.
+    """
+    dataclass_: Any = cls
+    if '__slots__' in dataclass_.__dict__:
+        raise ValueError(f'{dataclass_.__name__} already defines __slots__.')
+    cls_dict = dict(dataclass_.__dict__)
+    field_names = tuple(field_.name for field_ in fields(dataclass_))
+    cls_dict['__slots__'] = field_names
+    for field_name in field_names:
+        # Default values are class attributes, which conflict with slots. They are kept by __init__.
+        cls_dict.pop(field_name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    slotted_cls = type(dataclass_)(dataclass_.__name__, dataclass_.__bases__, cls_dict)
+    slotted_cls.__qualname__ = dataclass_.__qualname__
+    return slotted_cls
+
+
+def cache_hash(cls: Type[T]) -> Type[T]:
+    """Memoize the hash of the instances of a frozen dataclass, to be applied above the @dataclass decorator.
+
+    The hash is computed once per instance and stored in its __dict__. Only fields are pickled:
+    hashes of strings differ from one process to another, and other values memoized on instances
+    (such as compiled conditions) may not be picklable.
+    """
+    dataclass_: Any = cls
+    field_names = {field_.name for field_ in fields(dataclass_)}
+    fields_hash = dataclass_.__hash__
+    if fields_hash is None:
+        raise ValueError(f'{dataclass_.__name__} is not hashable.')
+
+    def __hash__(self: Any) -> int:  # noqa: N807
+        hash_ = self.__dict__.get('_hash')
+        if hash_ is None:
+            hash_ = self.__dict__['_hash'] = fields_hash(self)
+        return hash_
+
+    def __getstate__(self: Any) -> Dict[str, Any]:  # noqa: N807
+        return {key: value for key, value in self.__dict__.items() if key in field_names}
+
+    dataclass_.__hash__ = __hash__
+    dataclass_.__getstate__ = __getstate__
+    return cls
@@ -51,7 +51,27 @@ requirements = [
     "leginorma>=0.0.3",
 ]
 
+async_requirements = [
+    "asyncpg>=0.22.0",
+]
+
+compression_requirements = [
+    "zstandard>=0.15.0",
+]
+
+fast_requirements = [
+    "orjson>=3.4.0",
+]
+
+batch_requirements = [
+    "numpy>=1.19.0",
+]
+
 extra_requirements = {
+    "async": async_requirements,
+    "compression": compression_requirements,
+    "fast": fast_requirements,
+    "batch": batch_requirements,
     "setup": setup_requirements,
     "test": test_requirements,
     "dev": dev_requirements,
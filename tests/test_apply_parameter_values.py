@@ -8,11 +8,14 @@ from typing import List, Optional
 import pytest
 
 from envinorma.models import Applicability, ArreteMinisteriel, EnrichedString, Regime, StructuredText
+from envinorma.models.am_applicability import AMApplicability
 from envinorma.models.structured_text import PotentialInapplicability
 from envinorma.parametrization.apply_parameter_values import (
     _deactivate_alineas,
     _is_satisfiable,
     apply_parameter_values_to_am,
+    build_am_with_applicability,
+    build_ams_with_applicability,
 )
 from envinorma.parametrization.models import (
     AlternativeSection,
@@ -214,3 +217,36 @@ def test_is_satisfiable():
     with pytest.raises(ValueError):
         condition = AndCondition(frozenset([Littler(regime, Regime.E), Littler(enregistrement, date(2021, 1, 1))]))
         _is_satisfiable(condition, Regime.E)
+
+
+def test_build_ams_with_applicability():
+    regime = ParameterEnum.REGIME.value
+    installation = ParameterEnum.DATE_INSTALLATION.value
+    sections = [StructuredText(_str('Art. 1'), [_str()], [], None), StructuredText(_str('Art. 2'), [_str()], [], None)]
+    am = ArreteMinisteriel(_str('arrete du 10/10/10'), sections, [], None, id='FAKE_ID')
+    am.applicability = AMApplicability(['Fake warning'], Equal(regime, Regime.NC))
+    recent_or_declaration = OrCondition(frozenset([Equal(regime, Regime.D), Littler(installation, date(2010, 1, 1))]))
+    parametrization = Parametrization(
+        [_IS(sections[0].id, None, recent_or_declaration)],
+        [_AS(sections[1].id, StructuredText(_str('Art. 2'), [_str()], [], None), Equal(regime, Regime.A))],
+        [],
+    )
+    list_of_parameter_values = [
+        {regime: Regime.D, installation: date(2000, 1, 1)},
+        {regime: Regime.D, installation: date(2005, 1, 1)},
+        {regime: Regime.D, installation: date(2020, 1, 1)},
+        {regime: Regime.A, installation: date(2020, 1, 1)},
+        {regime: Regime.A, installation: date(2021, 1, 1)},
+        {regime: Regime.NC},
+        {},
+        {},
+    ]
+    result = build_ams_with_applicability(am, parametrization, list_of_parameter_values)
+
+    assert len(result) == 8
+    assert result.nb_versions == 5
+    assert result[0] is result[1] and result[3] is result[4] and result[6] is result[7]
+    for rank, parameter_values in enumerate(list_of_parameter_values):
+        expected = build_am_with_applicability(am, parametrization, parameter_values)
+        assert result[rank].to_dict() == expected.to_dict()
+    assert am.applicability.warnings == ['Fake warning']
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import re
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Dict, List
+
+import pytest
+
+pytest.importorskip('asyncpg')
+
+from envinorma import async_data_fetcher  # noqa: E402
+from envinorma.async_data_fetcher import AMBundle, AsyncDataFetcher, _to_asyncpg_query  # noqa: E402
+from envinorma.data_fetcher import _enrich_and_add_parametrization  # noqa: E402
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState  # noqa: E402
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel  # noqa: E402
+from envinorma.models.structured_text import StructuredText  # noqa: E402
+from envinorma.models.text_elements import EnrichedString  # noqa: E402
+from envinorma.parametrization.models.parametrization import AMWarning, Parametrization  # noqa: E402
+
+
+def test_to_asyncpg_query():
+    assert _to_asyncpg_query('SELECT 1;') == 'SELECT 1;'
+    assert _to_asyncpg_query('SELECT data FROM am WHERE am_id = %s;') == 'SELECT data FROM am WHERE am_id = $1;'
+    query = 'INSERT INTO am(am_id, data) VALUES(%s, %s);'
+    assert _to_asyncpg_query(query) == 'INSERT INTO am(am_id, data) VALUES($1, $2);'
+
+
+class _Record:
+    """Same access to values as asyncpg.Record: by column name, or by iteration."""
+
+    def __init__(self, **values: Any) -> None:
+        self._values = values
+
+    def __getitem__(self, column: str) -> Any:
+        return self._values[column]
+
+    def __iter__(self):
+        return iter(self._values.values())
+
+
+class _FakeConnection:
+    """Runs the SELECT queries of AsyncDataFetcher on in-memory tables of JSON documents."""
+
+    def __init__(self, tables: Dict[str, Dict[str, str]]) -> None:
+        self.tables = tables
+        self.queries: List[str] = []
+        self.executed: List[tuple] = []
+        self.transactions = 0
+        self.running = self.max_running = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    def _rows(self, query: str, values: tuple) -> List[_Record]:
+        match = re.search(r'FROM (\w+)', query)
+        assert match, query
+        table = self.tables[match.group(1)]
+        am_ids = sorted(table)
+        if 'am_id = $1' in query:
+            am_ids = [am_id for am_id in am_ids if am_id == values[0]]
+        if 'ANY($1)' in query:
+            am_ids = [am_id for am_id in am_ids if am_id in values[0]]
+        if AMState.VIGUEUR.value in values:
+            am_ids = [am_id for am_id in am_ids if json.loads(table[am_id])['state'] == AMState.VIGUEUR.value]
+        if 'FAKE%' in values:
+            am_ids = [am_id for am_id in am_ids if not am_id.startswith('FAKE')]
+        if query.startswith('SELECT am_id FROM'):
+            return [_Record(am_id=am_id) for am_id in am_ids]
+        if query.startswith('SELECT am_id, data FROM'):
+            return [_Record(am_id=am_id, data=table[am_id]) for am_id in am_ids]
+        if query.startswith('SELECT data, codec, payload FROM'):
+            return [_Record(data=table[am_id], codec=None, payload=None) for am_id in am_ids]
+        return [_Record(data=table[am_id]) for am_id in am_ids]
+
+    async def fetch(self, query: str, *values: Any) -> List[_Record]:
+        self.queries.append(query)
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        await asyncio.sleep(0)  # lets concurrent queries start
+        self.running -= 1
+        return self._rows(query, values)
+
+    async def execute(self, query: str, *values: Any) -> None:
+        self.queries.append(query)
+        self.executed.append(values)
+
+
+class _FakePool(_FakeConnection):
+    """A pool whose fetch method runs on a connection of its own, as asyncpg.pool.Pool.fetch."""
+
+    def __init__(self, tables: Dict[str, Dict[str, str]]) -> None:
+        super().__init__(tables)
+        self.connections: List[_FakeConnection] = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.connections.append(_FakeConnection(self.tables))
+        yield self.connections[-1]
+
+
+def _am_and_metadata(am_id: str, state: AMState = AMState.VIGUEUR):
+    section = StructuredText(EnrichedString('Article 1'), [EnrichedString('Contenu')], [], None, id='section')
+    am = ArreteMinisteriel(EnrichedString('Arrêté du 10/10/10'), [section], [], None, id=am_id)
+    metadata = AMMetadata(am_id, '1234', 'Arrêté du 10/10/10', [], state, date(2010, 10, 10), AMSource.AIDA)
+    return am, metadata
+
+
+_AM_IDS = ['JORFTEXT000000000001', 'JORFTEXT000000000002', 'FAKE000000000003']
+_PARAMETRIZATION = Parametrization([], [], [AMWarning('section', 'Avertissement', 'warning')])
+
+
+def _fetcher(monkeypatch) -> AsyncDataFetcher:
+    tables: Dict[str, Dict[str, str]] = {'structured_am': {}, 'am_metadata': {}, 'parametrization': {}}
+    for am_id in _AM_IDS:
+        state = AMState.DELETED if am_id == 'JORFTEXT000000000002' else AMState.VIGUEUR
+        am, metadata = _am_and_metadata(am_id, state)
+        tables['structured_am'][am_id] = json.dumps(am.to_dict())
+        tables['am_metadata'][am_id] = json.dumps(metadata.to_dict())
+        tables['parametrization'][am_id] = json.dumps(_PARAMETRIZATION.to_dict())
+    pools: List[_FakePool] = []
+
+    async def _create_pool(*args, **kwargs) -> _FakePool:
+        await asyncio.sleep(0)
+        pools.append(_FakePool(tables))
+        return pools[-1]
+
+    monkeypatch.setattr(async_data_fetcher.asyncpg, 'create_pool', _create_pool)
+    return AsyncDataFetcher('postgresql://unused')
+
+
+def test_session(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+    assert fetcher._pool_lock is None
+
+    async def _run():
+        pools = await asyncio.gather(*[fetcher._get_pool() for _ in range(3)])
+        assert pools[0] is pools[1] is pools[2]
+        async with fetcher.session():
+            connection = fetcher._session_connection.get()
+            async with fetcher.session():
+                assert fetcher._session_connection.get() is connection
+                await fetcher.load_am_metadata('JORFTEXT000000000001')
+            await fetcher.load_am_ids()
+        assert fetcher._session_connection.get() is None
+        return pools[0], connection
+
+    pool, connection = asyncio.run(_run())
+    assert pool.connections == [connection]
+    assert connection.transactions == 1
+    assert len(connection.queries) == 2 and pool.queries == []
+
+
+def test_load_bundle(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+    am, metadata = _am_and_metadata('JORFTEXT000000000001')
+
+    async def _run():
+        bundle = await fetcher.load_bundle('JORFTEXT000000000001')
+        async with fetcher.session():
+            assert await fetcher.load_bundle('JORFTEXT000000000001') == bundle
+            connection = fetcher._session_connection.get()
+        assert await fetcher.load_bundle('JORFTEXT000000000004') == AMBundle(None, None, None)
+        return bundle, await fetcher._get_pool(), connection
+
+    bundle, pool, connection = asyncio.run(_run())
+    assert bundle == AMBundle(am, metadata, _PARAMETRIZATION)
+    assert pool.max_running == 3
+    assert len(connection.queries) == 3 and connection.max_running == 1
+
+
+def test_build_enriched_ams(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+
+    async def _run():
+        enriched_ams = await fetcher.build_enriched_ams()
+        async with fetcher.session():
+            assert await fetcher.build_enriched_ams() == enriched_ams
+            connection = fetcher._session_connection.get()
+        return enriched_ams, connection
+
+    enriched_ams, connection = asyncio.run(_run())
+    am, metadata = _am_and_metadata('JORFTEXT000000000001')
+    assert enriched_ams == [_enrich_and_add_parametrization(am, metadata, _PARAMETRIZATION)]
+    assert connection.max_running == 1
+
+
+def test_delete_am_metadata(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+
+    async def _run():
+        await fetcher.delete_am_metadata('JORFTEXT000000000001', 'abrogé')
+        with pytest.raises(ValueError):
+            await fetcher.delete_am_metadata('JORFTEXT000000000004', 'abrogé')
+        return (await fetcher._get_pool()).connections[0]
+
+    connection = asyncio.run(_run())
+    (am_id, data), *_ = connection.executed
+    assert am_id == 'JORFTEXT000000000001'
+    assert json.loads(data)['state'] == AMState.DELETED.value and json.loads(data)['reason_deleted'] == 'abrogé'
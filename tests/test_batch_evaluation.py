@@ -0,0 +1,102 @@
+import random
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from envinorma.models import Regime, StructuredText  # noqa: E402
+from envinorma.models.am_applicability import AMApplicability  # noqa: E402
+from envinorma.models.condition import AndCondition, Equal, Greater, Littler, OrCondition, Range  # noqa: E402
+from envinorma.models.parameter import Parameter, ParameterEnum, ParameterType  # noqa: E402
+from envinorma.models.text_elements import estr  # noqa: E402
+from envinorma.parametrization.batch_evaluation import (  # noqa: E402
+    ParameterColumn,
+    ParameterTable,
+    evaluate_condition,
+    evaluate_parametrization,
+)
+from envinorma.parametrization.models.parametrization import (  # noqa: E402
+    AlternativeSection,
+    InapplicableSection,
+    Parametrization,
+)
+
+_REGIME = ParameterEnum.REGIME.value
+_DATE = ParameterEnum.DATE_INSTALLATION.value
+_QUANTITY = ParameterEnum.RUBRIQUE_QUANTITY.value
+_RUBRIQUE = ParameterEnum.RUBRIQUE.value
+_BOOLEAN = Parameter('soumis-a-quotas', ParameterType.BOOLEAN)
+
+
+def _random_record(rng: random.Random):
+    candidates: Dict[Parameter, List[Any]] = {
+        _REGIME: list(Regime),
+        _DATE: [date(2000, 1, 1), date(2003, 1, 1), date(2010, 7, 1), date(2020, 1, 1)],
+        _QUANTITY: [0, 50, 100, 100.5, 1000, 5000],
+        _RUBRIQUE: ['2510', '1510', '4801'],
+        _BOOLEAN: [True, False],
+    }
+    return {parameter: rng.choice(values) for parameter, values in candidates.items() if rng.random() < 0.8}
+
+
+def test_parameter_column():
+    column = ParameterColumn.from_values(ParameterType.DATE, [date(2010, 1, 1), None, datetime(2010, 1, 1, 12)])
+    assert column.mask.tolist() == [True, False, True]
+    assert column.values[0] == date(2010, 1, 1).toordinal() and column.values[2] == column.values[0] + 0.5
+    column = ParameterColumn.from_values(ParameterType.REGIME, [Regime.A, None, Regime.E, Regime.A])
+    assert column.categories == (Regime.A, Regime.E)
+    assert column.values[column.mask].tolist() == [0, 1, 0]
+    with pytest.raises(ValueError):
+        ParameterTable(2, {_REGIME: column})
+
+
+def test_evaluate_condition():
+    rng = random.Random(0)
+    records = [_random_record(rng) for _ in range(300)]
+    table = ParameterTable.from_records(records)
+    conditions = [
+        Equal(_REGIME, Regime.A),
+        Equal(_RUBRIQUE, '2510'),
+        Equal(_RUBRIQUE, '9999'),
+        Equal(_BOOLEAN, True),
+        Equal(_QUANTITY, 100),
+        Littler(_DATE, date(2010, 7, 1), False),
+        Greater(_DATE, date(2010, 7, 1), True),
+        Greater(_QUANTITY, 100, False),
+        Littler(_QUANTITY, 100, True),
+        Range(_DATE, date(2003, 1, 1), date(2010, 7, 1), True, False),
+        Range(_QUANTITY, 50, 1000),
+        Equal(Parameter('absent', ParameterType.REAL_NUMBER), 1),
+        AndCondition(frozenset()),
+        OrCondition(frozenset()),
+        AndCondition(frozenset([Equal(_REGIME, Regime.E), Littler(_DATE, date(2010, 7, 1))])),
+        OrCondition(frozenset([Equal(_REGIME, Regime.D), AndCondition(frozenset([Range(_QUANTITY, 50, 1000)]))])),
+    ]
+    for condition in conditions:
+        expected = [condition.is_satisfied(record) for record in records]
+        assert evaluate_condition(condition, table).tolist() == expected, condition
+    with pytest.raises(ValueError):
+        evaluate_condition(Greater(_REGIME, Regime.A), table)
+
+
+def test_evaluate_parametrization():
+    new_text = StructuredText(estr('Article 1'), [estr('Nouvelle version')], [], None)
+    parametrization = Parametrization(
+        [
+            InapplicableSection('a', None, Equal(_REGIME, Regime.D), id='inapplicable-a'),
+            InapplicableSection('b', None, Littler(_DATE, date(2003, 1, 1)), id='inapplicable-b'),
+        ],
+        [AlternativeSection('b', new_text, Greater(_DATE, date(2003, 1, 1)), id='alternative-b')],
+        [],
+    )
+    applicability = AMApplicability(condition_of_inapplicability=Equal(_REGIME, Regime.NC))
+    records = [{_REGIME: Regime.D, _DATE: date(2000, 1, 1)}, {_REGIME: Regime.NC, _DATE: date(2010, 1, 1)}, {}]
+    evaluation = evaluate_parametrization(parametrization, ParameterTable.from_records(records), applicability)
+    assert evaluation.inapplicable_sections['inapplicable-a'].tolist() == [True, False, False]
+    assert evaluation.alternative_sections['alternative-b'].tolist() == [False, True, False]
+    assert evaluation.am_inapplicable.tolist() == [False, True, False]
+    assert evaluation.satisfied_ids(0) == (['inapplicable-a', 'inapplicable-b'], [])
+    assert evaluation.satisfied_ids(2) == ([], [])
+    assert not evaluate_parametrization(parametrization, ParameterTable.from_records(records)).am_inapplicable.any()
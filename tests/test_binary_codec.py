@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.binary_codec import MAGIC, BinaryCodec, dumps, loads
+from envinorma.models.codec import decode_am, decode_parametrization, encode_am, encode_parametrization
+from envinorma.models.condition import Equal, Greater, OrCondition
+from envinorma.models.parameter import ParameterEnum
+from envinorma.models.regime import Regime
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import EnrichedString, Link
+from envinorma.parametrization.models.parametrization import AlternativeSection, InapplicableSection, Parametrization
+
+
+def test_dumps_loads():
+    values = [None, True, False, 0, 127, 128, -1, -300, 2**70, 1.5, -0.25, '', 'é', [], {}, [[1, 'a'], {'a': None}]]
+    for value in values:
+        assert loads(dumps(value)) == value
+        assert type(loads(dumps(value))) == type(value)
+    loaded = loads(
+        dumps([{'text': 'abc', 'parameter': {'id': 'regime'}}, {'text': 'abc', 'parameter': {'id': 'regime'}}])
+    )
+    assert loaded[0]['text'] is loaded[1]['text']
+    assert loaded[0]['parameter'] is loaded[1]['parameter']
+    assert len(dumps(['répété'] * 10)) < len(dumps(['répété'])) + 20
+    parameters = [{'parameter': {'id': 'a', 'value': value}} for value in (1, 1.0, True)]
+    assert [type(element['parameter']['value']) for element in loads(dumps(parameters))] == [int, float, bool]
+
+    with pytest.raises(ValueError):
+        dumps({1: 'a'})
+    with pytest.raises(ValueError):
+        dumps(date(2010, 1, 1))
+    with pytest.raises(ValueError):
+        loads(b'{"a": 1}')
+    with pytest.raises(ValueError):
+        loads(MAGIC + b'\x02')
+    with pytest.raises(ValueError):
+        loads(MAGIC)
+    payload = dumps({'a': [1.5, 'text', {'parameter': {'id': 'regime'}}]})
+    for end in range(len(MAGIC) + 1, len(payload)):
+        with pytest.raises(ValueError):
+            loads(payload[:end])
+
+
+def test_binary_codec():
+    section = StructuredText(EnrichedString('Article 1', [Link('target', 0, 7)]), [], [], None, id='section')
+    am = ArreteMinisteriel(EnrichedString('Arrêté du 10/10/10'), [section], [], None, id='JORFTEXT000000000001')
+    regime, date_ = ParameterEnum.REGIME.value, ParameterEnum.DATE_INSTALLATION.value
+    condition = OrCondition(frozenset([Equal(regime, Regime.D), Equal(regime, Regime.DC)]))
+    parametrization = Parametrization(
+        [InapplicableSection('section', None, condition, 'inapplicable')],
+        [AlternativeSection('other', section, Greater(date_, date(2010, 1, 1)), 'alternative')],
+        [],
+    )
+    codec = BinaryCodec()
+    assert decode_am(encode_am(am, codec), codec) == am
+    assert decode_parametrization(encode_parametrization(parametrization, codec), codec) == parametrization
@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from envinorma.build_cache import BuildCache, build_key
+
+
+def test_build_key():
+    assert build_key('am', 'metadata', 'param') == build_key('am', 'metadata', 'param')
+    assert build_key('am', 'metadata', 'param') != build_key('am', 'metadata', 'param2')
+    assert build_key('am', 'metadata', 'param') != build_key('am', 'metadat', 'aparam')
+
+
+def test_build_cache(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    assert cache.get('key') is None
+    cache.put('key', '{"id": "A"}', 1.5)
+    cache.put('other_key', '{"id": "B"}', 0.5)
+    assert cache.get('key') == ('{"id": "A"}', 1.5)
+    assert BuildCache(str(tmp_path / 'cache')).get('other_key') == ('{"id": "B"}', 0.5)
+    assert cache.keys() == {'key', 'other_key'}
+    assert cache.prune({'key'}) == 1
+    assert cache.keys() == {'key'}
+
+
+def test_build_cache_concurrent_puts(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda rank: cache.put('key', '{"id": "A"}', rank), range(64)))
+    assert cache.get('key') is not None
+    assert os.listdir(cache.folder) == ['key.json']
@@ -0,0 +1,84 @@
+import importlib.util
+import json
+from datetime import date
+from typing import Type
+
+import pytest
+
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.classement import Classement
+from envinorma.models.codec import (
+    JSONCodec,
+    ModelCodec,
+    OrjsonCodec,
+    decode_am,
+    decode_am_metadata,
+    decode_am_with_applicability,
+    decode_parametrization,
+    default_codec,
+    encode_am,
+    encode_am_metadata,
+    encode_am_with_applicability,
+    encode_parametrization,
+)
+from envinorma.models.condition import Greater
+from envinorma.models.parameter import ParameterEnum
+from envinorma.models.regime import Regime
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import EnrichedString, Link
+from envinorma.parametrization.apply_parameter_values import build_am_with_applicability
+from envinorma.parametrization.models.parametrization import AlternativeSection, AMWarning, Parametrization
+
+_requires_orjson = pytest.mark.skipif(importlib.util.find_spec('orjson') is None, reason='orjson is not installed')
+_CODECS = [JSONCodec, pytest.param(OrjsonCodec, marks=_requires_orjson)]
+
+
+def _am() -> ArreteMinisteriel:
+    alineas = [EnrichedString('Arrêté préfectoral', [Link('https://aida.ineris.fr', 0, 6)])]
+    section = StructuredText(EnrichedString('Article 1'), alineas, [], None, id='section')
+    return ArreteMinisteriel(
+        EnrichedString('Arrêté du 10/10/10'),
+        [section],
+        [],
+        None,
+        classements=[Classement('1510', Regime.E)],
+        id='JORFTEXT000000000001',
+    )
+
+
+def _parametrization() -> Parametrization:
+    new_text = StructuredText(EnrichedString('Article 1'), [EnrichedString('Nouveau')], [], None, id='new')
+    condition = Greater(ParameterEnum.DATE_INSTALLATION.value, date(2010, 1, 1))
+    return Parametrization(
+        [], [AlternativeSection('section', new_text, condition, 'alt')], [AMWarning('section', 'w', 'w')]
+    )
+
+
+@pytest.mark.parametrize('codec_cls', _CODECS)
+def test_round_trips(codec_cls: Type[ModelCodec]):
+    codec = codec_cls()
+    metadata = AMMetadata(
+        'JORFTEXT000000000001', '1234', 'Arrêté', [], AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+    )
+    parameter_values = {ParameterEnum.DATE_INSTALLATION.value: date(2020, 1, 1)}
+    am_with_applicability = build_am_with_applicability(_am(), _parametrization(), parameter_values)
+    assert decode_am(encode_am(_am(), codec), codec) == _am()
+    assert decode_parametrization(encode_parametrization(_parametrization(), codec), codec) == _parametrization()
+    assert decode_am_metadata(encode_am_metadata(metadata, codec), codec) == metadata
+    payload = encode_am_with_applicability(am_with_applicability, codec)
+    assert decode_am_with_applicability(payload, codec) == am_with_applicability
+
+
+@pytest.mark.parametrize('codec_cls', _CODECS)
+def test_wire_compatibility(codec_cls: Type[ModelCodec]):
+    am, codec = _am(), codec_cls()
+    assert json.loads(encode_am(am, codec)) == am.to_dict()
+    assert decode_am(json.dumps(am.to_dict()), codec) == am
+    assert decode_am(json.dumps(am.to_dict()).encode('utf-8'), codec) == am
+
+
+@_requires_orjson
+def test_orjson_codec():
+    assert encode_am(_am(), OrjsonCodec()) == encode_am(_am(), JSONCodec())
+    assert default_codec().name == 'orjson'
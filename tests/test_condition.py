@@ -1,3 +1,6 @@
+import gc
+import pickle
+import weakref
 from datetime import datetime
 
 from envinorma.models import Regime
@@ -8,9 +11,11 @@ from envinorma.models.condition import (
     Littler,
     OrCondition,
     Range,
+    compile_condition,
     extract_sorted_interval_sides_targets,
+    load_condition,
 )
-from envinorma.models.parameter import Parameter, ParameterType
+from envinorma.models.parameter import Parameter, ParameterEnum, ParameterType
 
 
 def test_is_satisfied():
@@ -37,3 +42,62 @@ def test_extract_sorted_interval_sides_targets():
         Greater(parameter, datetime(2021, 1, 1), False),
     ]
     assert extract_sorted_interval_sides_targets(conditions, True) == [datetime(2020, 1, 1), datetime(2021, 1, 1)]
+
+
+def test_load_condition_interns_conditions():
+    regime = ParameterEnum.REGIME.value
+    date_ = ParameterEnum.DATE_INSTALLATION.value
+    condition = AndCondition(frozenset([Equal(regime, Regime.A), Littler(date_, datetime(2010, 1, 1).date())]))
+    loaded = load_condition(condition.to_dict())
+    assert loaded == condition
+    assert load_condition(condition.to_dict()) is loaded
+    assert load_condition(Equal(regime, Regime.A).to_dict()) in loaded.conditions
+    assert load_condition(Equal(regime, Regime.A).to_dict()).parameter is regime
+    assert hash(loaded) == hash(condition) and '_hash' in loaded.__dict__
+    assert '_hash' not in pickle.loads(pickle.dumps(loaded)).__dict__
+
+    quantity = Parameter('quantite', ParameterType.REAL_NUMBER)
+    integer_target = load_condition(Greater(quantity, 10).to_dict())
+    float_target = load_condition(Greater(quantity, 10.0).to_dict())
+    assert integer_target == float_target and integer_target is not float_target
+    assert float_target.to_dict()['target'] == 10.0 and isinstance(float_target.to_dict()['target'], float)
+
+    one_off = load_condition(Greater(Parameter('one-off', ParameterType.REAL_NUMBER), 12345).to_dict())
+    references = [weakref.ref(one_off), weakref.ref(one_off.parameter)]
+    del one_off
+    gc.collect()
+    assert [reference() for reference in references] == [None, None]
+    assert Parameter.from_dict(regime.to_dict()) is regime
+
+
+def test_compile_condition():
+    regime = ParameterEnum.REGIME.value
+    quantity = Parameter('quantite', ParameterType.REAL_NUMBER)
+    conditions = [
+        Equal(regime, Regime.A),
+        Greater(quantity, 10, True),
+        Greater(quantity, 10, False),
+        Littler(quantity, 10, True),
+        Littler(quantity, 10, False),
+        *[
+            Range(quantity, 5, 10, left_strict, right_strict)
+            for left_strict in (True, False)
+            for right_strict in (True, False)
+        ],
+        AndCondition(frozenset()),
+        OrCondition(frozenset()),
+        AndCondition(frozenset([Equal(regime, Regime.A), Greater(quantity, 10)])),
+        OrCondition(frozenset([Equal(regime, Regime.E), AndCondition(frozenset([Littler(quantity, 5)]))])),
+    ]
+    values = [
+        {},
+        {regime: Regime.A},
+        {regime: Regime.E, quantity: 3},
+        *[{regime: Regime.A, quantity: q} for q in (5, 7, 10, 12)],
+    ]
+    for condition in conditions:
+        compiled = compile_condition(condition)
+        assert compile_condition(condition) is compiled
+        for parameter_values in values:
+            assert compiled(parameter_values) == condition.is_satisfied(parameter_values), (condition, parameter_values)
+        assert pickle.loads(pickle.dumps(condition)) == condition
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from envinorma.content_store import ContentStore, root_references
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.condition import Greater
+from envinorma.models.parameter import ParameterEnum
+from envinorma.models.structured_text import Applicability, StructuredText
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization.models.parametrization import AlternativeSection, AMWarning, Parametrization
+
+
+def _section(title: str, alineas: list, id_: str) -> StructuredText:
+    return StructuredText(EnrichedString(title), [EnrichedString(al) for al in alineas], [], None, id=id_)
+
+
+def _am(am_id: str) -> ArreteMinisteriel:
+    article = _section('Article 1', ['Contenu', 'Contenu'], 'article')
+    modified = _section('Article 2', ['Nouveau contenu'], 'modified')
+    modified.applicability = Applicability(
+        modified=True, previous_version=_section('Article 2', ['Contenu'], 'modified')
+    )
+    return ArreteMinisteriel(
+        EnrichedString('Arrêté du 10/10/10'), [article, modified], [EnrichedString('Vu')], None, id=am_id
+    )
+
+
+def test_content_store_am():
+    store = ContentStore()
+    am_1, am_2 = _am('JORFTEXT000000000001'), _am('JORFTEXT000000000002')
+    root_1, root_2 = store.put_am(am_1), store.put_am(am_2)
+    assert root_references('am', root_1) == root_references('am', root_2)
+    assert store.load_am(root_1) == am_1
+    assert store.load_am(root_2) == am_2
+
+    # title, visa, 3 texts and 'Article 1', 'Article 2', 'Contenu', 'Nouveau contenu'
+    assert len(store) == store.stats.nb_nodes == 9
+    assert store.stats.nb_references == 24
+    assert store.stats.ratio > 2
+    assert store.load_am(root_1).sections[0].outer_alineas[0] is store.load_am(root_2).sections[0].outer_alineas[1]
+    assert store.load_am(root_1).sections[0] is not store.load_am(root_1).sections[0]
+
+
+def test_content_store_parametrization():
+    store = ContentStore()
+    condition = Greater(ParameterEnum.DATE_INSTALLATION.value, date(2010, 1, 1))
+    new_text = _section('Article 1', ['Contenu modifié'], 'new')
+    alternative_section = AlternativeSection('article', new_text, condition, 'alternative')
+    parametrization = Parametrization([], [alternative_section], [AMWarning('article', 'warning', 'warning')])
+    root = store.put_parametrization(parametrization)
+    assert store.load_parametrization(root) == parametrization
+    assert len(store.unsaved_nodes()) == 3  # new_text, its title and its alinea
+    store.mark_saved(hash_ for hash_, _, _ in store.unsaved_nodes())
+    assert store.unsaved_nodes() == []
+    store.put_parametrization(parametrization)
+    assert store.unsaved_nodes() == []
+
+    other_store = ContentStore()
+    with pytest.raises(ValueError):
+        other_store.load_parametrization(root)
+    with pytest.raises(ValueError):
+        root_references('unknown', root)
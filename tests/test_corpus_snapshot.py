@@ -0,0 +1,118 @@
+import json
+import mmap
+import os
+from datetime import date
+
+import pytest
+
+from envinorma import corpus_snapshot
+from envinorma.corpus_snapshot import CorpusSnapshot, SnapshotDataFetcher, SnapshotWriter
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.classement import Classement
+from envinorma.models.regime import Regime
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization.models.parametrization import AMWarning, Parametrization
+
+
+def _am(am_id: str) -> ArreteMinisteriel:
+    section = StructuredText(EnrichedString('Article 1'), [EnrichedString('Contenu é')], [], None, id='section')
+    return ArreteMinisteriel(EnrichedString('Arrêté du 10/10/10'), [section], [], None, id=am_id)
+
+
+def _metadata(am_id: str, state: AMState, regime: Regime) -> AMMetadata:
+    classements = [Classement('1510', regime)]
+    return AMMetadata(am_id, '1234', 'Arrêté du 10/10/10', classements, state, date(2010, 10, 10), AMSource.AIDA)
+
+
+def _write_snapshot(filename: str) -> None:
+    with SnapshotWriter(filename) as writer:
+        for am_id, state, regime in [
+            ('JORFTEXT000000000001', AMState.VIGUEUR, Regime.E),
+            ('JORFTEXT000000000002', AMState.VIGUEUR, Regime.A),
+            ('JORFTEXT000000000003', AMState.DELETED, Regime.E),
+        ]:
+            writer.add('enriched_am', am_id, json.dumps(_am(am_id).to_dict()))
+            writer.add('am_metadata', am_id, json.dumps(_metadata(am_id, state, regime).to_dict()))
+        parametrization = Parametrization([], [], [AMWarning('section', 'text', 'warning')])
+        writer.add('parametrization', 'JORFTEXT000000000001', json.dumps(parametrization.to_dict()))
+        with pytest.raises(ValueError):
+            writer.add('enriched_am', 'JORFTEXT000000000001', '{}')
+        with pytest.raises(ValueError):
+            writer.add('unknown', 'JORFTEXT000000000001', '{}')
+        assert writer.counts()['enriched_am'] == 3
+
+
+def test_snapshot(tmp_path):
+    filename = str(tmp_path / 'corpus.snapshot')
+    _write_snapshot(filename)
+    with CorpusSnapshot(filename) as snapshot:
+        assert snapshot.ids('am_metadata') == {'JORFTEXT000000000001', 'JORFTEXT000000000002', 'JORFTEXT000000000003'}
+        assert snapshot.load_text('parametrization', 'JORFTEXT000000000002') is None
+        am_text = snapshot.load_text('enriched_am', 'JORFTEXT000000000002')
+        assert am_text and json.loads(am_text)['id'] == 'JORFTEXT000000000002'
+
+    fetcher = SnapshotDataFetcher(filename)
+    assert fetcher.load_enriched_am('JORFTEXT000000000001') == _am('JORFTEXT000000000001')
+    assert fetcher.load_am_ids() == {'JORFTEXT000000000001', 'JORFTEXT000000000002'}
+    assert fetcher.load_am_ids(regime=Regime.E, with_deleted_ams=True) == {
+        'JORFTEXT000000000001',
+        'JORFTEXT000000000003',
+    }
+    assert fetcher.load_am_ids(rubrique='1510', regime=Regime.A) == {'JORFTEXT000000000002'}
+    assert fetcher.load_am_ids(with_fake=False, is_transverse=True) == set()
+    assert fetcher.load_parametrization('JORFTEXT000000000001').warnings[0].id == 'warning'  # type: ignore
+    assert fetcher.load_or_init_parametrization('JORFTEXT000000000002') == Parametrization([], [], [])
+    assert [am.id for am in fetcher.build_enriched_ams()] == [
+        'JORFTEXT000000000001',
+        'JORFTEXT000000000002',
+        'JORFTEXT000000000003',
+    ]
+    with pytest.raises(ValueError):
+        fetcher.load_am('JORFTEXT000000000001')
+    fetcher.close()
+
+
+def test_concurrent_snapshot_writers(tmp_path):
+    filename = str(tmp_path / 'corpus.snapshot')
+    first, second = SnapshotWriter(filename), SnapshotWriter(filename)
+    first.add('enriched_am', 'JORFTEXT000000000001', json.dumps(_am('JORFTEXT000000000001').to_dict()))
+    second.add('enriched_am', 'JORFTEXT000000000002', json.dumps(_am('JORFTEXT000000000002').to_dict()))
+    first.close()
+    with CorpusSnapshot(filename) as snapshot:
+        assert snapshot.ids('enriched_am') == {'JORFTEXT000000000001'}
+    second.close()
+    with CorpusSnapshot(filename) as snapshot:
+        assert snapshot.ids('enriched_am') == {'JORFTEXT000000000002'}
+    with pytest.raises(ValueError):
+        with SnapshotWriter(filename) as writer:
+            writer.add('unknown', 'JORFTEXT000000000001', '{}')
+    assert os.listdir(tmp_path) == ['corpus.snapshot']
+
+
+def test_invalid_snapshot(tmp_path):
+    filename = str(tmp_path / 'corpus.snapshot')
+    _write_snapshot(filename)
+    content = open(filename, 'rb').read()
+    open(filename, 'wb').write(content[:-1])
+    with pytest.raises(ValueError):
+        CorpusSnapshot(filename)
+    open(filename, 'wb').write(b'{}' * 20)
+    with pytest.raises(ValueError):
+        CorpusSnapshot(filename)
+
+
+def test_invalid_snapshot_closes_mmap(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'corpus.snapshot')
+    open(filename, 'wb').write(b'{}' * 20)
+    opened, mmap_ = [], mmap.mmap
+
+    def _mmap(*args, **kwargs):
+        opened.append(mmap_(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(corpus_snapshot.mmap, 'mmap', _mmap)
+    with pytest.raises(ValueError):
+        CorpusSnapshot(filename)
+    assert len(opened) == 1 and opened[0].closed
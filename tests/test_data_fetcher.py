@@ -1,8 +1,56 @@
-from dataclasses import dataclass
+import json
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from datetime import date
+from types import SimpleNamespace
+from typing import List, Tuple
 
+import psycopg2
 import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
 
-from envinorma.data_fetcher import _upsert_element
+from envinorma.build_cache import BuildCache
+from envinorma.connection_pool import ConnectionPool
+from envinorma.content_store import ContentStore
+from envinorma.data_fetcher import (
+    BulkWriteReport,
+    ConditionalLoad,
+    DataFetcher,
+    _am_metadata_filters,
+    _changes_query,
+    _check_am_metadata_fields,
+    _check_unique_element_ids,
+    _conditional_load_query,
+    _document_size,
+    _document_text,
+    _document_values,
+    _element_kind,
+    _element_rows,
+    _enrich_and_add_parametrization,
+    _enrich_in_process_pool,
+    _enriched_ams_query,
+    _load_element,
+    _migrate_to_jsonb_query,
+    _nest_sections,
+    _record_change_query,
+    _section_rows,
+    _upsert_element,
+    _upsert_query,
+)
+from envinorma.fetcher_cache import FetcherCache
+from envinorma.fetcher_instrumentation import HistogramRegistry
+from envinorma.models.am_metadata import AMMetadata, AMSource, AMState
+from envinorma.models.arrete_ministeriel import ArreteMinisteriel
+from envinorma.models.classement import Classement
+from envinorma.models.condition import Greater, Littler
+from envinorma.models.parameter import ParameterEnum
+from envinorma.models.regime import Regime
+from envinorma.models.structured_text import StructuredText
+from envinorma.models.text_elements import EnrichedString
+from envinorma.parametrization.exceptions import ParametrizationError
+from envinorma.parametrization.models.parametrization import AMWarning, InapplicableSection, Parametrization
+from envinorma.storage_codecs import GzipCodec
 
 
 @dataclass
@@ -24,3 +72,493 @@ def test_upsert_element():
         Element('1', 'unchanged'),
         Element('0', 'new'),
     ]
+
+
+def test_connection_pool_bounds():
+    with pytest.raises(ValueError):
+        ConnectionPool('', min_connections=-1)
+    with pytest.raises(ValueError):
+        ConnectionPool('', min_connections=3, max_connections=2)
+    with pytest.raises(ValueError):
+        ConnectionPool('', min_connections=0, max_connections=0)
+    ConnectionPool('', min_connections=0, max_connections=1)
+
+
+class _FakeConnection:
+    def __init__(self, broken: bool = False) -> None:
+        self.broken = broken
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        return nullcontext(SimpleNamespace(execute=self.execute))
+
+    def execute(self, query: str) -> None:
+        if self.broken:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+def test_connection_pool_ping_on_checkout(monkeypatch):
+    connections = [_FakeConnection(broken=True), _FakeConnection(broken=True), _FakeConnection()]
+    monkeypatch.setattr(psycopg2.pool.psycopg2, 'connect', lambda *_, **__: connections.pop(0))
+    pool = ConnectionPool('', min_connections=2, max_connections=2, ping_on_checkout=True)
+    with pool.connection() as connection:
+        assert not connection.broken
+    connection.broken = True
+    monkeypatch.setattr(psycopg2.pool.psycopg2, 'connect', lambda *_, **__: _FakeConnection(broken=True))
+    with pytest.raises(PoolError):
+        with pool.connection():
+            pass
+    monkeypatch.setattr(psycopg2.pool.psycopg2, 'connect', lambda *_, **__: _FakeConnection())
+    for _ in range(3):  # slots are released after a failed checkout
+        with pool.connection() as connection:
+            assert not connection.broken
+
+
+def test_connection_pool_close_while_checked_out(monkeypatch):
+    monkeypatch.setattr(psycopg2.pool.psycopg2, 'connect', lambda *_, **__: _FakeConnection())
+    pool = ConnectionPool('', min_connections=0, max_connections=1)
+    with pytest.raises(psycopg2.InterfaceError):
+        with pool.connection() as connection:
+            pool.close()
+            assert connection.closed
+            raise psycopg2.InterfaceError('connection already closed')
+    with pool.connection() as new_connection:
+        assert new_connection is not connection and not new_connection.closed
+
+
+def test_am_metadata_filters():
+    assert _am_metadata_filters(True, True) == ('', ())
+    assert _am_metadata_filters(True, False) == (' WHERE am_id NOT LIKE %s', ('FAKE%',))
+    assert _am_metadata_filters(False, True) == (" WHERE data ->> 'state' = %s", ('VIGUEUR',))
+    assert _am_metadata_filters(False, False) == (
+        " WHERE am_id NOT LIKE %s AND data ->> 'state' = %s",
+        ('FAKE%', 'VIGUEUR'),
+    )
+    assert _am_metadata_filters(True, True, rubrique='2510', is_transverse=False) == (
+        " WHERE data -> 'classements' @> %s::jsonb AND data ->> 'is_transverse' = %s",
+        ('[{"rubrique": "2510"}]', 'false'),
+    )
+    assert _am_metadata_filters(True, True, rubrique='2510', regime=Regime.E)[1] == (
+        '[{"rubrique": "2510", "regime": "E"}]',
+    )
+
+
+def test_check_am_metadata_fields():
+    _check_am_metadata_fields([])
+    _check_am_metadata_fields(['title', 'state'])
+    with pytest.raises(ValueError):
+        _check_am_metadata_fields(['title', 'unknown'])
+
+
+def test_migrate_to_jsonb_query():
+    assert _migrate_to_jsonb_query('am_metadata') == (
+        'ALTER TABLE am_metadata ALTER COLUMN data TYPE JSONB USING data::jsonb;'
+    )
+    with pytest.raises(ValueError):
+        _migrate_to_jsonb_query('unknown')
+
+
+def test_upsert_query():
+    expected = (
+        'INSERT INTO am_metadata(am_id, data) VALUES (%s, %s) ON CONFLICT (am_id)'
+        ' DO UPDATE SET data = EXCLUDED.data, version = EXCLUDED.version;'
+    )
+    assert _upsert_query('am_metadata') == expected
+    assert _upsert_query('am_metadata', bulk=True) == expected.replace('(%s, %s)', '%s')
+    expected = (
+        'INSERT INTO structured_am(am_id, data, codec, payload) VALUES (%s, %s, %s, %s) ON CONFLICT (am_id)'
+        ' DO UPDATE SET data = EXCLUDED.data, codec = EXCLUDED.codec, payload = EXCLUDED.payload,'
+        ' version = EXCLUDED.version;'
+    )
+    assert _upsert_query('structured_am') == expected
+    with pytest.raises(ValueError):
+        _upsert_query('unknown_table')
+
+
+def test_document_values():
+    assert _document_values('am_metadata', '{}', GzipCodec()) == ('{}',)
+    assert _document_values('structured_am', '{}', None) == ('{}', None, None)
+    stored = _document_values('structured_am', '{"a": 1}', GzipCodec())
+    assert stored[:2] == (None, 'gzip')
+    assert _document_text(stored) == '{"a": 1}'
+    assert _document_size(stored) == len(stored[2])
+    assert _document_text(('{}',)) == '{}'
+    assert _document_size(('{}', None, None)) == 2
+
+
+def test_bulk_write_report():
+    report = BulkWriteReport('am_metadata', 10, 1000, 2.0)
+    assert report.rows_per_second == 5
+    assert report.bytes_per_second == 500
+    assert BulkWriteReport('am_metadata', 0, 0, 0).rows_per_second == float('inf')
+
+
+def _am_and_metadata(am_id: str) -> Tuple[ArreteMinisteriel, AMMetadata]:
+    section = StructuredText(EnrichedString('Article 1'), [EnrichedString('Contenu')], [], None)
+    am = ArreteMinisteriel(EnrichedString('Arrêté du 10/10/10'), [section], [], None, id=am_id)
+    classements = [Classement('1510', Regime.E)]
+    metadata = AMMetadata(
+        am_id, '1234', 'Arrêté du 10/10/10', classements, AMState.VIGUEUR, date(2010, 10, 10), AMSource.AIDA
+    )
+    return am, metadata
+
+
+def test_enrich_in_process_pool():
+    empty_parametrization = json.dumps(Parametrization([], [], []).to_dict())
+    tasks = []
+    expected = []
+    for am_id in ['JORFTEXT000000000001', 'JORFTEXT000000000002']:
+        am, metadata = _am_and_metadata(am_id)
+        tasks.append((am_id, json.dumps(am.to_dict()), json.dumps(metadata.to_dict()), empty_parametrization))
+        expected.append(_enrich_and_add_parametrization(am, metadata, Parametrization([], [], [])))
+    assert _enrich_in_process_pool(tasks, 2) == expected
+
+    with pytest.raises(ValueError, match='JORFTEXT000000000003'):
+        _enrich_in_process_pool([*tasks, ('JORFTEXT000000000003', '{}', '{}', empty_parametrization)], 2)
+    with pytest.raises(ValueError):
+        _enrich_in_process_pool(tasks, 0)
+
+
+def test_build_enriched_ams_incrementally(tmp_path, monkeypatch):
+    empty_parametrization = json.dumps(Parametrization([], [], []).to_dict())
+    tasks = []
+    for am_id in ['JORFTEXT000000000001', 'JORFTEXT000000000002']:
+        am, metadata = _am_and_metadata(am_id)
+        tasks.append((am_id, json.dumps(am.to_dict()), json.dumps(metadata.to_dict()), empty_parametrization))
+    fetcher = DataFetcher('postgresql://unused')
+    monkeypatch.setattr(fetcher, '_load_enrichment_tasks', lambda *_: tasks)
+    build_cache = BuildCache(str(tmp_path))
+
+    enriched_ams, report = fetcher.build_enriched_ams_incrementally(build_cache)
+    assert report.rebuilt == ['JORFTEXT000000000001', 'JORFTEXT000000000002']
+    assert report.reused == []
+    assert [am.id for am in enriched_ams] == report.rebuilt
+
+    tasks[1] = (*tasks[1][:2], json.dumps({**json.loads(tasks[1][2]), 'nickname': 'new'}), tasks[1][3])
+    new_enriched_ams, report = fetcher.build_enriched_ams_incrementally(build_cache)
+    assert report.rebuilt == ['JORFTEXT000000000002']
+    assert report.reused == ['JORFTEXT000000000001']
+    assert report.time_saved > 0
+    assert new_enriched_ams[0] == enriched_ams[0]
+    assert new_enriched_ams[1].nickname == 'new'
+
+
+def test_enriched_ams_query():
+    query, values = _enriched_ams_query(False)
+    assert query == (
+        'SELECT metadata.am_id, metadata.data, structured_am.data, structured_am.codec, structured_am.payload,'
+        ' parametrization.data FROM (SELECT am_id, data FROM am_metadata WHERE am_id NOT LIKE %s'
+        " AND data ->> 'state' = %s) AS metadata JOIN structured_am USING (am_id)"
+        ' LEFT JOIN parametrization USING (am_id) ORDER BY metadata.am_id;'
+    )
+    assert values == ('FAKE%', 'VIGUEUR')
+
+
+def test_iter_enriched_ams(monkeypatch):
+    parametrization = Parametrization([], [], [])
+    rows = []
+    expected = []
+    for am_id in ['JORFTEXT000000000001', 'JORFTEXT000000000002']:
+        am, metadata = _am_and_metadata(am_id)
+        rows.append((am_id, json.dumps(metadata.to_dict()), json.dumps(am.to_dict()), None, None, None))
+        expected.append(_enrich_and_add_parametrization(am, metadata, parametrization))
+    fetcher = DataFetcher('postgresql://unused')
+    monkeypatch.setattr(fetcher, '_iterate_select_query', lambda *_: iter(rows))
+    assert list(fetcher.iter_enriched_ams()) == expected
+
+
+def test_iter_enriched_ams_matches_build_enriched_ams(monkeypatch):
+    date_ = ParameterEnum.DATE_INSTALLATION.value
+    ams, metadata, parametrizations = {}, {}, {}
+    for am_id, state in [('JORFTEXT000000000001', AMState.VIGUEUR), ('JORFTEXT000000000002', AMState.DELETED)]:
+        ams[am_id], am_metadata = _am_and_metadata(am_id)
+        metadata[am_id] = replace(am_metadata, state=state)
+        section_id = ams[am_id].sections[0].id
+        inapplicable_section = InapplicableSection(section_id, None, Greater(date_, date(2010, 1, 1)), 'inapplicable')
+        parametrizations[am_id] = Parametrization([inapplicable_section], [], [])
+    ams['JORFTEXT000000000003'], metadata['JORFTEXT000000000003'] = _am_and_metadata('JORFTEXT000000000003')
+
+    def _ids(with_deleted_ams: bool) -> List[str]:
+        return [am_id for am_id, md in metadata.items() if with_deleted_ams or md.state == AMState.VIGUEUR]
+
+    def _iterate_select_query(query, values, chunk_size):
+        # Rows of the query of iter_enriched_ams, keeping deleted AMs if the query does not filter them out.
+        return iter(
+            (
+                am_id,
+                json.dumps(metadata[am_id].to_dict()),
+                json.dumps(ams[am_id].to_dict()),
+                None,
+                None,
+                json.dumps(parametrizations[am_id].to_dict()) if am_id in parametrizations else None,
+            )
+            for am_id in _ids(AMState.VIGUEUR.value not in values)
+        )
+
+    fetcher = DataFetcher('postgresql://unused')
+    monkeypatch.setattr(fetcher, 'session', nullcontext)
+    monkeypatch.setattr(fetcher, '_iterate_select_query', _iterate_select_query)
+    monkeypatch.setattr(
+        fetcher,
+        'load_all_am_metadata',
+        lambda with_deleted_ams, with_fake: {am_id: metadata[am_id] for am_id in _ids(with_deleted_ams)},
+    )
+    monkeypatch.setattr(fetcher, 'load_am_ids', lambda: set(_ids(False)))
+    monkeypatch.setattr(fetcher, 'load_id_to_am', lambda: {am_id: ams[am_id] for am_id in _ids(False)})
+    monkeypatch.setattr(fetcher, 'load_all_parametrizations', lambda: parametrizations)
+    expected = fetcher.build_enriched_ams(with_deleted_ams=True)
+    assert [am.id for am in expected] == ['JORFTEXT000000000001', 'JORFTEXT000000000003']
+    assert list(fetcher.iter_enriched_ams(with_deleted_ams=True)) == expected
+
+
+def test_element_rows():
+    date_ = ParameterEnum.DATE_INSTALLATION.value
+    inapplicable_section = InapplicableSection('section', None, Greater(date_, date(2010, 1, 1)), 'inapplicable')
+    warning = AMWarning('section', 'text', 'warning')
+    rows = _element_rows('am_id', Parametrization([inapplicable_section], [], [warning]))
+    assert [row[:4] for row in rows] == [
+        ('am_id', 'inapplicable', 'inapplicable_section', 'section'),
+        ('am_id', 'warning', 'warning', 'section'),
+    ]
+    assert [_load_element(kind, data) for _, _, kind, _, data in rows] == [inapplicable_section, warning]
+    with pytest.raises(ValueError):
+        _element_kind(Parametrization)  # type: ignore
+
+
+class _ElementTable:
+    """Runs the statements of DataFetcher._upsert_element on the elements of a single section."""
+
+    def __init__(self, section_rows: List[Tuple[str, str, str]]) -> None:
+        self.section_rows = section_rows
+        self.updates: List[str] = []
+
+    def _keys(self) -> List[Tuple[str, str]]:
+        return [(id_, kind) for id_, kind, _ in self.section_rows]
+
+    def select(self, query: str, values: Tuple) -> List[Tuple]:
+        if 'FOR UPDATE' in query:
+            return self.section_rows
+        if query.startswith('SELECT 1'):
+            _, kind, id_ = values
+            return [(1,)] if (id_, kind) in self._keys() else []
+        return []
+
+    def update(self, query: str, values: Tuple) -> int:
+        self.updates.append(query.split()[0])
+        if query.startswith('INSERT'):
+            _, id_, kind, _, _ = values
+            return 0 if (id_, kind) in self._keys() else 1
+        *_, parameter_id, kind = values
+        return 1 if (parameter_id, kind) in self._keys() else 0
+
+
+def test_upsert_parameter_in_row_mode(monkeypatch):
+    date_ = ParameterEnum.DATE_INSTALLATION.value
+    existing = InapplicableSection('section', None, Greater(date_, date(2010, 1, 1)), 'existing')
+    warnings = [AMWarning('section', 'text', 'warning-1'), AMWarning('section', 'text', 'warning-2')]
+    table = _ElementTable(
+        [
+            ('existing', 'inapplicable_section', json.dumps(existing.to_dict())),
+            *[(warning.id, 'warning', json.dumps(warning.to_dict())) for warning in warnings],
+        ]
+    )
+    fetcher = DataFetcher('postgresql://unused', parametrization_rows=True)
+    monkeypatch.setattr(fetcher, 'session', nullcontext)
+    monkeypatch.setattr(fetcher, '_exectute_select_query', table.select)
+    monkeypatch.setattr(fetcher, '_exectute_update_query', table.update)
+
+    compatible = InapplicableSection('section', None, Littler(date_, date(2000, 1, 1)), 'new')
+    fetcher.upsert_parameter('am_id', compatible, None)
+    assert table.updates == ['INSERT']
+
+    overlapping = InapplicableSection('section', None, Littler(date_, date(2020, 1, 1)), 'new')
+    with pytest.raises(ParametrizationError):
+        fetcher.upsert_parameter('am_id', overlapping, None)
+    fetcher.upsert_parameter('am_id', overlapping, 'existing')  # replaces the overlapping condition
+    assert table.updates == ['INSERT', 'UPDATE']
+    with pytest.raises(ValueError):
+        fetcher.upsert_parameter('am_id', compatible, 'unknown')
+    with pytest.raises(ValueError):
+        fetcher.upsert_parameter('am_id', replace(compatible, id='existing'), None)
+    with pytest.raises(ValueError):
+        fetcher.upsert_parameter('am_id', warnings[1], 'warning-1')
+    fetcher.upsert_parameter('am_id', AMWarning('section', 'text', 'existing'), None)  # ids are unique per kind
+
+
+def test_check_unique_element_ids():
+    warning = AMWarning('section', 'text', 'id')
+    inapplicable_section = InapplicableSection(
+        'section', None, Greater(ParameterEnum.DATE_INSTALLATION.value, date(2010, 1, 1)), 'id'
+    )
+    _check_unique_element_ids(_element_rows('am_id', Parametrization([inapplicable_section], [], [warning])))
+    with pytest.raises(ValueError):
+        _check_unique_element_ids(_element_rows('am_id', Parametrization([], [], [warning, warning])))
+
+
+class _Cursor:
+    def __init__(self, rows: List[Tuple]) -> None:
+        self.rows = rows
+
+    def execute(self, query: str, values: Tuple) -> None:
+        pass
+
+    def fetchall(self) -> List[Tuple]:
+        return self.rows
+
+
+def test_cache_invalidated_after_session(monkeypatch):
+    _, metadata = _am_and_metadata('JORFTEXT000000000001')
+    cache = FetcherCache(check_version=False)
+    table_cache = cache.tables['am_metadata']
+    fetcher = DataFetcher('postgresql://unused', cache=cache)
+    monkeypatch.setattr(fetcher, 'pool', SimpleNamespace(connection=lambda: nullcontext(object())))
+    monkeypatch.setattr(fetcher, '_exectute_update_query', lambda *_: 1)
+
+    with fetcher.session():
+        fetcher.upsert_am_metadata(metadata)
+        table_cache.put(metadata.cid, 'row read by another thread before the commit', 1, 1)
+    assert table_cache.get(metadata.cid) is None
+
+    with pytest.raises(RuntimeError):
+        with fetcher.session():
+            fetcher.upsert_am_metadata(metadata)
+            table_cache.put(metadata.cid, metadata, 2, 1)
+            raise RuntimeError('rollback')
+    assert table_cache.get(metadata.cid) is None
+
+
+def test_instrumentation(monkeypatch):
+    _, metadata = _am_and_metadata('JORFTEXT000000000001')
+    metadata_str = json.dumps(metadata.to_dict())
+    registry = HistogramRegistry()
+    fetcher = DataFetcher('postgresql://unused', instrumentation=registry)
+    monkeypatch.setattr(fetcher, '_cursor', lambda *_: nullcontext(_Cursor([('JORFTEXT000000000001', metadata_str)])))
+    assert fetcher.load_all_am_metadata() == {'JORFTEXT000000000001': metadata}
+    assert fetcher.load_all_am_metadata() == {'JORFTEXT000000000001': metadata}
+
+    summary = registry.summary()['load_all_am_metadata']
+    assert summary['nb_queries'].count == 2
+    assert summary['nb_rows'].max == 1
+    assert summary['nb_bytes'].max == len('JORFTEXT000000000001') + len(metadata_str)
+    assert summary['model_construction'].max > 0
+
+
+def test_change_queries():
+    assert _changes_query().count('%s') == 5
+    assert "SELECT 'structured_am', am_id FROM structured_am WHERE version > %s UNION " in _changes_query()
+    assert _record_change_query() == (
+        'INSERT INTO document_change(table_name, am_id) VALUES (%s, %s) ON CONFLICT (table_name, am_id)'
+        ' DO UPDATE SET version = EXCLUDED.version;'
+    )
+    assert _conditional_load_query('am_metadata') == (
+        'SELECT version, CASE WHEN version = %s THEN NULL ELSE data END FROM am_metadata WHERE am_id = %s;'
+    )
+
+
+def test_load_if_modified(monkeypatch):
+    _, metadata = _am_and_metadata('JORFTEXT000000000001')
+    stored = {'JORFTEXT000000000001': (3, json.dumps(metadata.to_dict()))}
+
+    def _select(query: str, values: Tuple) -> List[Tuple]:
+        known_version, am_id = values
+        if am_id not in stored:
+            return []
+        version, data = stored[am_id]
+        return [(version, None if version == known_version else data)]
+
+    fetcher = DataFetcher('postgresql://unused')
+    monkeypatch.setattr(fetcher, '_exectute_select_query', _select)
+    assert fetcher.load_am_metadata_if_modified('JORFTEXT000000000001', None) == ConditionalLoad(True, 3, metadata)
+    assert fetcher.load_am_metadata_if_modified('JORFTEXT000000000001', 3) == ConditionalLoad(False, 3, None)
+    assert fetcher.load_am_metadata_if_modified('JORFTEXT000000000002', 3) == ConditionalLoad(True, None, None)
+    assert fetcher.load_am_metadata_if_modified('JORFTEXT000000000002', None) == ConditionalLoad(False, None, None)
+    with pytest.raises(ValueError):
+        DataFetcher('postgresql://unused', parametrization_rows=True).load_parametrization_if_modified('id', None)
+
+
+def _nested_am() -> ArreteMinisteriel:
+    def _section(id_: str, sections: List[StructuredText]) -> StructuredText:
+        return StructuredText(EnrichedString(f'Section {id_}'), [EnrichedString(id_)], sections, None, id=id_)
+
+    sections = [_section('1', [_section('1.1', []), _section('1.2', [_section('1.2.1', [])])]), _section('2', [])]
+    return ArreteMinisteriel(EnrichedString('Arrêté du 10/10/10'), sections, [], None, id='JORFTEXT000000000001')
+
+
+def test_section_rows():
+    am = _nested_am()
+    rows = _section_rows('am_id', am.to_dict())
+    assert [row[:5] for row in rows] == [
+        ('am_id', 0, 5, None, None),
+        ('am_id', 1, 4, '1', None),
+        ('am_id', 2, 2, '1.1', '1'),
+        ('am_id', 3, 4, '1.2', '1'),
+        ('am_id', 4, 4, '1.2.1', '1.2'),
+        ('am_id', 5, 5, '2', None),
+    ]
+    assert ArreteMinisteriel.from_dict(_nest_sections([row[1:3] + row[5:] for row in rows])[0]) == am
+    subtree = _nest_sections([row[1:3] + row[5:] for row in rows[3:]])
+    assert [StructuredText.from_dict(dict_) for dict_ in subtree] == am.sections[0].sections[1:] + am.sections[1:]
+
+
+def test_load_sections(monkeypatch):
+    am = _nested_am()
+    rows = _section_rows('JORFTEXT000000000001', am.to_dict())
+
+    def _select(query: str, values: Tuple) -> List[Tuple]:
+        # Evaluates the queries of load_sections and load_am_from_sections on rows.
+        if len(values) == 1:
+            return [(rank, last_rank, data) for _, rank, last_rank, _, _, data in rows]
+        roots = [row for row in rows if row[3] in values[1]]
+        if 'JOIN' not in query:
+            return [(rank, rank, data) for _, rank, _, _, _, data in roots]
+        ranks = sorted({rank for root in roots for rank in range(root[1], root[2] + 1)})
+        return [(rows[rank][1], rows[rank][2], rows[rank][5]) for rank in ranks]
+
+    fetcher = DataFetcher('postgresql://unused', section_rows=True)
+    monkeypatch.setattr(fetcher, '_exectute_select_query', _select)
+    assert fetcher.load_am_from_sections('JORFTEXT000000000001') == am
+    section_1, section_2 = am.sections
+    assert fetcher.load_sections('JORFTEXT000000000001', ['2', '1.2']) == [section_1.sections[1], section_2]
+    assert fetcher.load_sections('JORFTEXT000000000001', ['1', '1.2.1']) == [section_1]
+    loaded = fetcher.load_sections('JORFTEXT000000000001', ['1'], with_subsections=False)
+    assert loaded == [replace(section_1, sections=[])]
+    assert fetcher.load_sections('JORFTEXT000000000001', ['unknown']) == []
+
+
+def test_load_deduplicated_ams(monkeypatch):
+    written_store = ContentStore()
+    am = _nested_am()
+    root = written_store.put_am(am)
+    nodes = {hash_: (hash_, kind, data) for hash_, kind, data in written_store.unsaved_nodes()}
+    queries: List[str] = []
+
+    def _select(query: str, values: Tuple) -> List[Tuple]:
+        queries.append(query.split(' FROM ')[1].split()[0])
+        if 'deduplicated_document' in query:
+            return [(am.id, json.dumps(root))] if am.id in values[1] else []
+        return [nodes[hash_] for hash_ in values[0] if hash_ in nodes]
+
+    fetcher = DataFetcher('postgresql://unused')
+    monkeypatch.setattr(fetcher, 'session', nullcontext)
+    monkeypatch.setattr(fetcher, '_exectute_select_query', _select)
+    store = ContentStore()
+    assert fetcher.load_deduplicated_ams({am.id or '', 'unknown'}, store) == {am.id: am}
+    assert queries == ['deduplicated_document', 'content_node', 'content_node', 'content_node', 'content_node']
+    assert len(store) == len(nodes)
+    queries.clear()
+    assert fetcher.load_deduplicated_ams({am.id or ''}, store) == {am.id: am}
+    assert queries == ['deduplicated_document']
+
+    del nodes[root['sections'][1]]
+    with pytest.raises(ValueError):
+        fetcher.load_deduplicated_ams({am.id or ''}, ContentStore())
@@ -0,0 +1,70 @@
+import pytest
+
+from envinorma.fetcher_cache import CacheStats, FetcherCache, LRUCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache: LRUCache[str] = LRUCache(max_bytes=10)
+    cache.put('a', 'A', 1, 4)
+    cache.put('b', 'B', 1, 4)
+    assert cache.get('a') is not None  # a becomes most recently used
+    cache.put('c', 'C', 1, 4)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.nb_bytes == 8
+    assert cache.stats.evictions == 1
+
+
+def test_lru_cache_ignores_too_large_values():
+    cache: LRUCache[str] = LRUCache(max_bytes=10)
+    cache.put('a', 'A', 1, 11)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_ttl():
+    clock = _Clock()
+    cache: LRUCache[str] = LRUCache(max_bytes=10, ttl=5, clock=clock)
+    cache.put('a', 'A', 1, 1)
+    clock.now = 5
+    assert cache.get('a') is not None
+    clock.now = 6
+    assert cache.get('a') is None
+    assert cache.stats.expirations == 1
+    assert cache.nb_bytes == 0
+
+
+def test_lru_cache_invalidation_and_stats():
+    cache: LRUCache[str] = LRUCache(max_bytes=10)
+    cache.put('a', 'A', 1, 1)
+    entry = cache.get('a')
+    assert entry is not None and entry.value == 'A' and entry.version == 1
+    cache.record_hit()
+    cache.mark_stale('a')
+    cache.put('a', 'A2', 2, 1)
+    cache.invalidate('a')
+    cache.invalidate('unknown')
+    assert cache.get('a') is None
+    assert cache.stats == CacheStats(hits=1, misses=2, stale=1, invalidations=1)
+    assert cache.stats.hit_rate == 1 / 3
+
+
+def test_fetcher_cache():
+    cache = FetcherCache(max_bytes=10)
+    cache.configure_table('structured_am', max_bytes=100, ttl=1)
+    assert cache.tables['structured_am'].max_bytes == 100
+    assert cache.tables['am_metadata'].max_bytes == 10
+    with pytest.raises(ValueError):
+        cache.configure_table('unknown', max_bytes=1)
+    cache.tables['parametrization'].put('a', 'A', 1, 1)
+    cache.invalidate('parametrization', 'a')
+    assert cache.stats()['parametrization'].invalidations == 1
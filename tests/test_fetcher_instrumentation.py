@@ -0,0 +1,39 @@
+import logging
+
+import pytest
+
+from envinorma.fetcher_instrumentation import CallbackSink, CallTimings, HistogramRegistry, LoggingSink, summarize
+
+
+def test_summarize():
+    summary = summarize([float(value) for value in range(100, 0, -1)])
+    assert summary.count == 100
+    assert summary.mean == 50.5
+    assert (summary.p50, summary.p90, summary.p99, summary.max) == (50, 90, 99, 100)
+    assert summarize([3.0]).p99 == 3.0
+    with pytest.raises(ValueError):
+        summarize([])
+
+
+def test_histogram_registry():
+    registry = HistogramRegistry(max_samples=2)
+    for total in [1.0, 2.0, 3.0]:
+        registry.record(CallTimings('load_am', total=total, nb_rows=1))
+    registry.record(CallTimings('load_ams', total=5.0, nb_rows=10))
+    summary = registry.summary()
+    assert summary['load_am']['total'].count == 2
+    assert summary['load_am']['total'].p50 == 2.0
+    assert summary['load_ams']['nb_rows'].max == 10
+    registry.clear()
+    assert registry.summary() == {}
+
+
+def test_callback_and_logging_sinks(caplog):
+    recorded = []
+    CallbackSink(recorded.append).record(CallTimings('load_am'))
+    assert recorded == [CallTimings('load_am')]
+
+    with caplog.at_level(logging.DEBUG, logger='envinorma.data_fetcher'):
+        LoggingSink().record(CallTimings('load_am', total=0.001, nb_rows=3))
+    assert 'load_am: total=1.00ms' in caplog.text
+    assert 'rows=3' in caplog.text
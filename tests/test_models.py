@@ -1,5 +1,7 @@
 import json
+import pickle
 import random
+from dataclasses import fields, replace
 from datetime import date
 from string import ascii_letters
 from typing import Optional
@@ -9,7 +11,7 @@ import pytest
 from envinorma.models.arrete_ministeriel import ArreteMinisteriel, _is_probably_cid, extract_date_of_signature
 from envinorma.models.classement import Classement, ClassementWithAlineas, Regime, group_classements_by_alineas
 from envinorma.models.helpers.date_helpers import _contains_human_date, standardize_title_date
-from envinorma.models.structured_text import Annotations, Applicability, Reference, StructuredText
+from envinorma.models.structured_text import Annotations, Applicability, LazyStructuredText, Reference, StructuredText
 from envinorma.models.text_elements import Cell, EnrichedString, Link, Row, Table, estr
 from envinorma.topics.patterns import TopicName
 
@@ -69,12 +71,47 @@ def test_arrete_ministeriel():
     assert new_dict == dict_
 
 
+def test_to_dict_keeps_field_order():
+    section = _node_section()
+    am = ArreteMinisteriel(_str('Arrete du 01/01/10'), [section], [], orphan_titles={'id': ['title']}, id='JORFTEXTid')
+    dict_ = am.to_dict()
+    assert list(dict_) == [field_.name for field_ in fields(ArreteMinisteriel)]
+    assert list(dict_['sections'][0]) == [field_.name for field_ in fields(StructuredText)]
+    applicability_dict = dict_['sections'][0]['sections'][0]['applicability']
+    assert list(applicability_dict) == [field_.name for field_ in fields(Applicability)]
+    assert dict_['orphan_titles'] == am.orphan_titles and dict_['orphan_titles'] is not am.orphan_titles
+
+
 def test_structured_text():
     dict_ = _node_section().to_dict()
     new_dict = StructuredText.from_dict(dict_).to_dict()
     assert new_dict == dict_
 
 
+def test_lazy_structured_text():
+    section = _node_section()
+    am = ArreteMinisteriel(_str('Arrete du 01/01/10'), [section, _leaf_section()], [], id='JORFTEXTid')
+    lazy_am = ArreteMinisteriel.from_dict(am.to_dict(), lazy=True)
+    lazy_section = lazy_am.sections[0]
+    assert isinstance(lazy_section, LazyStructuredText)
+    assert lazy_am.title == am.title
+    assert lazy_section.id == section.id
+    assert not lazy_section.is_materialized
+    assert lazy_am.sections[1].reference == Reference('ref', 'name')
+    assert lazy_am.sections[1].is_materialized
+
+    assert lazy_section.title == section.title
+    assert lazy_section.is_materialized
+    assert not lazy_section.sections[0].is_materialized
+    assert lazy_am == am and am == lazy_am
+    assert lazy_am.descendent_sections() == am.descendent_sections()
+    assert lazy_am.to_dict() == am.to_dict()
+    assert replace(lazy_am.sections[1], id='other').to_dict() == replace(am.sections[1], id='other').to_dict()
+    assert pickle.loads(pickle.dumps(ArreteMinisteriel.from_dict(am.to_dict(), lazy=True))) == am
+    with pytest.raises(AttributeError):
+        lazy_section.unknown
+
+
 def test_table():
     table_dict = _table().to_dict()
     new_dict = Table.from_dict(table_dict).to_dict()
@@ -0,0 +1,36 @@
+import pytest
+
+from envinorma.storage_codecs import GzipCodec, compact_json, decode_document, get_codec
+
+
+def test_compact_json():
+    assert compact_json({'a': [1, 2], 'b': 'é'}) == '{"a":[1,2],"b":"é"}'
+
+
+def test_gzip_codec():
+    text = compact_json({'text': 'Article 1' * 100})
+    codec = GzipCodec()
+    payload = codec.encode(text)
+    assert len(payload) < len(text)
+    assert codec.decode(payload) == text
+
+
+def test_zstd_codec():
+    pytest.importorskip('zstandard')
+    codec = get_codec('zstd')
+    assert codec.decode(codec.encode('{"a":"b"}')) == '{"a":"b"}'
+
+
+def test_get_codec():
+    assert get_codec('gzip') is get_codec('gzip')
+    with pytest.raises(ValueError):
+        get_codec('unknown')
+
+
+def test_decode_document():
+    assert decode_document('{}', None, None) == '{}'
+    assert decode_document(None, 'gzip', GzipCodec().encode('{}')) == '{}'
+    with pytest.raises(ValueError):
+        decode_document(None, None, None)
+    with pytest.raises(ValueError):
+        decode_document(None, 'gzip', None)
@@ -1,6 +1,10 @@
+import pickle
+from dataclasses import dataclass, field, replace
+from typing import List
+
 import pytest
 
-from envinorma.utils import _split_string, batch, snake_to_camel
+from envinorma.utils import _split_string, add_slots, batch, snake_to_camel
 
 
 def test_split_string():
@@ -24,3 +28,23 @@ def test_batch():
     assert batch([0, 1, 2, 3], 3) == [[0, 1, 2], [3]]
     with pytest.raises(ValueError):
         batch([0, 1, 2, 3], 0)
+
+
+@add_slots
+@dataclass
+class _Slotted:
+    name: str
+    values: List[int] = field(default_factory=list)
+    count: int = 0
+
+
+def test_add_slots():
+    slotted = _Slotted('a')
+    assert slotted == _Slotted('a', [], 0)
+    assert not hasattr(slotted, '__dict__')
+    assert replace(slotted, count=1) == _Slotted('a', [], 1)
+    assert pickle.loads(pickle.dumps(slotted)) == slotted
+    with pytest.raises(AttributeError):
+        slotted.other = 1  # type: ignore
+    with pytest.raises(ValueError):
+        add_slots(_Slotted)